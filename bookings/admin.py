@@ -1,7 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
-from .models import Room, Reservation, Notification, UserProfile
+from .models import (
+    Room, Reservation, ReservationSeries, Notification, UserProfile, OutboxEvent, QueuedEmail, ReminderPolicy,
+    DashboardStats, DailyRoomStats
+)
 
 
 class UserProfileInline(admin.StackedInline):
@@ -55,6 +58,16 @@ class ReservationAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('room', 'user')
 
 
+@admin.register(ReservationSeries)
+class ReservationSeriesAdmin(admin.ModelAdmin):
+    list_display = ('title', 'room', 'user', 'frequency', 'interval', 'start_time', 'until', 'count')
+    list_filter = ('frequency', 'room')
+    search_fields = ('title', 'user__username', 'room__name')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('room', 'user')
+
+
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ('user', 'notification_type', 'is_read', 'created_at')
@@ -64,6 +77,43 @@ class NotificationAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
 
 
+@admin.register(ReminderPolicy)
+class ReminderPolicyAdmin(admin.ModelAdmin):
+    list_display = ('user', 'room', 'offsets', 'updated_at')
+    search_fields = ('user__username', 'room__name')
+    raw_id_fields = ('user',)
+
+
+@admin.register(DailyRoomStats)
+class DailyRoomStatsAdmin(admin.ModelAdmin):
+    list_display = ('date', 'room', 'reservations', 'booked_minutes')
+    list_filter = ('room',)
+    date_hierarchy = 'date'
+
+
+@admin.register(DashboardStats)
+class DashboardStatsAdmin(admin.ModelAdmin):
+    list_display = ('active_rooms', 'total_reservations', 'confirmed_reservations', 'total_users',
+                    'pending_reminders', 'updated_at', 'reconciled_at')
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('event_type', 'reservation', 'status', 'attempts', 'available_at', 'processed_at')
+    list_filter = ('event_type', 'status')
+    readonly_fields = ('payload', 'last_error', 'claimed_by', 'claimed_until', 'created_at', 'processed_at')
+    ordering = ('-created_at',)
+
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to_email', 'status', 'attempts', 'available_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('to_email', 'subject')
+    readonly_fields = ('last_error', 'claimed_by', 'claimed_until', 'created_at', 'sent_at')
+    ordering = ('-created_at',)
+
+
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'phone_number', 'department', 'is_admin')
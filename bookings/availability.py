@@ -0,0 +1,293 @@
+"""
+In-process availability index.
+
+Keeps a sorted array of confirmed reservations per room so that overlap and
+free-gap questions can be answered with a binary search instead of a database
+round trip. Indexes are built lazily, stamped with a per-room version kept in
+the Django cache and rebuilt when a Reservation signal bumps that version.
+
+The versions must be visible to every process serving requests, so the index
+needs a shared cache (CACHE_BACKEND=db or file, or a cache server); the
+bookings.E001 system check refuses to start with a per-process one.
+
+The index only covers reservations ending after the moment it was built, so
+queries about the past fall through to the ORM. It is a read-side
+optimisation for search traffic; booking validation still goes to the database.
+
+Also home to the free-slot finder and alternative-room suggestions used when
+a booking is rejected.
+"""
+from bisect import bisect_left
+from datetime import datetime, time as dt_time, timedelta
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'availability:version:{}'
+DEFAULT_WORKING_HOURS = (dt_time(8, 0), dt_time(18, 0))
+
+
+def index_enabled():
+    return getattr(settings, 'AVAILABILITY_INDEX_ENABLED', False)
+
+
+class RoomIndex:
+    """Confirmed reservations of one room, sorted by start time"""
+
+    def __init__(self, room_id, intervals, version, horizon):
+        intervals = sorted(intervals)
+        self.room_id = room_id
+        self.version = version
+        self.horizon = horizon
+        self.built_at = time.monotonic()
+        self.starts = [start for start, end, pk in intervals]
+        self.ends = [end for start, end, pk in intervals]
+        self.ids = [pk for start, end, pk in intervals]
+        # Running maximum of end times, so a single bisect tells us whether
+        # anything starting before `end` is still running at `start`.
+        self.max_ends = []
+        running = None
+        for end in self.ends:
+            running = end if running is None or end > running else running
+            self.max_ends.append(running)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def covers(self, start_time):
+        return start_time >= self.horizon
+
+    def overlaps(self, start_time, end_time, exclude_id=None):
+        i = bisect_left(self.starts, end_time)
+        if exclude_id is None:
+            return i > 0 and self.max_ends[i - 1] > start_time
+        j = i - 1
+        while j >= 0 and self.max_ends[j] > start_time:
+            if self.ends[j] > start_time and self.ids[j] != exclude_id:
+                return True
+            j -= 1
+        return False
+
+    def free_gaps(self, window_start, window_end, min_duration=None):
+        """Yield (start, end) gaps inside the window not covered by any reservation"""
+        i = bisect_left(self.starts, window_start)
+        cursor = window_start
+        if i > 0 and self.max_ends[i - 1] > cursor:
+            cursor = self.max_ends[i - 1]
+        while i < len(self.starts) and self.starts[i] < window_end:
+            if self.starts[i] > cursor:
+                gap_end = self.starts[i]
+                if min_duration is None or gap_end - cursor >= min_duration:
+                    yield cursor, gap_end
+            if self.ends[i] > cursor:
+                cursor = self.ends[i]
+            i += 1
+        if cursor < window_end and (min_duration is None or window_end - cursor >= min_duration):
+            yield cursor, window_end
+
+
+class AvailabilityEngine:
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'AVAILABILITY_INDEX_TTL', 300)
+
+    def _versions(self, room_ids):
+        keys = {VERSION_KEY.format(room_id): room_id for room_id in room_ids}
+        stored = cache.get_many(keys.keys())
+        return {room_id: stored.get(key, 0) for key, room_id in keys.items()}
+
+    def _is_fresh(self, index, version):
+        return (
+            index is not None
+            and index.version == version
+            and time.monotonic() - index.built_at < self.ttl
+        )
+
+    def get_indexes(self, room_ids):
+        """Return fresh indexes for the rooms, rebuilding stale ones in one query"""
+        from .models import Reservation
+
+        room_ids = list(room_ids)
+        versions = self._versions(room_ids)
+        with self._lock:
+            indexes = {room_id: self._indexes.get(room_id) for room_id in room_ids}
+        stale = [
+            room_id for room_id, index in indexes.items()
+            if not self._is_fresh(index, versions[room_id])
+        ]
+        if stale:
+            horizon = timezone.now()
+            intervals = {room_id: [] for room_id in stale}
+            rows = Reservation.objects.filter(
+                room_id__in=stale,
+                end_time__gt=horizon,
+                status='confirmed'
+            ).values_list('room_id', 'start_time', 'end_time', 'id')
+            for room_id, start, end, pk in rows.iterator():
+                intervals[room_id].append((start, end, pk))
+            with self._lock:
+                for room_id in stale:
+                    index = RoomIndex(room_id, intervals[room_id], versions[room_id], horizon)
+                    self._indexes[room_id] = index
+                    indexes[room_id] = index
+            logger.debug(f"Rebuilt availability index for {len(stale)} rooms")
+        return indexes
+
+    def get_index(self, room_id):
+        return self.get_indexes([room_id])[room_id]
+
+    def is_available(self, room_id, start_time, end_time, exclude_id=None):
+        index = self.get_index(room_id)
+        if not index.covers(start_time):
+            from .models import Room
+            return Room.objects.filter(id=room_id).available_between(start_time, end_time).exists()
+        return not index.overlaps(start_time, end_time, exclude_id)
+
+    def available_room_ids(self, room_ids, start_time, end_time):
+        indexes = self.get_indexes(room_ids)
+        if not all(index.covers(start_time) for index in indexes.values()):
+            from .models import Room
+            return list(
+                Room.objects.filter(id__in=indexes.keys())
+                .available_between(start_time, end_time)
+                .values_list('id', flat=True)
+            )
+        return [
+            room_id for room_id, index in indexes.items()
+            if not index.overlaps(start_time, end_time)
+        ]
+
+    def invalidate(self, room_id):
+        """Bump the room's version once the surrounding transaction commits"""
+        # Bumping before the commit would let a rebuild running meanwhile read
+        # the old rows and store them under the new version, as if fresh
+        transaction.on_commit(lambda: self._bump(room_id))
+
+    def _bump(self, room_id):
+        key = VERSION_KEY.format(room_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+        with self._lock:
+            self._indexes.pop(room_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+engine = AvailabilityEngine()
+
+
+def _within_hours(gap_start, gap_end, day_start, day_end):
+    """Split a gap into the parts that fall inside working hours on each day"""
+    if day_start is None and day_end is None:
+        yield gap_start, gap_end
+        return
+    tz = timezone.get_current_timezone()
+    day = timezone.localtime(gap_start, tz).date()
+    last_day = timezone.localtime(gap_end, tz).date()
+    while day <= last_day:
+        open_at = timezone.make_aware(datetime.combine(day, day_start or dt_time.min), tz)
+        if day_end is None:
+            close_at = timezone.make_aware(datetime.combine(day + timedelta(days=1), dt_time.min), tz)
+        else:
+            close_at = timezone.make_aware(datetime.combine(day, day_end), tz)
+        start, end = max(gap_start, open_at), min(gap_end, close_at)
+        if start < end:
+            yield start, end
+        day += timedelta(days=1)
+
+
+def find_free_slots(room, after, duration, count=5, day_start=None, day_end=None, horizon=timedelta(days=14)):
+    """
+    Return up to `count` free (start, end) gaps of at least `duration` in the room.
+
+    Confirmed reservations from `after` to `after + horizon` are read as one
+    sorted stream from a single query and the gaps between them are clipped
+    to the optional working hours.
+    """
+    from .models import Reservation
+
+    after = max(after, timezone.now())
+    until = after + horizon
+    reservations = Reservation.objects.filter(
+        room=room,
+        end_time__gt=after,
+        start_time__lt=until,
+        status='confirmed'
+    ).order_by('start_time').values_list('start_time', 'end_time')
+
+    slots = []
+
+    def collect(gap_start, gap_end):
+        for start, end in _within_hours(gap_start, gap_end, day_start, day_end):
+            if end - start >= duration:
+                slots.append((start, end))
+                if len(slots) >= count:
+                    return True
+        return False
+
+    cursor = after
+    for start, end in reservations.iterator():
+        if start > cursor and collect(cursor, start):
+            return slots
+        cursor = max(cursor, end)
+    if cursor < until:
+        collect(cursor, until)
+    return slots
+
+
+def _tokens(text, separator=','):
+    return {part.strip().lower() for part in (text or '').split(separator) if part.strip()}
+
+
+def _similarity(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def suggest_alternative_rooms(room, start_time, end_time, min_capacity=None, limit=3):
+    """
+    Rank other active rooms that are free for the whole window.
+
+    One NOT EXISTS query finds every free room with enough capacity; they are
+    then scored on how closely capacity fits and how much location and
+    amenities overlap with the requested room.
+    """
+    from .models import Room
+
+    needed = min_capacity or room.capacity
+    candidates = (
+        Room.objects.filter(is_active=True, capacity__gte=needed)
+        .exclude(pk=room.pk)
+        .available_between(start_time, end_time)
+    )
+
+    location = _tokens(room.location)
+    amenities = _tokens(room.amenities)
+    scored = []
+    for candidate in candidates:
+        # Capacity 0 only passes the filter when nothing is needed, which is a perfect fit
+        fit = needed / candidate.capacity if candidate.capacity else 1.0
+        score = (
+            0.4 * _similarity(location, _tokens(candidate.location))
+            + 0.3 * _similarity(amenities, _tokens(candidate.amenities))
+            + 0.3 * fit
+        )
+        scored.append((score, candidate))
+    scored.sort(key=lambda pair: (-pair[0], pair[1].capacity, pair[1].name))
+    return [candidate for score, candidate in scored[:limit]]
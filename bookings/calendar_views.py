@@ -0,0 +1,116 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import condition
+from .models import Room
+from .occupancy import calendar_window, window_etag, build_calendar
+
+MAX_TIMELINE_ROOMS = 100
+
+
+def _window(request):
+    """(view, first_day, last_day) for ?date=&view=; raises ValueError for a date that is not YYYY-MM-DD"""
+    anchor = timezone.localdate()
+    if request.GET.get('date'):
+        # parse_date returns None for a malformed date and raises ValueError for one like 2024-02-30
+        anchor = parse_date(request.GET['date'])
+        if anchor is None:
+            raise ValueError(request.GET['date'])
+    view = 'month' if request.GET.get('view') == 'month' else 'week'
+    first_day, last_day = calendar_window(anchor, view)
+    return view, first_day, last_day
+
+
+def _bad_date():
+    return JsonResponse({'error': 'date must be a valid YYYY-MM-DD date'}, status=400)
+
+
+def _is_admin(user):
+    return hasattr(user, 'profile') and user.profile.is_admin
+
+
+def _timeline_room_ids(request):
+    rooms = Room.objects.filter(is_active=True)
+    requested = request.GET.get('rooms')
+    if requested:
+        rooms = rooms.filter(id__in=[int(room_id) for room_id in requested.split(',') if room_id.isdigit()])
+    return list(rooms.values_list('id', flat=True)[:MAX_TIMELINE_ROOMS])
+
+
+def room_calendar_etag(request, room_id):
+    try:
+        view, first_day, last_day = _window(request)
+    except ValueError:
+        return None
+    return f'"{view}:{window_etag([room_id], first_day, last_day)}"'
+
+
+def timeline_etag(request):
+    if not request.user.is_authenticated or not _is_admin(request.user):
+        return None
+    try:
+        view, first_day, last_day = _window(request)
+    except ValueError:
+        return None
+    return f'"{view}:{window_etag(_timeline_room_ids(request), first_day, last_day)}"'
+
+
+@login_required
+@condition(etag_func=room_calendar_etag)
+def room_calendar(request, room_id):
+    """Week or month calendar for one room with per-day occupancy"""
+    room = get_object_or_404(Room, id=room_id, is_active=True)
+    try:
+        view, first_day, last_day = _window(request)
+    except ValueError:
+        return _bad_date()
+    days, by_day, occupancy = build_calendar([room.id], first_day, last_day)
+    
+    return JsonResponse({
+        'room': {'id': room.id, 'name': room.name},
+        'view': view,
+        'start': first_day.isoformat(),
+        'end': last_day.isoformat(),
+        'days': [
+            {
+                'date': day.isoformat(),
+                'occupancy': occupancy[room.id][i],
+                'reservations': by_day[room.id][i],
+            }
+            for i, day in enumerate(days)
+        ],
+    })
+
+
+@login_required
+@condition(etag_func=timeline_etag)
+def admin_resource_timeline(request):
+    """Occupancy of many rooms side by side for managers"""
+    if not _is_admin(request.user):
+        return JsonResponse({'error': 'Admin privileges required'}, status=403)
+    
+    try:
+        view, first_day, last_day = _window(request)
+    except ValueError:
+        return _bad_date()
+    room_ids = _timeline_room_ids(request)
+    days, by_day, occupancy = build_calendar(room_ids, first_day, last_day)
+    names = dict(Room.objects.filter(id__in=room_ids).values_list('id', 'name'))
+    
+    return JsonResponse({
+        'view': view,
+        'start': first_day.isoformat(),
+        'end': last_day.isoformat(),
+        'days': [day.isoformat() for day in days],
+        'rooms': [
+            {
+                'id': room_id,
+                'name': names.get(room_id),
+                'occupancy': occupancy[room_id],
+                'reservations': by_day[room_id],
+            }
+            for room_id in room_ids
+        ],
+    })
@@ -0,0 +1,93 @@
+"""
+Cached room catalog.
+
+The active rooms change a few times a month but are read by nearly every
+page and booking form, so they are kept in the Django cache under a key that
+embeds a catalog version. Room signals bump the version, which retires the
+cached list and every template fragment keyed on it (see the room cards in
+home.html and room_list.html) without having to find and delete them.
+
+Hits and misses are counted in the cache as well, so with a shared backend
+`manage.py cache_stats` reports them across all processes.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'rooms:catalog:version'
+CATALOG_KEY = 'rooms:catalog:{}'
+HITS_KEY = 'rooms:catalog:hits'
+MISSES_KEY = 'rooms:catalog:misses'
+
+
+def catalog_ttl():
+    return getattr(settings, 'ROOM_CATALOG_TTL', 3600)
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # add() so two processes racing on a missing counter don't reset each other
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def catalog_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def active_rooms():
+    """Active rooms in name order, from the cache when the catalog version still matches"""
+    from .models import Room
+
+    key = CATALOG_KEY.format(catalog_version())
+    rooms = cache.get(key)
+    if rooms is not None:
+        _incr(HITS_KEY)
+        return rooms
+    _incr(MISSES_KEY)
+    rooms = list(Room.objects.filter(is_active=True))
+    cache.set(key, rooms, catalog_ttl())
+    logger.debug(f"Cached room catalog with {len(rooms)} rooms")
+    return rooms
+
+
+def rooms_by_id():
+    return {room.id: room for room in active_rooms()}
+
+
+def get_active_room(room_id):
+    """An active room from the catalog, or None"""
+    return rooms_by_id().get(room_id)
+
+
+def stats():
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = counters.get(HITS_KEY, 0)
+    misses = counters.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'version': catalog_version(),
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def availability_index_cache(app_configs, **kwargs):
+    """The availability index needs its version keys in a cache every process shares"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if getattr(settings, 'AVAILABILITY_INDEX_ENABLED', False) and backend in PER_PROCESS_CACHES:
+        return [Error(
+            'AVAILABILITY_INDEX_ENABLED needs a cache shared by all processes.',
+            hint='Set CACHE_BACKEND to db or file (or a cache server backend), or turn the index off.',
+            obj=backend,
+            id='bookings.E001',
+        )]
+    return []
@@ -1,4 +1,5 @@
 from .models import Notification
+from django.conf import settings
 from django.db import connection
 
 
@@ -7,6 +8,9 @@ def notification_count(request):
         if request.user.is_authenticated:
             # Check if database is ready
             connection.ensure_connection()
+            # base.html loads user.profile anyway, so the denormalized counter costs no extra query
+            if hasattr(request.user, 'profile'):
+                return {'unread_notifications_count': request.user.profile.unread_notifications}
             unread_count = Notification.objects.filter(
                 user=request.user,
                 is_read=False
@@ -15,4 +19,8 @@ def notification_count(request):
     except Exception:
         # If database is not ready or any error occurs, return 0
         pass
-    return {'unread_notifications_count': 0}
\ No newline at end of file
+    return {'unread_notifications_count': 0}
+
+
+def live_events(request):
+    return {'live_events_enabled': getattr(settings, 'EVENTS_STREAM_ENABLED', False)}
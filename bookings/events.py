@@ -0,0 +1,172 @@
+"""
+Live events for the notification and availability stream.
+
+Events are published to channels ('user:<id>' for a user's notifications,
+'room:<id>' for changes to a room's bookings) and fanned out to the
+subscribers held by this process, typically the open Server-Sent Events
+connections of stream_views.event_stream.
+
+Publishing goes through a broker so that several server processes can share
+events. The default LocalBroker simply hands them back to this process, which
+is enough for a single ASGI worker and for development. To carry them between
+processes (including worker commands such as dispatch_outbox), point
+EVENTS_BROKER at a class that takes the hub, implements publish(channel,
+event) and calls hub.deliver() for the events it receives in every process.
+Delivery is best effort: a subscriber that falls behind loses its oldest
+events, and nothing is replayed after a reconnect.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def room_channel(room_id):
+    return f'room:{room_id}'
+
+
+class Subscription:
+    """The events of some channels, queued for one consumer on one event loop"""
+
+    def __init__(self, hub, channels):
+        self.hub = hub
+        self.channels = list(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = 0
+
+    def offer(self, event):
+        # Runs on the subscriber's loop; drop the oldest event rather than block publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    """Channel -> subscriptions in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+        self._ids = itertools.count(1)
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def deliver(self, channel, event):
+        """Hand an event to every local subscriber of the channel; safe from any thread"""
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+        if not subscribers:
+            return
+        event = {**event, 'id': next(self._ids), 'channel': channel}
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down without unsubscribing
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(set().union(*self._subscriptions.values()))
+
+
+class LocalBroker:
+    """Stand-in for a shared message broker: events stay in this process"""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def publish(self, channel, event):
+        self.hub.deliver(channel, event)
+
+
+hub = Hub()
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_class = import_string(getattr(settings, 'EVENTS_BROKER', 'bookings.events.LocalBroker'))
+                _broker = broker_class(hub)
+    return _broker
+
+
+def publish(channel, event):
+    try:
+        get_broker().publish(channel, event)
+    except Exception as e:
+        # Live updates are a convenience; never fail the write that caused them
+        logger.error(f"Error publishing event to {channel}: {e}")
+
+
+def publish_on_commit(channel, event):
+    """Publish once the surrounding transaction commits, so nobody hears about rolled back rows"""
+    transaction.on_commit(lambda: publish(channel, event))
+
+
+def subscribe(channels):
+    """Subscribe from async code; use as `async with subscribe([...]) as subscription`"""
+    return hub.subscribe(channels)
+
+
+def notification_event(notification):
+    return {
+        'type': 'notification',
+        'notification_id': notification.id,
+        'notification_type': notification.notification_type,
+        'message': notification.message,
+        'reservation_id': notification.reservation_id,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None,
+    }
+
+
+def availability_event(reservation, deleted=False):
+    return {
+        'type': 'availability',
+        'room_id': reservation.room_id,
+        'reservation_id': reservation.id,
+        'start_time': reservation.start_time.isoformat(),
+        'end_time': reservation.end_time.isoformat(),
+        'status': 'deleted' if deleted else reservation.status,
+    }
@@ -1,11 +1,37 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from .models import Reservation, Room, UserProfile
+from .models import Reservation, ReservationSeries, Room, UserProfile, ROOM_UNAVAILABLE_MESSAGE, room_overlap_enforced
+from . import catalog, recurrence
 from django.utils import timezone
 from datetime import datetime, timedelta
 
 
+class CatalogRoomIterator(forms.models.ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for room in catalog.active_rooms():
+            yield self.choice(room)
+
+    def __len__(self):
+        return len(catalog.active_rooms()) + (self.field.empty_label is not None)
+
+
+class CatalogRoomChoiceField(forms.ModelChoiceField):
+    """
+    Active-room choice whose options come from the cached room catalog.
+
+    The catalog may be a little behind in other processes, so a submitted room
+    is still looked up in the database and must be active right now.
+    """
+    iterator = CatalogRoomIterator
+
+    def __init__(self, *args, **kwargs):
+        kwargs['queryset'] = Room.objects.filter(is_active=True)
+        super().__init__(*args, **kwargs)
+
+
 class CustomUserCreationForm(UserCreationForm):
     email = forms.EmailField(required=True)
     first_name = forms.CharField(max_length=30, required=True)
@@ -35,6 +61,7 @@ class ReservationForm(forms.ModelForm):
     class Meta:
         model = Reservation
         fields = ['room', 'title', 'description', 'start_time', 'end_time']
+        field_classes = {'room': CatalogRoomChoiceField}
         widgets = {
             'start_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
             'end_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
@@ -45,8 +72,7 @@ class ReservationForm(forms.ModelForm):
         user = kwargs.pop('user', None)
         room_id = kwargs.pop('room_id', None)
         super().__init__(*args, **kwargs)
-        
-        self.fields['room'].queryset = Room.objects.filter(is_active=True)
+        self.room_unavailable = False
         
         if room_id:
             self.fields['room'].initial = room_id
@@ -74,12 +100,93 @@ class ReservationForm(forms.ModelForm):
             if start_time < min_time:
                 raise forms.ValidationError("Cannot create reservation more than 5 minutes in the past.")
             
-            if room and not room.is_available(start_time, end_time):
-                raise forms.ValidationError("Room is not available for the selected time period.")
+            if room and not room_overlap_enforced() and not room.is_available(start_time, end_time):
+                self.room_unavailable = True
+                raise forms.ValidationError(ROOM_UNAVAILABLE_MESSAGE)
 
         return cleaned_data
 
 
+class RecurringReservationForm(forms.ModelForm):
+    skip_conflicts = forms.BooleanField(
+        required=False,
+        label='Book the remaining dates if some are taken'
+    )
+
+    class Meta:
+        model = ReservationSeries
+        fields = ['title', 'description', 'start_time', 'end_time', 'frequency', 'interval', 'until', 'count']
+        widgets = {
+            'start_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
+            'end_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
+            'until': forms.DateInput(attrs={'type': 'date'}),
+            'description': forms.Textarea(attrs={'rows': 3}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        self.room = kwargs.pop('room')
+        self.user = kwargs.pop('user')
+        super().__init__(*args, **kwargs)
+        self.occurrences = []
+        self.conflicts = {}
+
+        self.fields['interval'].widget.attrs['min'] = 1
+        self.fields['count'].widget.attrs.update({'min': 1, 'max': recurrence.MAX_OCCURRENCES})
+        now = timezone.now()
+        self.fields['start_time'].widget.attrs['min'] = now.strftime('%Y-%m-%dT%H:%M')
+        self.fields['end_time'].widget.attrs['min'] = now.strftime('%Y-%m-%dT%H:%M')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_time = cleaned_data.get('start_time')
+        end_time = cleaned_data.get('end_time')
+        until = cleaned_data.get('until')
+        count = cleaned_data.get('count')
+
+        if not start_time or not end_time:
+            return cleaned_data
+        if start_time >= end_time:
+            raise forms.ValidationError("End time must be after start time.")
+        if end_time - start_time > timedelta(days=1):
+            raise forms.ValidationError("A recurring reservation cannot last longer than a day.")
+        if start_time < timezone.now():
+            raise forms.ValidationError("Cannot create reservation in the past.")
+        if until is None and not count:
+            raise forms.ValidationError("Choose an end date or a number of occurrences.")
+        if count and count > recurrence.MAX_OCCURRENCES:
+            raise forms.ValidationError(f"A series can have at most {recurrence.MAX_OCCURRENCES} occurrences.")
+        if until and until < timezone.localtime(start_time).date():
+            raise forms.ValidationError("The end date must not be before the first occurrence.")
+
+        # One past the limit tells a series that runs on past it from one that fits
+        self.occurrences = recurrence.expand(
+            start_time, end_time, cleaned_data.get('frequency'), cleaned_data.get('interval') or 1, until, count,
+            limit=recurrence.MAX_OCCURRENCES + 1,
+        )
+        if len(self.occurrences) > recurrence.MAX_OCCURRENCES:
+            self.occurrences = []
+            raise forms.ValidationError(
+                f"A series can have at most {recurrence.MAX_OCCURRENCES} occurrences; choose an earlier end date."
+            )
+        self.conflicts = recurrence.find_conflicts(self.room, self.user, self.occurrences)
+        if self.conflicts and not cleaned_data.get('skip_conflicts'):
+            raise forms.ValidationError(self.conflict_messages())
+        if len(self.conflicts) == len(self.occurrences):
+            raise forms.ValidationError("Every date in this series is already taken.")
+
+        return cleaned_data
+
+    def conflict_messages(self):
+        messages = []
+        for i in sorted(self.conflicts):
+            start, end = self.occurrences[i]
+            start = timezone.localtime(start)
+            for reservation in self.conflicts[i]:
+                reason = 'the room is booked' if reservation.room_id == self.room.id else 'you have another booking'
+                messages.append(f"{start.strftime('%a %d %b %Y %H:%M')}: {reason} ({reservation.title})")
+        return messages
+
+
 class ReservationUpdateForm(forms.ModelForm):
     class Meta:
         model = Reservation
@@ -109,8 +216,8 @@ class ReservationUpdateForm(forms.ModelForm):
             if start_time < timezone.now():
                 raise forms.ValidationError("Cannot create reservation in the past.")
             
-            if not self.instance.room.is_available(start_time, end_time, self.instance):
-                raise forms.ValidationError("Room is not available for the selected time period.")
+            if not room_overlap_enforced() and not self.instance.room.is_available(start_time, end_time, self.instance):
+                raise forms.ValidationError(ROOM_UNAVAILABLE_MESSAGE)
 
         return cleaned_data
 
@@ -145,10 +252,65 @@ class RoomSearchForm(forms.Form):
         return cleaned_data
 
 
+class FreeSlotForm(forms.Form):
+    duration = forms.IntegerField(min_value=1, max_value=24 * 60, help_text='Meeting length in minutes')
+    after = forms.DateTimeField(required=False)
+    count = forms.IntegerField(required=False, min_value=1, max_value=20)
+    day_start = forms.TimeField(required=False)
+    day_end = forms.TimeField(required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        day_start = cleaned_data.get('day_start')
+        day_end = cleaned_data.get('day_end')
+
+        if day_start and day_end and day_start >= day_end:
+            raise forms.ValidationError("End time must be after start time.")
+
+        return cleaned_data
+
+
+class SlotSearchForm(forms.Form):
+    MAX_DAYS = 31
+
+    capacity = forms.IntegerField(required=False, min_value=1)
+    date_from = forms.DateField()
+    date_to = forms.DateField(required=False)
+    duration = forms.IntegerField(min_value=1, max_value=24 * 60, help_text='Meeting length in minutes')
+    day_start = forms.TimeField(required=False)
+    day_end = forms.TimeField(required=False)
+    slot = forms.TypedChoiceField(
+        required=False,
+        coerce=int,
+        empty_value=15,
+        choices=[(5, '5'), (10, '10'), (15, '15'), (30, '30'), (60, '60')]
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to') or date_from
+        day_start = cleaned_data.get('day_start')
+        day_end = cleaned_data.get('day_end')
+
+        if date_from and date_to:
+            if date_to < date_from:
+                raise forms.ValidationError("End date must not be before start date.")
+            if (date_to - date_from).days >= self.MAX_DAYS:
+                raise forms.ValidationError(f"Search at most {self.MAX_DAYS} days at a time.")
+            cleaned_data['date_to'] = date_to
+
+        if day_start and day_end and day_start >= day_end:
+            raise forms.ValidationError("End time must be after start time.")
+
+        return cleaned_data
+
+
 class AdminReservationForm(forms.ModelForm):
     class Meta:
         model = Reservation
         fields = ['room', 'user', 'title', 'description', 'start_time', 'end_time', 'status']
+        field_classes = {'room': CatalogRoomChoiceField}
         widgets = {
             'start_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
             'end_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
@@ -158,8 +320,6 @@ class AdminReservationForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
-        self.fields['room'].queryset = Room.objects.filter(is_active=True)
-        
         now = timezone.now()
         self.fields['start_time'].widget.attrs['min'] = now.strftime('%Y-%m-%dT%H:%M')
         self.fields['end_time'].widget.attrs['min'] = now.strftime('%Y-%m-%dT%H:%M')
@@ -177,8 +337,9 @@ class AdminReservationForm(forms.ModelForm):
             if start_time < timezone.now():
                 raise forms.ValidationError("Cannot create reservation in the past.")
             
-            if room and not room.is_available(start_time, end_time, self.instance if self.instance.pk else None):
-                raise forms.ValidationError("Room is not available for the selected time period.")
+            exclude = self.instance if self.instance.pk else None
+            if room and not room_overlap_enforced() and not room.is_available(start_time, end_time, exclude):
+                raise forms.ValidationError(ROOM_UNAVAILABLE_MESSAGE)
 
         return cleaned_data
 
@@ -0,0 +1,64 @@
+"""
+Lease-based claiming of work rows.
+
+Workers stamp a batch of rows with a random token and a lease expiry in one
+short transaction, then process the rows outside it. A row is claimable when
+it has no lease or its lease has expired, so work held by a crashed worker is
+picked up again once the lease runs out. On PostgreSQL the candidate rows are
+read with SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers never wait
+on each other; elsewhere a single conditional UPDATE decides who wins.
+
+Models using this need `claimed_by` (CharField) and `claimed_until`
+(nullable DateTimeField) columns; `retry_later` additionally expects
+`attempts`, `last_error`, `status` and `available_at`.
+"""
+from datetime import timedelta
+from uuid import uuid4
+
+from django.db import connection, transaction
+from django.db.models import Q, Subquery
+from django.utils import timezone
+
+
+def claimable(queryset, now=None):
+    now = now or timezone.now()
+    return queryset.filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now))
+
+
+def claim_batch(queryset, batch_size, lease=timedelta(minutes=5)):
+    """Claim up to `batch_size` rows of `queryset`; returns (token, queryset of the claimed rows)"""
+    token = uuid4().hex
+    now = timezone.now()
+    available = claimable(queryset, now)
+    candidates = available.order_by('pk')
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(candidates.select_for_update(skip_locked=True).values_list('pk', flat=True)[:batch_size])
+            if ids:
+                # Re-check the lease in the UPDATE itself so two workers that read
+                # the same candidates cannot both claim them.
+                available.filter(pk__in=ids).update(claimed_by=token, claimed_until=now + lease)
+    else:
+        # One UPDATE ... WHERE pk IN (SELECT ... LIMIT n) statement: SQLite
+        # takes the write lock up front instead of upgrading a read lock,
+        # which fails with "database is locked" when workers race.
+        available.filter(pk__in=Subquery(candidates.values('pk')[:batch_size])).update(
+            claimed_by=token, claimed_until=now + lease
+        )
+    return token, queryset.model.objects.filter(claimed_by=token)
+
+
+def release(queryset):
+    return queryset.update(claimed_by='', claimed_until=None)
+
+
+def retry_later(row, error, max_attempts, base_delay=30):
+    """Record a failed attempt and release the lease, backing off exponentially or giving up"""
+    row.attempts += 1
+    row.last_error = str(error)
+    row.claimed_until = None
+    if row.attempts >= max_attempts:
+        row.status = 'failed'
+    else:
+        row.available_at = timezone.now() + timedelta(seconds=base_delay * 2 ** row.attempts)
+    row.save(update_fields=['attempts', 'last_error', 'claimed_until', 'status', 'available_at'])
@@ -0,0 +1,100 @@
+"""
+Email queue delivery.
+
+Confirmation and reminder emails are written to the QueuedEmail table instead
+of being sent inline. A sender claims a batch of due rows with a lease and
+sends them over one open backend connection, so an SMTP deployment pays for
+the TLS handshake once per batch (or once per worker thread with
+`run_mail_worker`) rather than once per message. Failed messages are retried
+with exponential backoff.
+"""
+from datetime import timedelta
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .leases import claim_batch, retry_later
+from .models import QueuedEmail
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+
+
+def _lease():
+    return timedelta(seconds=getattr(settings, 'EMAIL_QUEUE_LEASE_SECONDS', 300))
+
+
+def send_batch(emails, connection):
+    """
+    Send the claimed emails over an already open connection; returns (sent, failed).
+
+    Messages go out one at a time on the shared connection so a rejected
+    recipient only fails its own row. After a connection error the connection
+    is reopened once for the rest of the batch.
+    """
+    sent_ids = []
+    failed = 0
+    for email in emails:
+        message = EmailMessage(
+            email.subject,
+            email.body,
+            email.from_email or settings.DEFAULT_FROM_EMAIL,
+            [email.to_email],
+            connection=connection,
+        )
+        try:
+            connection.send_messages([message])
+        except Exception as e:
+            failed += 1
+            retry_later(email, e, MAX_ATTEMPTS)
+            logger.error(f"Error sending queued email {email.id} to {email.to_email}: {e}")
+            # The server may have dropped us; start the rest of the batch on a fresh connection
+            connection.close()
+            try:
+                connection.open()
+            except Exception:
+                pass
+        else:
+            sent_ids.append(email.id)
+
+    if sent_ids:
+        QueuedEmail.objects.filter(id__in=sent_ids).update(
+            status='sent', sent_at=timezone.now(), claimed_until=None
+        )
+    return len(sent_ids), failed
+
+
+def claim(batch_size=50, ids=None):
+    due = QueuedEmail.objects.filter(status='pending', available_at__lte=timezone.now())
+    if ids is not None:
+        due = due.filter(id__in=ids)
+    token, claimed = claim_batch(due, batch_size, _lease())
+    return list(claimed)
+
+
+def deliver(batch_size=50, ids=None, connection=None):
+    """Claim and send one batch of due emails; returns (sent, failed)"""
+    emails = claim(batch_size, ids)
+    if not emails:
+        return 0, 0
+
+    own_connection = connection is None
+    if own_connection:
+        connection = get_connection(fail_silently=False)
+    try:
+        # A no-op when the caller's connection is still open
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            retry_later(email, e, MAX_ATTEMPTS)
+        logger.error(f"Could not open email connection, {len(emails)} emails rescheduled: {e}")
+        return 0, len(emails)
+
+    try:
+        return send_batch(emails, connection)
+    finally:
+        if own_connection:
+            connection.close()
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from bookings.models import Room
+from bookings.availability import AvailabilityEngine
+from datetime import timedelta
+import random
+import time
+
+
+class Command(BaseCommand):
+    help = 'Compare the in-memory availability index with the ORM availability query'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=1000, help='Number of random windows to test')
+        parser.add_argument('--days', type=int, default=14, help='How far ahead the random windows may start')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rooms = list(Room.objects.filter(is_active=True).values_list('id', flat=True))
+        if not rooms:
+            self.stdout.write(self.style.ERROR('No active rooms to benchmark'))
+            return
+
+        rng = random.Random(options['seed'])
+        now = timezone.now()
+        windows = []
+        for _ in range(options['checks']):
+            start = now + timedelta(minutes=15 * rng.randint(1, options['days'] * 96))
+            end = start + timedelta(minutes=15 * rng.randint(1, 8))
+            windows.append((rng.choice(rooms), start, end))
+
+        self.stdout.write(f'Benchmarking {len(windows)} checks across {len(rooms)} rooms')
+
+        with CaptureQueriesContext(connection) as orm_queries:
+            started = time.perf_counter()
+            orm_results = [
+                Room.objects.filter(id=room_id).available_between(start, end).exists()
+                for room_id, start, end in windows
+            ]
+            orm_elapsed = time.perf_counter() - started
+
+        engine = AvailabilityEngine()
+        with CaptureQueriesContext(connection) as build_queries:
+            started = time.perf_counter()
+            engine.get_indexes(rooms)
+            build_elapsed = time.perf_counter() - started
+
+        with CaptureQueriesContext(connection) as index_queries:
+            started = time.perf_counter()
+            index_results = [
+                engine.is_available(room_id, start, end)
+                for room_id, start, end in windows
+            ]
+            index_elapsed = time.perf_counter() - started
+
+        mismatches = sum(1 for a, b in zip(orm_results, index_results) if a != b)
+
+        self.stdout.write(f'ORM:   {orm_elapsed * 1000:.1f} ms, {len(orm_queries)} queries')
+        self.stdout.write(f'Index: {index_elapsed * 1000:.1f} ms, {len(index_queries)} queries '
+                          f'(+ {build_elapsed * 1000:.1f} ms build, {len(build_queries)} queries)')
+        if index_elapsed:
+            self.stdout.write(f'Speedup: {orm_elapsed / index_elapsed:.1f}x')
+
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f'{mismatches} results differ between ORM and index'))
+        else:
+            self.stdout.write(self.style.SUCCESS('ORM and index results agree'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from bookings import catalog
+
+
+class Command(BaseCommand):
+    help = 'Show room catalog cache hits and misses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing them')
+        parser.add_argument('--bump', action='store_true',
+                            help='Invalidate the cached catalog and room cards, e.g. after a bulk update')
+
+    def handle(self, *args, **options):
+        stats = catalog.stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Room catalog v{stats['version']}: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['hit_ratio']:.1%} hit ratio"
+        ))
+        if options['reset']:
+            catalog.reset_stats()
+            self.stdout.write('Counters reset')
+        if options['bump']:
+            catalog.bump_version()
+            self.stdout.write(f'Catalog version bumped to {catalog.catalog_version()}')
@@ -0,0 +1,165 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from bookings.models import Room, Reservation, Notification, Reminder
+from datetime import timedelta
+import random
+import re
+
+
+class SeededRollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot-path queries on a seeded dataset and fail if any falls back to a full table scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=200)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--reservations', type=int, default=50000)
+        parser.add_argument('--no-seed', action='store_true', help='Explain against the existing data only')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not just failures')
+
+    def handle(self, *args, **options):
+        failures = []
+        try:
+            with transaction.atomic():
+                if not options['no_seed']:
+                    self.seed(options)
+                failures = self.check_plans(options['verbose_plans'])
+                # Seeded rows are never committed
+                raise SeededRollback()
+        except SeededRollback:
+            pass
+
+        if failures:
+            raise CommandError(f"{len(failures)} hot-path queries use a full table scan: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('All hot-path queries use an index'))
+
+    def seed(self, options):
+        self.stdout.write(f"Seeding {options['rooms']} rooms, {options['users']} users, "
+                          f"{options['reservations']} reservations...")
+        rng = random.Random(0)
+        now = timezone.now()
+
+        rooms = Room.objects.bulk_create([
+            Room(name=f'Plan check room {i}', capacity=rng.randint(2, 50), location=f'Level {i % 5}')
+            for i in range(options['rooms'])
+        ])
+        users = User.objects.bulk_create([
+            User(username=f'plan_check_user_{i}') for i in range(options['users'])
+        ])
+
+        # Mostly history, as in a long-running deployment
+        statuses = ['completed'] * 6 + ['cancelled'] * 2 + ['confirmed'] * 2
+        reservations = []
+        for i in range(options['reservations']):
+            start = now + timedelta(minutes=30 * rng.randint(-200000, 20000))
+            reservations.append(Reservation(
+                room=rng.choice(rooms),
+                user=rng.choice(users),
+                title=f'Seeded {i}',
+                start_time=start,
+                end_time=start + timedelta(minutes=30 * rng.randint(1, 4)),
+                status=rng.choice(statuses),
+            ))
+        reservations = Reservation.objects.bulk_create(reservations, batch_size=2000)
+
+        sample = reservations[:options['reservations'] // 5]
+        Reminder.objects.bulk_create([
+            Reminder(
+                reservation=reservation,
+                reminder_time=reservation.start_time - timedelta(hours=1),
+                reminder_type='1h',
+                message='Seeded',
+                is_sent=reservation.start_time < now,
+            )
+            for reservation in sample
+        ], batch_size=2000)
+        Notification.objects.bulk_create([
+            Notification(
+                user=reservation.user,
+                reservation=reservation,
+                notification_type='reservation_confirmed',
+                message='Seeded',
+                is_read=rng.random() < 0.9,
+            )
+            for reservation in sample
+        ], batch_size=2000)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def hot_queries(self):
+        now = timezone.now()
+        later = now + timedelta(hours=1)
+        room = Room.objects.order_by('pk').first()
+        user = User.objects.order_by('pk').first()
+        return [
+            ('Room.is_available', Reservation.objects.filter(
+                room=room, start_time__lt=later, end_time__gt=now, status='confirmed'
+            ).order_by().values('pk')[:1]),
+            ('Reservation.clean user conflict', Reservation.objects.filter(
+                user=user, start_time__lt=later, end_time__gt=now, status='confirmed'
+            ).exclude(id=0).order_by().values('pk')[:1]),
+            ('home upcoming', Reservation.objects.filter(
+                user=user, start_time__gte=now, status='confirmed'
+            ).order_by('start_time')[:5]),
+            ('room_detail upcoming', Reservation.objects.filter(
+                room=room, start_time__gte=now, status='confirmed'
+            ).order_by('start_time')[:10]),
+            ('admin_dashboard active count', Reservation.objects.filter(status='confirmed').order_by().values('pk')),
+            ('admin_dashboard upcoming', Reservation.objects.filter(
+                start_time__gte=now, status='confirmed'
+            ).order_by('start_time')[:10]),
+            ('admin_dashboard recent', Reservation.objects.order_by('-created_at')[:10]),
+            ('process_reminders due', Reminder.objects.filter(reminder_time__lte=now, is_sent=False)),
+            ('policy reminders window', Reservation.objects.filter(
+                status='confirmed', start_time__gt=now, start_time__lte=later + timedelta(days=1)
+            ).order_by('pk')[:200]),
+            ('policy reminder markers', Reminder.objects.filter(
+                reservation_id__in=[1, 2, 3], offset_minutes__isnull=False
+            ).order_by().values_list('reservation_id', 'offset_minutes')),
+            ('unread notification count', Notification.objects.filter(user=user, is_read=False).order_by().values('pk')),
+            ('notifications page', Notification.objects.filter(user=user).order_by('-created_at', '-pk')[:21]),
+            ('notifications mark read', Notification.objects.filter(
+                user=user, is_read=False, id__in=[1, 2, 3]
+            ).order_by().values('pk')),
+        ]
+
+    def check_plans(self, verbose):
+        failures = []
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Make the planner pick an index whenever one is usable, so a
+                # seq scan in the plan means no applicable index exists.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        for name, queryset in self.hot_queries():
+            plan = queryset.explain()
+            scans = self.full_scans(plan)
+            if scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'✗ {name}: {"; ".join(scans)}'))
+            else:
+                self.stdout.write(f'✓ {name}')
+            if verbose or scans:
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+        return failures
+
+    def full_scans(self, plan):
+        tables = ('bookings_reservation', 'bookings_reminder', 'bookings_notification')
+        scans = []
+        for line in plan.splitlines():
+            if connection.vendor == 'postgresql':
+                if 'Seq Scan on' in line and any(table in line for table in tables):
+                    scans.append(line.strip())
+            elif connection.vendor == 'sqlite':
+                # "SCAN table" without "USING ... INDEX" is a full table scan
+                match = re.search(r'\bSCAN (\w+)', line)
+                if match and 'USING' not in line and match.group(1) in tables:
+                    scans.append(line.strip())
+        return scans
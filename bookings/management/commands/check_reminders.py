@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from bookings.models import Reminder
+from datetime import timedelta
+
+
+class Command(BaseCommand):
+    help = 'Find and repair reminders that no longer match their reservation, in primary-key batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without repairing it')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        totals = {'voided': 0, 'expired': 0, 'rearmed': 0}
+        checked = 0
+        last_pk = 0
+        rows = Reminder.objects.order_by('pk').values_list(
+            'pk', 'is_sent', 'reminder_time', 'offset_minutes',
+            'reservation__status', 'reservation__start_time', 'reservation__end_time',
+        )
+        while True:
+            batch = list(rows.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            checked += len(batch)
+
+            voided, expired, rearmed = [], [], []
+            for pk, is_sent, reminder_time, offset, status, start_time, end_time in batch:
+                if not is_sent:
+                    if status != 'confirmed':
+                        # Cancelled or completed meeting that still has something queued
+                        voided.append(pk)
+                    elif end_time <= now:
+                        expired.append(pk)
+                elif offset is not None and status == 'confirmed':
+                    # The marker was written for another start time, e.g. after a
+                    # bulk UPDATE that bypassed save(); re-arm it if it is still ahead
+                    expected = start_time - timedelta(minutes=offset)
+                    if reminder_time != expected and expected > now:
+                        rearmed.append(pk)
+
+            if not options['dry_run'] and (voided or expired or rearmed):
+                with transaction.atomic():
+                    Reminder.objects.filter(pk__in=voided + expired + rearmed).delete()
+            totals['voided'] += len(voided)
+            totals['expired'] += len(expired)
+            totals['rearmed'] += len(rearmed)
+
+        verb = 'Would repair' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} reminders. {verb}: {totals['voided']} for cancelled reservations, "
+            f"{totals['expired']} for past meetings, {totals['rearmed']} moved policy reminders"
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from bookings.outbox import dispatch
+import time
+
+
+class Command(BaseCommand):
+    help = 'Process pending outbox events: confirmation emails and notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new events')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        total_done = total_failed = 0
+        while True:
+            done, failed = dispatch(batch_size=options['batch_size'])
+            total_done += done
+            total_failed += failed
+            if done or failed:
+                self.stdout.write(f'Dispatched {done} events, {failed} failed')
+            if done + failed >= options['batch_size']:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully dispatched {total_done} events ({total_failed} failed)')
+        )
@@ -0,0 +1,303 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.db import connection, transaction, IntegrityError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from bookings.models import Room, Reservation, OutboxEvent, lock_room, room_overlap_enforced
+from bookings.outbox import dispatch
+from bookings.availability import engine as availability_engine
+from bookings import stats
+from bisect import bisect_left
+from itertools import islice
+import csv
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+REPORT_FIELDS = ['line', 'reason', 'room', 'user', 'title', 'start_time', 'end_time', 'status']
+IMPORT_FIELDS = ['room', 'user', 'title', 'description', 'start_time', 'end_time', 'status']
+
+
+def clean_row(row):
+    """
+    The row's fields as stripped strings; raises ValueError naming a field that can't be one.
+
+    CSV rows hold strings (or None for missing columns), but JSON rows can hold
+    numbers, booleans, null, lists or objects. Numbers are taken as written,
+    e.g. a room id, and null counts as empty.
+    """
+    if not isinstance(row, dict):
+        raise ValueError('row is not an object')
+    fields = {}
+    for field in IMPORT_FIELDS:
+        value = row.get(field)
+        if value is None:
+            value = ''
+        elif isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise ValueError(f'invalid {field}')
+        fields[field] = str(value).strip()
+    return fields
+
+
+
+class Command(BaseCommand):
+    help = 'Import reservations from a CSV or JSON file in chunks with batched conflict checking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV with a header row, JSON Lines (.jsonl) or a JSON array (.json)')
+        parser.add_argument('--format', choices=['csv', 'jsonl', 'json'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--no-email', action='store_true', help='Do not send confirmation emails')
+        parser.add_argument('--report', help='Write rejected rows and the reason to this CSV file')
+        parser.add_argument('--dry-run', action='store_true', help='Check everything but write nothing')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if fmt not in ('csv', 'jsonl', 'json'):
+            raise CommandError('Cannot tell the file format, pass --format')
+
+        self.rooms = {}
+        for room in Room.objects.all():
+            self.rooms[str(room.id)] = room
+            self.rooms[room.name.lower()] = room
+        self.options = options
+        self.rejected = []
+        # Dry runs write nothing, so later chunks check against these instead of the database
+        self.dry_run_bookings = {}
+        imported = 0
+        started = time.perf_counter()
+
+        with open(options['path'], newline='', encoding='utf-8') as handle:
+            rows = self.read_rows(handle, fmt)
+            while True:
+                chunk = list(islice(rows, options['chunk_size']))
+                if not chunk:
+                    break
+                imported += self.import_chunk(chunk)
+                self.stdout.write(f'{imported} imported, {len(self.rejected)} rejected...')
+
+        if options['report']:
+            with open(options['report'], 'w', newline='', encoding='utf-8') as report:
+                writer = csv.DictWriter(report, fieldnames=REPORT_FIELDS, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(self.rejected)
+            self.stdout.write(f"Conflicts report written to {options['report']}")
+
+        elapsed = time.perf_counter() - started
+        verb = 'Would import' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {imported} reservations, rejected {len(self.rejected)} in {elapsed:.1f}s'
+        ))
+
+    def read_rows(self, handle, fmt):
+        """Yield (line number, row dict) without loading the whole file where the format allows"""
+        if fmt == 'csv':
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, row
+        elif fmt == 'jsonl':
+            for line_number, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    self.reject(line_number, {}, f'invalid JSON: {e.msg}')
+                    continue
+                yield line_number, row
+        else:
+            for index, row in enumerate(json.load(handle), start=1):
+                yield index, row
+
+    def reject(self, line, row, reason):
+        self.rejected.append({**{field: row.get(field, '') for field in REPORT_FIELDS}, 'line': line, 'reason': reason})
+
+    def parse_chunk(self, chunk):
+        values = []
+        for line, row in chunk:
+            try:
+                values.append((line, row, clean_row(row)))
+            except ValueError as e:
+                self.reject(line, row if isinstance(row, dict) else {}, str(e))
+        users = User.objects.in_bulk({fields['user'] for line, row, fields in values}, field_name='username')
+        parsed = []
+        for line, row, fields in values:
+            room = self.rooms.get(fields['room'].lower())
+            user = users.get(fields['user'])
+            start_time = parse_datetime(fields['start_time'])
+            end_time = parse_datetime(fields['end_time'])
+            status = (fields['status'] or 'confirmed').lower()
+
+            if room is None:
+                self.reject(line, row, 'unknown room')
+            elif user is None:
+                self.reject(line, row, 'unknown user')
+            elif start_time is None or end_time is None:
+                self.reject(line, row, 'invalid start or end time')
+            elif status not in dict(Reservation.STATUS_CHOICES):
+                self.reject(line, row, 'invalid status')
+            else:
+                if timezone.is_naive(start_time):
+                    start_time = timezone.make_aware(start_time)
+                if timezone.is_naive(end_time):
+                    end_time = timezone.make_aware(end_time)
+                if start_time >= end_time:
+                    self.reject(line, row, 'end time must be after start time')
+                    continue
+                parsed.append((line, row, Reservation(
+                    room=room,
+                    user=user,
+                    title=(fields['title'] or 'Imported reservation')[:200],
+                    description=fields['description'],
+                    start_time=start_time,
+                    end_time=end_time,
+                    status=status,
+                    created_by_admin=True,
+                )))
+        return parsed
+
+    def find_conflicts(self, parsed):
+        """
+        Split the chunk into accepted reservations and (line, row, reason) conflicts.
+
+        Existing confirmed bookings for the chunk's rooms and time span come
+        from one query. Per room, the chunk's rows are swept in start order
+        against those bookings and the rows already accepted from this chunk.
+        Rows accepted from earlier chunks are in the database, or in a dry run
+        in self.dry_run_bookings.
+        """
+        confirmed = [item for item in parsed if item[2].status == 'confirmed']
+        if not confirmed:
+            return [item[2] for item in parsed], []
+
+        span_start = min(item[2].start_time for item in confirmed)
+        span_end = max(item[2].end_time for item in confirmed)
+        existing = {}
+        rows = Reservation.objects.filter(
+            room_id__in={item[2].room_id for item in confirmed},
+            start_time__lt=span_end,
+            end_time__gt=span_start,
+            status='confirmed'
+        ).order_by('start_time').values_list('room_id', 'start_time', 'end_time')
+        for room_id, start, end in rows:
+            existing.setdefault(room_id, []).append((start, end))
+        if self.options['dry_run']:
+            for room_id in {item[2].room_id for item in confirmed}:
+                earlier = [
+                    (start, end) for start, end in self.dry_run_bookings.get(room_id, [])
+                    if start < span_end and end > span_start
+                ]
+                if earlier:
+                    existing[room_id] = sorted(existing.get(room_id, []) + earlier)
+
+        conflicts = []
+        by_room = {}
+        for item in confirmed:
+            by_room.setdefault(item[2].room_id, []).append(item)
+
+        rejected_lines = set()
+        for room_id, items in by_room.items():
+            booked = existing.get(room_id, [])
+            booked_starts = [start for start, end in booked]
+            running_end = None
+            next_booked = 0
+            for line, row, reservation in sorted(items, key=lambda item: item[2].start_time):
+                # Fold in every existing booking that starts before this row
+                while next_booked < len(booked) and booked[next_booked][0] < reservation.start_time:
+                    end = booked[next_booked][1]
+                    running_end = end if running_end is None or end > running_end else running_end
+                    next_booked += 1
+                if running_end is not None and running_end > reservation.start_time:
+                    conflicts.append((line, row, 'overlaps an existing or earlier imported booking'))
+                    rejected_lines.add(line)
+                    continue
+                # An existing booking starting inside this row's time also conflicts
+                later = bisect_left(booked_starts, reservation.start_time)
+                if later < len(booked) and booked[later][0] < reservation.end_time:
+                    conflicts.append((line, row, 'overlaps an existing booking'))
+                    rejected_lines.add(line)
+                    continue
+                running_end = reservation.end_time if running_end is None or reservation.end_time > running_end else running_end
+
+        accepted = [item[2] for item in parsed if item[0] not in rejected_lines]
+        if self.options['dry_run']:
+            for reservation in accepted:
+                if reservation.status == 'confirmed':
+                    self.dry_run_bookings.setdefault(reservation.room_id, []).append(
+                        (reservation.start_time, reservation.end_time)
+                    )
+        return accepted, conflicts
+
+    def fill_ids(self, reservations):
+        """
+        Set the ids of confirmed reservations written by a bulk_create that returned none.
+
+        Confirmed bookings of a room never overlap, so room and start time
+        identify each one.
+        """
+        rows = Reservation.objects.filter(
+            status='confirmed',
+            room_id__in={reservation.room_id for reservation in reservations},
+            start_time__in={reservation.start_time for reservation in reservations},
+        ).values_list('id', 'room_id', 'start_time')
+        ids = {(room_id, start_time): pk for pk, room_id, start_time in rows}
+        for reservation in reservations:
+            reservation.pk = ids.get((reservation.room_id, reservation.start_time))
+
+    def import_chunk(self, chunk):
+        parsed = self.parse_chunk(chunk)
+        if not parsed:
+            return 0
+
+        accepted = []
+        events = []
+        try:
+            with transaction.atomic():
+                if not room_overlap_enforced():
+                    for room_id in sorted({item[2].room_id for item in parsed}):
+                        lock_room(room_id)
+                accepted, conflicts = self.find_conflicts(parsed)
+                for line, row, reason in conflicts:
+                    self.reject(line, row, reason)
+                if self.options['dry_run'] or not accepted:
+                    return len(accepted)
+
+                created = Reservation.objects.bulk_create(accepted)
+                if not self.options['no_email']:
+                    # Emails go out from the outbox, so a failing mail server cannot stall the import
+                    now = timezone.now()
+                    confirmed = [
+                        reservation for reservation in created
+                        if reservation.status == 'confirmed' and reservation.start_time > now
+                    ]
+                    if confirmed and not connection.features.can_return_rows_from_bulk_insert:
+                        self.fill_ids(confirmed)
+                    events = OutboxEvent.objects.bulk_create([
+                        OutboxEvent(event_type='confirmation_email', reservation=reservation)
+                        for reservation in confirmed
+                        if reservation.pk is not None
+                    ])
+                    if len(events) < len(confirmed):
+                        logger.warning(
+                            f"Could not find {len(confirmed) - len(events)} imported reservations; "
+                            f"their confirmation emails were not queued"
+                        )
+        except IntegrityError as e:
+            # A concurrent booking beat us to one of the slots; the whole chunk is rolled back
+            logger.error(f"Import chunk rejected by the database: {e}")
+            accepted_ids = {id(reservation) for reservation in accepted}
+            for line, row, reservation in parsed:
+                if id(reservation) in accepted_ids:
+                    self.reject(line, row, 'chunk rolled back: conflicting booking created during import')
+            return 0
+
+        for room_id in {reservation.room_id for reservation in created}:
+            availability_engine.invalidate(room_id)
+        stats.record_created(created)
+
+        if events and getattr(settings, 'OUTBOX_DISPATCH_ON_COMMIT', True):
+            dispatch(batch_size=len(events), ids=[event.id for event in events])
+        return len(created)
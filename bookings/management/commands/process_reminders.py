@@ -1,7 +1,15 @@
 from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
-from bookings.models import Reminder
+from bookings import stats
+from bookings.reminders import (
+    DEFAULT_BATCH_SIZE, due_reminders, iter_batches, iter_claimed_batches, build_batch, send_batch,
+    iter_policy_batches, send_policy_batch
+)
+from contextlib import nullcontext
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -9,27 +17,72 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     help = 'Process pending reminders and send notifications'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Build the notifications and emails but write and send nothing')
+        parser.add_argument('--profile', action='store_true',
+                            help='Count the database queries of the run (keeps them all in memory)')
+
     def handle(self, *args, **options):
         now = timezone.now()
-        
-        # Find reminders that are due
-        pending_reminders = Reminder.objects.filter(
-            reminder_time__lte=now,
-            is_sent=False
-        )
-        
+        dry_run = options['dry_run']
+
         sent_count = 0
-        for reminder in pending_reminders:
-            try:
-                reminder.send_reminder()
-                sent_count += 1
-                self.stdout.write(f"Sent reminder: {reminder}")
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f"Error sending reminder {reminder.id}: {e}")
-                )
-                logger.error(f"Error sending reminder {reminder.id}: {e}")
-        
-        self.stdout.write(
-            self.style.SUCCESS(f"Successfully processed {sent_count} reminders")
-        )
+        batches = 0
+        started = time.perf_counter()
+        queries = CaptureQueriesContext(connection) if options['profile'] else nullcontext()
+        with queries:
+            # Real runs lease each batch so concurrent runs never pick the same rows;
+            # a batch that fails keeps its lease and is retried once it expires.
+            batches_of = iter_batches if dry_run else iter_claimed_batches
+            for batch in batches_of(due_reminders(now), options['batch_size']):
+                batches += 1
+                try:
+                    if dry_run:
+                        notifications, emails = build_batch(batch)
+                        sent_count += len(batch)
+                        self.stdout.write(f"Would send {len(notifications)} notifications and {len(emails)} emails")
+                    else:
+                        sent = send_batch(batch)
+                        sent_count += sent
+                        self.stdout.write(f"Sent {sent} reminders")
+                except Exception as e:
+                    self.stdout.write(
+                        self.style.ERROR(f"Error sending reminders {batch[0].id}-{batch[-1].id}: {e}")
+                    )
+                    logger.error(f"Error sending reminders {batch[0].id}-{batch[-1].id}: {e}")
+
+            # Reminders derived from the reminder policies of upcoming reservations
+            for due, superseded in iter_policy_batches(now, options['batch_size']):
+                batches += 1
+                try:
+                    if dry_run:
+                        notifications, emails = build_batch(due)
+                        sent_count += len(due)
+                        self.stdout.write(
+                            f"Would send {len(notifications)} policy notifications and {len(emails)} emails, "
+                            f"skipping {len(superseded)} superseded reminders"
+                        )
+                    else:
+                        sent = send_policy_batch(due, superseded)
+                        sent_count += sent
+                        self.stdout.write(f"Sent {sent} policy reminders")
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"Error sending policy reminders: {e}"))
+                    logger.error(f"Error sending policy reminders: {e}")
+
+            if not dry_run:
+                # The dashboard reads the upcoming policy reminder count from the rollup row
+                try:
+                    stats.refresh_policy_reminders()
+                except Exception as e:
+                    logger.error(f"Error refreshing policy reminder count: {e}")
+        elapsed = time.perf_counter() - started
+
+        rate = sent_count / elapsed if elapsed else 0
+        verb = 'Would process' if dry_run else 'Successfully processed'
+        summary = f"{verb} {sent_count} reminders in {batches} batches: {elapsed:.2f}s, {rate:.0f} reminders/s"
+        if options['profile']:
+            summary += f", {len(queries)} queries"
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,132 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import F, Max, Min
+from django.utils import timezone
+from bookings.models import Notification, Reminder, UserProfile
+from datetime import timedelta
+import json
+import time
+
+
+class Command(BaseCommand):
+    help = 'Delete (or archive then delete) old notifications and sent reminders in primary-key range batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--read-days', type=int, default=90,
+                            help='Remove read notifications older than this many days')
+        parser.add_argument('--unread-days', type=int, default=None,
+                            help='Also remove unread notifications older than this many days (kept by default)')
+        parser.add_argument('--reminder-days', type=int, default=90,
+                            help='Remove sent reminders older than this many days, once their meeting is over')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Width of each primary-key range; one short transaction per range')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches to leave room for other writers')
+        parser.add_argument('--archive', metavar='PATH',
+                            help='Append the removed rows to this file as JSON lines before deleting them')
+        parser.add_argument('--dry-run', action='store_true', help='Count what would be removed')
+
+    def handle(self, *args, **options):
+        if options['unread_days'] is not None and options['unread_days'] < options['read_days']:
+            raise CommandError('--unread-days must not be shorter than --read-days')
+        self.options = options
+        self.archive = open(options['archive'], 'a') if options['archive'] and not options['dry_run'] else None
+        now = timezone.now()
+        try:
+            read_cutoff = now - timedelta(days=options['read_days'])
+            stale = Notification.objects.filter(is_read=True, created_at__lt=read_cutoff)
+            oldest_cutoff = read_cutoff
+            if options['unread_days'] is not None:
+                unread_cutoff = now - timedelta(days=options['unread_days'])
+                stale = stale | Notification.objects.filter(is_read=False, created_at__lt=unread_cutoff)
+            # created_at grows with the primary key, so nothing past the newest old
+            # row needs visiting; walking back from the end of the pk index finds it
+            # after reading only the recent rows
+            upper = (
+                Notification.objects.filter(created_at__lt=oldest_cutoff)
+                .order_by('-pk').values_list('pk', flat=True).first()
+            )
+            self.prune('notifications', Notification, stale, upper, self.delete_notifications)
+
+            reminder_cutoff = now - timedelta(days=options['reminder_days'])
+            # Sent policy reminders double as "already sent" markers; only drop them
+            # once the meeting is over so nothing is sent twice
+            sent = Reminder.objects.filter(
+                is_sent=True, reminder_time__lt=reminder_cutoff, reservation__end_time__lt=now
+            )
+            upper = Reminder.objects.aggregate(upper=Max('pk'))['upper']
+            self.prune('sent reminders', Reminder, sent, upper, self.delete_rows)
+        finally:
+            if self.archive:
+                self.archive.close()
+
+    def prune(self, label, model, stale, upper, delete):
+        removed = 0
+        batches = 0
+        started = time.perf_counter()
+        if upper is not None:
+            lower = model.objects.aggregate(lower=Min('pk'))['lower']
+            batch_size = self.options['batch_size']
+            for start in range(lower, upper + 1, batch_size):
+                window = stale.filter(pk__gte=start, pk__lt=start + batch_size)
+                batches += 1
+                if self.options['dry_run']:
+                    removed += window.count()
+                else:
+                    with transaction.atomic():
+                        removed += delete(model, window)
+                    if self.options['pause']:
+                        time.sleep(self.options['pause'])
+        elapsed = time.perf_counter() - started
+
+        rate = removed / elapsed if elapsed else 0
+        verb = 'Would remove' if self.options['dry_run'] else 'Removed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {removed} {label} in {batches} batches: {elapsed:.2f}s, {rate:.0f} rows/s'
+        ))
+
+    def write_archive(self, model, rows):
+        if not self.archive:
+            return
+        for row in rows:
+            self.archive.write(json.dumps({'model': model._meta.label_lower, 'fields': row}, cls=DjangoJSONEncoder))
+            self.archive.write('\n')
+        self.archive.flush()
+
+    def delete_rows(self, model, window):
+        rows = list(window.values() if self.archive else window.values('id'))
+        if not rows:
+            return 0
+        self.write_archive(model, rows)
+        model.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+        return len(rows)
+
+    def delete_notifications(self, model, window):
+        rows = list(window.values() if self.archive else window.values('id', 'user_id', 'is_read'))
+        if not rows:
+            return 0
+        # Notifications never go from read back to unread, but an unread one may be
+        # marked read (and taken off its counter) while we work, so only the
+        # unread rows that are still unread under our lock are deleted and counted
+        read_ids = {row['id'] for row in rows if row['is_read']}
+        unread = model.objects.filter(pk__in=[row['id'] for row in rows if not row['is_read']], is_read=False)
+        if connection.vendor == 'sqlite':
+            # As in reminders.send_batch: take the write lock up front
+            unread.update(is_read=F('is_read'))
+        else:
+            unread = unread.select_for_update()
+        still_unread = dict(unread.values_list('id', 'user_id'))
+        self.write_archive(model, [row for row in rows if row['id'] in read_ids or row['id'] in still_unread])
+
+        removed = 0
+        if read_ids:
+            removed += model.objects.filter(pk__in=read_ids, is_read=True).delete()[0]
+        if still_unread:
+            removed += model.objects.filter(pk__in=still_unread, is_read=False).delete()[0]
+            # Unread rows going away must come off the navbar counters too
+            counts = {}
+            for user_id in still_unread.values():
+                counts[user_id] = counts.get(user_id, 0) - 1
+            UserProfile.adjust_unread(counts)
+        return removed
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from bookings.models import Notification, UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Recount unread notifications and fix UserProfile.unread_notifications where it drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        checked = 0
+        fixed = 0
+        last_pk = 0
+        profiles = UserProfile.objects.order_by('pk').only('pk', 'user_id', 'unread_notifications')
+        while True:
+            batch = list(profiles.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            checked += len(batch)
+
+            # One grouped COUNT per batch, served by notif_user_unread_idx
+            actual = dict(
+                Notification.objects.filter(user_id__in=[profile.user_id for profile in batch], is_read=False)
+                .values('user_id').annotate(unread=Count('id')).order_by()
+                .values_list('user_id', 'unread')
+            )
+            drifted = []
+            for profile in batch:
+                count = actual.get(profile.user_id, 0)
+                if profile.unread_notifications != count:
+                    drifted.append((profile, count))
+            fixed += len(drifted)
+            if options['dry_run'] or not drifted:
+                continue
+
+            for profile, count in drifted:
+                with transaction.atomic():
+                    # Lock the profile, then recount: notify() and mark_read() update the same
+                    # row, so a change landing meanwhile is either counted here or applied after
+                    list(UserProfile.objects.select_for_update().filter(pk=profile.pk).values_list('pk'))
+                    count = Notification.objects.filter(user_id=profile.user_id, is_read=False).count()
+                    UserProfile.objects.filter(pk=profile.pk).update(unread_notifications=count)
+
+        verb = 'Would fix' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} profiles. {verb} {fixed} unread counters'))
@@ -0,0 +1,234 @@
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import Count, Max
+from django.utils import timezone
+from bookings.models import Reminder, ReminderPolicy, Reservation
+from bookings.reminders import (
+    DEFAULT_BATCH_SIZE, Policies, claim, digest_window, release_batch, send_batch, lease_duration,
+    iter_policy_batches, send_policy_batch, pending_policy_reminders, sent_markers, upcoming_reservations
+)
+from datetime import timedelta
+import heapq
+import json
+import logging
+import os
+import signal
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Re-read a little before the high-water mark: a transaction that commits
+# late can carry an updated_at older than rows we have already seen.
+HWM_OVERLAP = timedelta(seconds=5)
+
+
+class Command(BaseCommand):
+    help = 'Send reminders as they fall due from an in-memory timing heap'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizon', type=int, default=3600,
+                            help='Seconds ahead of now to keep reminders in memory')
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help='Longest sleep between checks for new or changed reminders')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--metrics-file', help='Write lag and queue size as JSON to this file after every tick')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.horizon = timedelta(seconds=options['horizon'])
+        self.stop = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *args: self.stop.set())
+            signal.signal(signal.SIGINT, lambda *args: self.stop.set())
+
+        self.sent_total = 0
+        self.last_lag = 0.0
+
+        self.load_window()
+        self.stdout.write(f'Loaded {len(self.scheduled)} reminders due in the next {options["horizon"]}s')
+
+        while not self.stop.is_set():
+            now = timezone.now()
+            if now >= self.loaded_until - self.horizon / 2 or self.policies_changed():
+                self.load_window()
+            else:
+                self.poll_changes()
+            self.send_due()
+            self.write_metrics()
+
+            wait = self.options['poll_interval']
+            if self.heap:
+                wait = min(wait, max((self.heap[0][0] - timezone.now()).total_seconds(), 0))
+            self.stop.wait(wait)
+            close_old_connections()
+
+        self.stdout.write(self.style.SUCCESS(f'Reminder daemon stopped after sending {self.sent_total} reminders'))
+
+    # Heap entries are (reminder_time, key) where key is ('reminder', id) for a
+    # stored reminder or ('policy', reservation_id, offset) for one derived from
+    # a reminder policy. `scheduled` maps key -> the reminder_time that is
+    # current; heap entries that no longer match are stale and skipped when popped.
+
+    def schedule(self, key, reminder_time):
+        if reminder_time is None or reminder_time > self.loaded_until:
+            self.scheduled.pop(key, None)
+            return
+        if self.scheduled.get(key) != reminder_time:
+            self.scheduled[key] = reminder_time
+            heapq.heappush(self.heap, (reminder_time, key))
+
+    def forget_reservation(self, reservation_id):
+        for key in self.policy_keys.pop(reservation_id, ()):
+            self.scheduled.pop(key, None)
+
+    def schedule_reservations(self, reservations):
+        """(Re)compute the policy reminders of the reservations"""
+        reservations = list(reservations)
+        markers = sent_markers([reservation.id for reservation in reservations])
+        for reservation in reservations:
+            self.forget_reservation(reservation.id)
+        for reminder in pending_policy_reminders(reservations, self.policies, markers):
+            key = ('policy', reminder.reservation_id, reminder.offset_minutes)
+            self.schedule(key, reminder.reminder_time)
+            if key in self.scheduled:
+                self.policy_keys.setdefault(reminder.reservation_id, set()).add(key)
+
+    def load_window(self):
+        """Range queries for everything due up to the horizon; resets the high-water marks"""
+        now = timezone.now()
+        self.heap = []
+        self.scheduled = {}
+        self.policy_keys = {}
+        self.high_water = {'reminder': now, 'reservation': now, 'policy': now}
+        self.loaded_until = now + self.horizon
+        self.policies = Policies.load()
+
+        rows = Reminder.objects.filter(
+            is_sent=False, reminder_time__lte=self.loaded_until
+        ).values_list('id', 'reminder_time')
+        for reminder_id, reminder_time in rows.iterator():
+            self.schedule(('reminder', reminder_id), reminder_time)
+
+        self.schedule_reservations(
+            upcoming_reservations(now, self.loaded_until + timedelta(minutes=self.policies.max_offset))
+        )
+
+    def policies_changed(self):
+        # A deleted policy leaves no updated_at behind, so compare the number of rows too
+        latest = ReminderPolicy.objects.aggregate(rows=Count('id'), updated_at=Max('updated_at'))
+        if latest['rows'] != self.policies.rows:
+            return True
+        return latest['updated_at'] is not None and latest['updated_at'] > self.high_water['policy']
+
+    def poll_changes(self):
+        """Pick up reminders and reservations created or changed since the high-water marks"""
+        rows = Reminder.objects.filter(
+            updated_at__gt=self.high_water['reminder'] - HWM_OVERLAP
+        ).order_by('updated_at').values_list('id', 'reminder_time', 'is_sent', 'updated_at')
+        for reminder_id, reminder_time, is_sent, updated_at in rows.iterator():
+            self.schedule(('reminder', reminder_id), None if is_sent else reminder_time)
+            self.high_water['reminder'] = max(self.high_water['reminder'], updated_at)
+
+        changed = list(
+            Reservation.objects.filter(updated_at__gt=self.high_water['reservation'] - HWM_OVERLAP)
+            .order_by('updated_at')
+        )
+        if not changed:
+            return
+        self.high_water['reservation'] = max(self.high_water['reservation'], changed[-1].updated_at)
+        now = timezone.now()
+        upcoming = []
+        for reservation in changed:
+            if reservation.status == 'confirmed' and reservation.start_time > now:
+                upcoming.append(reservation)
+            else:
+                # Cancelled or already started: nothing left to remind
+                self.forget_reservation(reservation.id)
+        self.schedule_reservations(upcoming)
+
+    def send_due(self):
+        now = timezone.now()
+        reminder_ids = []
+        reservation_ids = set()
+        while self.heap and self.heap[0][0] <= now:
+            reminder_time, key = heapq.heappop(self.heap)
+            if self.scheduled.get(key) != reminder_time:
+                continue
+            del self.scheduled[key]
+            if key[0] == 'reminder':
+                reminder_ids.append(key[1])
+            else:
+                reservation_ids.add(key[1])
+                self.policy_keys.get(key[1], set()).discard(key)
+            self.last_lag = (now - reminder_time).total_seconds()
+
+        batch_size = self.options['batch_size']
+        for i in range(0, len(reminder_ids), batch_size):
+            chunk = reminder_ids[i:i + batch_size]
+            # Deleted or already sent rows simply drop out of the claim
+            reminders = claim(Reminder.objects.filter(id__in=chunk, is_sent=False), batch_size)
+            claimed_ids = {reminder.id for reminder in reminders}
+            # Rows leased by another worker: look again once that lease could have expired
+            self.retry_later([('reminder', pk) for pk in chunk if pk not in claimed_ids], lease_duration())
+            try:
+                sent = send_batch(reminders)
+            except Exception as e:
+                logger.error(f"Error sending reminders: {e}")
+                release_batch(reminders)
+                # Put them back a poll interval from now so the daemon doesn't spin
+                self.retry_later([('reminder', pk) for pk in claimed_ids], self.poll_delay())
+                continue
+            self.count_sent(sent)
+
+        if reservation_ids:
+            # Recomputed from the database, so a meeting moved since we
+            # scheduled it is not reminded at the old time
+            if digest_window() is None:
+                batches = iter_policy_batches(now, batch_size, reservation_ids=reservation_ids, policies=self.policies)
+            else:
+                # Digests cover all of a user's reminders in the window, not just the ones that woke us
+                user_ids = set(Reservation.objects.filter(id__in=reservation_ids).values_list('user_id', flat=True))
+                batches = iter_policy_batches(now, batch_size, user_ids=user_ids, policies=self.policies)
+            for due, superseded in batches:
+                try:
+                    sent = send_policy_batch(due, superseded)
+                except Exception as e:
+                    logger.error(f"Error sending policy reminders: {e}")
+                    self.retry_later(
+                        [('policy', reminder.reservation_id, reminder.offset_minutes) for reminder in due],
+                        self.poll_delay()
+                    )
+                    continue
+                self.count_sent(sent)
+
+    def poll_delay(self):
+        return timedelta(seconds=self.options['poll_interval'])
+
+    def count_sent(self, sent):
+        self.sent_total += sent
+        if sent:
+            self.stdout.write(f'Sent {sent} reminders, lag {self.last_lag:.1f}s')
+
+    def retry_later(self, keys, delay):
+        retry_at = timezone.now() + delay
+        for key in keys:
+            self.scheduled[key] = retry_at
+            heapq.heappush(self.heap, (retry_at, key))
+
+    def write_metrics(self):
+        path = self.options['metrics_file']
+        if not path:
+            return
+        metrics = {
+            'lag_seconds': self.last_lag,
+            'scheduled': len(self.scheduled),
+            'sent_total': self.sent_total,
+            'high_water': max(self.high_water.values()).isoformat(),
+            'updated': time.time(),
+        }
+        # Write then rename so scrapers never see a half-written file
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as handle:
+            json.dump(metrics, handle)
+        os.replace(tmp_path, path)
@@ -0,0 +1,78 @@
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection as db_connection
+from bookings.mail import deliver
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+MAX_CONSECUTIVE_ERRORS = 5
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails in batches over persistent connections from concurrent sender threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2, help='Number of concurrent sender threads')
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new emails')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.sent = self.failed = 0
+
+        threads = [
+            threading.Thread(target=self.sender, name=f'mail-sender-{i}', daemon=True)
+            for i in range(max(options['threads'], 1))
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping, waiting for the current batches to finish...')
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully sent {self.sent} emails ({self.failed} failed)'))
+
+    def sender(self):
+        """One thread: one mail connection kept open while there is work, its own database connection"""
+        mail_connection = get_connection(fail_silently=False)
+        errors = 0
+        try:
+            while not self.stop.is_set():
+                try:
+                    sent, failed = deliver(self.options['batch_size'], connection=mail_connection)
+                    errors = 0
+                except Exception as e:
+                    # e.g. SQLite reporting the database as locked while another thread claims
+                    errors += 1
+                    logger.error(f"Mail worker batch failed: {e}")
+                    close_old_connections()
+                    if errors >= MAX_CONSECUTIVE_ERRORS and not self.options['loop']:
+                        break
+                    self.stop.wait(min(2 ** errors * 0.1, self.options['interval']))
+                    continue
+                if sent or failed:
+                    with self.lock:
+                        self.sent += sent
+                        self.failed += failed
+                    self.stdout.write(f'{threading.current_thread().name}: sent {sent}, {failed} failed')
+                    continue
+
+                # Nothing due: don't hold an idle SMTP session open while we wait
+                mail_connection.close()
+                if not self.options['loop']:
+                    break
+                self.stop.wait(self.options['interval'])
+        finally:
+            mail_connection.close()
+            db_connection.close()
@@ -14,6 +14,8 @@ class Command(BaseCommand):
         try:
             self.stdout.write('Running migrations...')
             call_command('migrate', verbosity=0)
+            # Only does anything with CACHE_BACKEND=db
+            call_command('createcachetable', verbosity=0)
             
             self.stdout.write('Creating admin user...')
             if not User.objects.filter(username='admin').exists():
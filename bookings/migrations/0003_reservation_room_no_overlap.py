@@ -0,0 +1,33 @@
+from django.db import migrations
+
+CONSTRAINT = 'reservation_room_no_overlap'
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    # Only PostgreSQL has range exclusion constraints; other backends fall
+    # back to the per-room lock taken in Reservation.save().
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(
+        f"ALTER TABLE bookings_reservation ADD CONSTRAINT {CONSTRAINT} "
+        "EXCLUDE USING gist (room_id WITH =, tstzrange(start_time, end_time, '[)') WITH &&) "
+        "WHERE (status = 'confirmed')"
+    )
+
+
+def remove_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'ALTER TABLE bookings_reservation DROP CONSTRAINT IF EXISTS {CONSTRAINT}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_alter_room_amenities_reminder'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_exclusion_constraint, remove_exclusion_constraint),
+    ]
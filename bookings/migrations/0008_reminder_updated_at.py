@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_queued_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminder',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['updated_at'], name='reminder_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+OFFSETS = {'24h': 1440, '1h': 60, '15m': 15}
+
+
+def convert_automatic_reminders(apps, schema_editor):
+    """Unsent automatic reminders are now derived from policies; sent ones become markers"""
+    Reminder = apps.get_model('bookings', 'Reminder')
+    Reminder.objects.filter(reminder_type__in=OFFSETS, is_sent=False).delete()
+    seen = set()
+    for reminder in Reminder.objects.filter(reminder_type__in=OFFSETS).order_by('id').iterator():
+        key = (reminder.reservation_id, OFFSETS[reminder.reminder_type])
+        if key in seen:
+            continue
+        seen.add(key)
+        reminder.offset_minutes = key[1]
+        reminder.save(update_fields=['offset_minutes'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0009_reminder_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offsets', models.CharField(blank=True, help_text='Comma-separated minutes before the start, e.g. "1440,60,15". Leave empty for no reminders.', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Reminder policies',
+            },
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='offset_minutes',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='reminder',
+            name='reminder_type',
+            field=models.CharField(choices=[('24h', '24 Hours Before'), ('1h', '1 Hour Before'), ('15m', '15 Minutes Before'), ('email', 'Email Reminder'), ('custom', 'Custom')], max_length=10),
+        ),
+        migrations.RunPython(convert_automatic_reminders, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reminder',
+            constraint=models.UniqueConstraint(condition=models.Q(('offset_minutes__isnull', False)), fields=('reservation', 'offset_minutes'), name='reminder_policy_marker_unique'),
+        ),
+        migrations.AddField(
+            model_name='reminderpolicy',
+            name='room',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reminder_policy', to='bookings.room'),
+        ),
+        migrations.AddField(
+            model_name='reminderpolicy',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reminder_policy', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='reminderpolicy',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('room__isnull', True), ('user__isnull', False)), models.Q(('room__isnull', False), ('user__isnull', True)), _connector='OR'), name='reminder_policy_user_xor_room'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:20
+
+from django.db import migrations, models
+
+
+def backfill_unread_counts(apps, schema_editor):
+    UserProfile = apps.get_model('bookings', 'UserProfile')
+    Notification = apps.get_model('bookings', 'Notification')
+    counts = (
+        Notification.objects.filter(is_read=False)
+        .values('user_id').annotate(unread=models.Count('id')).order_by()
+    )
+    for row in counts.iterator():
+        UserProfile.objects.filter(user_id=row['user_id']).update(unread_notifications=row['unread'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_reminder_policies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='unread_notifications',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+    ]
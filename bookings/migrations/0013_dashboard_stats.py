@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_notification_unread_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('active_rooms', models.IntegerField(default=0)),
+                ('total_reservations', models.IntegerField(default=0)),
+                ('confirmed_reservations', models.IntegerField(default=0)),
+                ('total_users', models.IntegerField(default=0)),
+                ('pending_reminders', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Dashboard stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRoomStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('reservations', models.IntegerField(default=0)),
+                ('booked_minutes', models.IntegerField(default=0)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='bookings.room')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily room stats',
+                'ordering': ['date', 'room'],
+                'indexes': [models.Index(fields=['date'], name='daily_room_stats_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyroomstats',
+            constraint=models.UniqueConstraint(fields=('room', 'date'), name='daily_room_stats_unique'),
+        ),
+    ]
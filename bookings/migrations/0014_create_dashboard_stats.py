@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:10
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def create_dashboard_stats(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    Room = apps.get_model('bookings', 'Room')
+    Reservation = apps.get_model('bookings', 'Reservation')
+    Reminder = apps.get_model('bookings', 'Reminder')
+    DashboardStats = apps.get_model('bookings', 'DashboardStats')
+    DashboardStats.objects.update_or_create(pk=1, defaults={
+        'active_rooms': Room.objects.filter(is_active=True).count(),
+        'total_reservations': Reservation.objects.count(),
+        'confirmed_reservations': Reservation.objects.filter(status='confirmed').count(),
+        'total_users': User.objects.count(),
+        'pending_reminders': Reminder.objects.filter(is_sent=False).count(),
+        'reconciled_at': timezone.now(),
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('bookings', '0013_dashboard_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_dashboard_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0014_create_dashboard_stats'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='reminder',
+            name='reminder_sent_time_idx',
+        ),
+    ]
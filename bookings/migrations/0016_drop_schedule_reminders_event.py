@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:25
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def finish_schedule_reminders_events(apps, schema_editor):
+    # Reminders are derived from reminder policies at send time, so queued
+    # schedule_reminders events have nothing left to do
+    OutboxEvent = apps.get_model('bookings', 'OutboxEvent')
+    OutboxEvent.objects.filter(event_type='schedule_reminders').exclude(status='done').update(
+        status='done', processed_at=timezone.now(), claimed_until=None
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0015_drop_reminder_sent_time_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(finish_schedule_reminders_events, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='outboxevent',
+            name='event_type',
+            field=models.CharField(choices=[('confirmation_email', 'Confirmation Email'), ('notification', 'Notification')], max_length=30),
+        ),
+    ]
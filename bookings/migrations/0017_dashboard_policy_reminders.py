@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0016_drop_schedule_reminders_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dashboardstats',
+            name='policy_reminders',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dashboardstats',
+            name='policy_reminders_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
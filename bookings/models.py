@@ -1,14 +1,84 @@
-from django.db import models
+from django.db import models, transaction, connection, IntegrityError
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import datetime, timedelta
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db.models.functions import Greatest
 import logging
+import weakref
 
 logger = logging.getLogger(__name__)
 
+ROOM_OVERLAP_CONSTRAINT = 'reservation_room_no_overlap'
+ROOM_UNAVAILABLE_MESSAGE = "Room is not available for the selected time period."
+
+# Minutes before the start of a meeting at which reminders go out, unless the
+# user or the room has a ReminderPolicy
+DEFAULT_REMINDER_OFFSETS = [24 * 60, 60, 15]
+
+
+def dispatch_after_commit(key, ids, dispatch):
+    """
+    Call dispatch(ids) once the transaction commits, once for all ids queued under `key` in it.
+
+    The batch lives on the connection and is cleared by its on_commit callback.
+    It only holds a weak reference to that callback: a rollback of the
+    transaction (or of the savepoint it was registered in) makes Django drop
+    the callback, the reference goes dead and the next call starts a fresh
+    batch, so rolled back ids are never dispatched later.
+    """
+    db = transaction.get_connection()
+    batches = db.__dict__.setdefault('dispatch_batches', {})
+    batch = batches.get(key)
+    if batch is not None and batch['run']() is not None:
+        batch['ids'].extend(ids)
+        return
+
+    batch = {'ids': list(ids)}
+
+    def run():
+        if batches.get(key) is batch:
+            del batches[key]
+        dispatch(batch['ids'])
+
+    batch['run'] = weakref.ref(run)
+    batches[key] = batch
+    transaction.on_commit(run)
+
+
+def room_overlap_enforced():
+    """True when the database rejects overlapping confirmed reservations itself (see migration 0003)"""
+    return connection.vendor == 'postgresql'
+
+
+def lock_room(room_id):
+    """Serialize bookings for a room on databases without the exclusion constraint"""
+    if connection.vendor == 'sqlite':
+        # SQLite has no row locks; a no-op write takes the database write lock
+        # up front so the overlap check and the insert cannot interleave.
+        Room.objects.filter(pk=room_id).update(updated_at=models.F('updated_at'))
+    else:
+        list(Room.objects.select_for_update().filter(pk=room_id).values_list('pk', flat=True))
+
+
+def is_room_overlap_violation(error):
+    return ROOM_OVERLAP_CONSTRAINT in str(error)
+
+
+class RoomQuerySet(models.QuerySet):
+    def available_between(self, start_time, end_time, exclude_reservation=None):
+        """Rooms with no confirmed reservation overlapping the window, as one NOT EXISTS query"""
+        overlapping = Reservation.objects.filter(
+            room=models.OuterRef('pk'),
+            start_time__lt=end_time,
+            end_time__gt=start_time,
+            status='confirmed'
+        )
+        if exclude_reservation:
+            overlapping = overlapping.exclude(id=exclude_reservation.id)
+        return self.filter(~models.Exists(overlapping))
+
 
 class Room(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -20,6 +90,8 @@ class Room(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = RoomQuerySet.as_manager()
+
     class Meta:
         ordering = ['name']
 
@@ -37,6 +109,10 @@ class Room(models.Model):
         return not reservations.exists()
 
 
+# Reservation fields remembered at load time; see Reservation.from_db
+LOADED_FIELDS = ('room_id', 'start_time', 'end_time', 'status')
+
+
 class Reservation(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -55,13 +131,32 @@ class Reservation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by_admin = models.BooleanField(default=False)
+    series = models.ForeignKey(
+        'ReservationSeries', on_delete=models.SET_NULL, null=True, blank=True, related_name='occurrences'
+    )
 
     class Meta:
         ordering = ['start_time']
+        indexes = [
+            # Room.is_available, room_detail upcoming list
+            models.Index(fields=['room', 'status', 'start_time', 'end_time'], name='res_room_status_time_idx'),
+            # user conflict check in clean(), home upcoming list
+            models.Index(fields=['user', 'status', 'start_time'], name='res_user_status_start_idx'),
+            # admin_dashboard active count and upcoming list
+            models.Index(fields=['status', 'start_time'], name='res_status_start_idx'),
+            models.Index(fields=['-created_at'], name='res_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.room.name} ({self.start_time.strftime('%Y-%m-%d %H:%M')})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded state so save() can tell a move or a cancellation
+        instance._loaded = {name: instance.__dict__.get(name) for name in LOADED_FIELDS}
+        return instance
+
     def clean(self):
         if self.start_time >= self.end_time:
             raise ValidationError("End time must be after start time.")
@@ -69,9 +164,9 @@ class Reservation(models.Model):
         if self.start_time < timezone.now():
             raise ValidationError("Cannot create reservation in the past.")
         
-        if hasattr(self, 'room') and self.room:
+        if hasattr(self, 'room') and self.room and not room_overlap_enforced():
             if not self.room.is_available(self.start_time, self.end_time, self):
-                raise ValidationError("Room is not available for the selected time period.")
+                raise ValidationError(ROOM_UNAVAILABLE_MESSAGE)
         
         if hasattr(self, 'user') and self.user:
             conflicting = Reservation.objects.filter(
@@ -84,60 +179,37 @@ class Reservation(models.Model):
                 raise ValidationError("You already have a reservation during this time period.")
 
     def save(self, *args, **kwargs):
-        self.clean()
         is_new = self.pk is None
-        super().save(*args, **kwargs)
-        
-        if is_new and self.status == 'confirmed':
-            self.create_reminders()
-            self.send_confirmation_email()
-
-    def create_reminders(self):
-        """Create automatic reminders for the reservation"""
         try:
-            # 24-hour reminder
-            reminder_24h = self.start_time - timedelta(hours=24)
-            if reminder_24h > timezone.now():
-                Reminder.objects.create(
-                    reservation=self,
-                    reminder_time=reminder_24h,
-                    reminder_type='24h',
-                    message=f"Reminder: Your reservation '{self.title}' is tomorrow at {self.start_time.strftime('%H:%M')}"
-                )
-            
-            # 1-hour reminder
-            reminder_1h = self.start_time - timedelta(hours=1)
-            if reminder_1h > timezone.now():
-                Reminder.objects.create(
-                    reservation=self,
-                    reminder_time=reminder_1h,
-                    reminder_type='1h',
-                    message=f"Reminder: Your reservation '{self.title}' starts in 1 hour at {self.start_time.strftime('%H:%M')}"
-                )
-            
-            # 15-minute reminder
-            reminder_15m = self.start_time - timedelta(minutes=15)
-            if reminder_15m > timezone.now():
-                Reminder.objects.create(
-                    reservation=self,
-                    reminder_time=reminder_15m,
-                    reminder_type='15m',
-                    message=f"Final reminder: Your reservation '{self.title}' starts in 15 minutes!"
-                )
+            with transaction.atomic():
+                if self.room_id and not room_overlap_enforced():
+                    lock_room(self.room_id)
+                self.clean()
+                super().save(*args, **kwargs)
                 
-        except Exception as e:
-            logger.error(f"Error creating reminders for reservation {self.id}: {e}")
-
-    def send_confirmation_email(self):
-        """Send email confirmation for the reservation"""
-        try:
-            # Check if user has email
-            if not self.user.email:
-                logger.warning(f"User {self.user.username} has no email address")
-                return
-                
-            subject = f"Reservation Confirmed: {self.title}"
-            message = f"""
+                if is_new and self.status == 'confirmed':
+                    # Side effects run from the outbox once this transaction commits.
+                    # Reminders need no rows: they are derived from the reminder policy.
+                    OutboxEvent.enqueue('confirmation_email', self)
+                elif not is_new:
+                    from .reminders import sync_reminders
+                    loaded = getattr(self, '_loaded', {})
+                    sync_reminders(self, loaded.get('start_time'), loaded.get('status'))
+                self._loaded = {name: getattr(self, name) for name in LOADED_FIELDS}
+        except IntegrityError as e:
+            if is_room_overlap_violation(e):
+                raise ValidationError(ROOM_UNAVAILABLE_MESSAGE) from e
+            raise
+
+    def queue_confirmation_email(self):
+        """Queue the confirmation email for the reservation; errors propagate to the caller"""
+        # Check if user has email
+        if not self.user.email:
+            logger.warning(f"User {self.user.username} has no email address")
+            return
+
+        subject = f"Reservation Confirmed: {self.title}"
+        message = f"""
 Hello {self.user.get_full_name() or self.user.username},
 
 Your room reservation has been confirmed:
@@ -154,18 +226,16 @@ Thank you for using our conference room booking system!
 
 Best regards,
 Conference Room Booking System
-            """
-            
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [self.user.email],
-                fail_silently=True,
-            )
-            
-            logger.info(f"Confirmation email sent for reservation {self.id} to {self.user.email}")
-            
+        """
+
+        QueuedEmail.enqueue(self.user.email, subject, message, reservation=self)
+
+        logger.info(f"Confirmation email queued for reservation {self.id} to {self.user.email}")
+
+    def send_confirmation_email(self):
+        """Send email confirmation for the reservation"""
+        try:
+            self.queue_confirmation_email()
         except Exception as e:
             logger.error(f"Error sending confirmation email for reservation {self.id}: {e}")
 
@@ -183,6 +253,75 @@ Conference Room Booking System
         return self.start_time <= now <= self.end_time
 
 
+class ReservationSeries(models.Model):
+    FREQUENCY_CHOICES = [
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+    ]
+
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='series')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reservation_series')
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    start_time = models.DateTimeField(help_text='Start of the first occurrence')
+    end_time = models.DateTimeField(help_text='End of the first occurrence')
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default='weekly')
+    interval = models.PositiveSmallIntegerField(default=1)
+    until = models.DateField(null=True, blank=True)
+    count = models.PositiveSmallIntegerField(null=True, blank=True)
+    created_by_admin = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['start_time']
+        verbose_name_plural = 'reservation series'
+
+    def __str__(self):
+        return f"{self.title} - {self.room.name} ({self.get_frequency_display()})"
+
+
+def _publish_notifications(notifications):
+    from . import events
+    for notification in notifications:
+        events.publish_on_commit(events.user_channel(notification.user_id), events.notification_event(notification))
+
+
+class NotificationManager(models.Manager):
+    """Creates and reads notifications while keeping UserProfile.unread_notifications in step"""
+
+    def notify(self, **fields):
+        """create() that also bumps the recipient's unread counter"""
+        with transaction.atomic():
+            notification = self.create(**fields)
+            UserProfile.adjust_unread({notification.user_id: 1})
+            _publish_notifications([notification])
+        return notification
+
+    def bulk_notify(self, notifications):
+        """bulk_create plus one counter UPDATE for all the users involved"""
+        counts = {}
+        for notification in notifications:
+            if not notification.is_read:
+                counts[notification.user_id] = counts.get(notification.user_id, 0) + 1
+        with transaction.atomic():
+            notifications = self.bulk_create(notifications)
+            UserProfile.adjust_unread(counts)
+            _publish_notifications(notifications)
+        return notifications
+
+    def mark_read(self, user, ids=None):
+        """Mark the user's unread notifications (or just `ids`) read; returns how many changed"""
+        unread = self.filter(user=user, is_read=False)
+        if ids is not None:
+            unread = unread.filter(id__in=ids)
+        with transaction.atomic():
+            # Only rows this UPDATE flips are subtracted, so concurrent calls never double count
+            updated = unread.update(is_read=True)
+            UserProfile.adjust_unread({user.id: -updated})
+        return updated
+
+
 class Notification(models.Model):
     NOTIFICATION_TYPES = [
         ('reservation_confirmed', 'Reservation Confirmed'),
@@ -198,8 +337,18 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Go through notify/bulk_notify/mark_read so the unread counter stays right
+    objects = NotificationManager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Only unread rows: stays small however much history a user has
+            models.Index(
+                fields=['user', '-created_at'], condition=models.Q(is_read=False), name='notif_user_unread_idx'
+            ),
+            models.Index(fields=['user', '-created_at'], name='notif_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.get_notification_type_display()}"
@@ -210,22 +359,79 @@ class UserProfile(models.Model):
     phone_number = models.CharField(max_length=20, blank=True)
     department = models.CharField(max_length=100, blank=True)
     is_admin = models.BooleanField(default=False)
+    # Denormalized COUNT of unread notifications; reconcile_unread_counts repairs drift
+    unread_notifications = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.user.username} Profile"
 
+    @classmethod
+    def adjust_unread(cls, deltas):
+        """Add {user_id: delta} to the unread counters in one UPDATE, never going below zero"""
+        deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        delta = models.Case(
+            *[models.When(user_id=user_id, then=models.Value(n)) for user_id, n in deltas.items()],
+            default=models.Value(0),
+            output_field=models.IntegerField(),
+        )
+        cls.objects.filter(user_id__in=deltas).update(
+            unread_notifications=Greatest(models.F('unread_notifications') + delta, models.Value(0))
+        )
+
     @property
     def full_name(self):
         return f"{self.user.first_name} {self.user.last_name}".strip() or self.user.username
 
 
+class ReminderPolicy(models.Model):
+    """When to remind, for one user or one room. A user's policy wins over the room's."""
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, null=True, blank=True, related_name='reminder_policy'
+    )
+    room = models.OneToOneField(
+        Room, on_delete=models.CASCADE, null=True, blank=True, related_name='reminder_policy'
+    )
+    offsets = models.CharField(
+        max_length=100, blank=True,
+        help_text='Comma-separated minutes before the start, e.g. "1440,60,15". Leave empty for no reminders.'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Reminder policies'
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(user__isnull=False, room__isnull=True) | models.Q(user__isnull=True, room__isnull=False),
+                name='reminder_policy_user_xor_room',
+            ),
+        ]
+
+    def __str__(self):
+        target = self.user.username if self.user_id else self.room.name
+        return f"{target}: {self.offsets or 'no reminders'}"
+
+    def clean(self):
+        try:
+            self.offset_list()
+        except ValueError:
+            raise ValidationError({'offsets': 'Enter whole minutes separated by commas.'})
+
+    def offset_list(self):
+        """Offsets in minutes, largest first"""
+        return sorted({int(part) for part in self.offsets.split(',') if part.strip()}, reverse=True)
+
+
 class Reminder(models.Model):
     REMINDER_TYPES = [
         ('24h', '24 Hours Before'),
         ('1h', '1 Hour Before'),
         ('15m', '15 Minutes Before'),
         ('email', 'Email Reminder'),
+        ('custom', 'Custom'),
     ]
     
     reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name='reminders')
@@ -234,29 +440,61 @@ class Reminder(models.Model):
     message = models.TextField()
     is_sent = models.BooleanField(default=False)
     sent_at = models.DateTimeField(null=True, blank=True)
+    # Set on the sent markers of policy reminders (see bookings/reminders.py)
+    offset_minutes = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Lease held by the worker sending this reminder (see bookings/leases.py)
+    claimed_by = models.CharField(max_length=32, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['reminder_time']
+        indexes = [
+            # reminder_daemon polls for rows changed since its high-water mark
+            models.Index(fields=['updated_at'], name='reminder_updated_idx'),
+            # process_reminders only ever looks at unsent rows
+            models.Index(
+                fields=['reminder_time'],
+                name='reminder_due_idx',
+                condition=models.Q(is_sent=False),
+            ),
+        ]
+        constraints = [
+            # One marker per policy reminder; concurrent senders race on this
+            models.UniqueConstraint(
+                fields=['reservation', 'offset_minutes'],
+                name='reminder_policy_marker_unique',
+                condition=models.Q(offset_minutes__isnull=False),
+            ),
+        ]
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember is_sent so the dashboard counters can tell a reminder going out
+        instance._loaded_sent = instance.__dict__.get('is_sent')
+        return instance
+
     def __str__(self):
         return f"{self.reservation.title} - {self.get_reminder_type_display()}"
     
-    def send_reminder(self):
-        """Send the reminder notification and email"""
-        try:
-            # Create notification
-            Notification.objects.create(
-                user=self.reservation.user,
-                reservation=self.reservation,
-                notification_type='reservation_reminder',
-                message=self.message
-            )
-            
-            # Send email reminder
-            subject = f"Meeting Reminder: {self.reservation.title}"
-            email_message = f"""
-Hello {self.reservation.user.get_full_name() or self.reservation.user.username},
+    def build_notification(self):
+        return Notification(
+            user=self.reservation.user,
+            reservation=self.reservation,
+            notification_type='reservation_reminder',
+            message=self.message
+        )
+
+    def build_email(self):
+        """Unsaved QueuedEmail for the reminder, or None when the user has no address"""
+        user = self.reservation.user
+        if not user.email:
+            return None
+        subject = f"Meeting Reminder: {self.reservation.title}"
+        email_message = f"""
+Hello {user.get_full_name() or user.username},
 
 {self.message}
 
@@ -271,20 +509,151 @@ Please arrive on time for your meeting.
 Best regards,
 Conference Room Booking System
             """
-            
-            send_mail(
-                subject,
-                email_message,
-                settings.DEFAULT_FROM_EMAIL,
-                [self.reservation.user.email],
-                fail_silently=True,
-            )
-            
-            self.is_sent = True
-            self.sent_at = timezone.now()
-            self.save()
-            
+        return QueuedEmail(to_email=user.email, subject=subject, body=email_message, reservation=self.reservation)
+
+    def send_reminder(self):
+        """Send the reminder notification and email"""
+        from .reminders import send_batch
+        try:
+            send_batch([self])
             logger.info(f"Reminder sent for reservation {self.reservation.id}")
-            
         except Exception as e:
-            logger.error(f"Error sending reminder {self.id}: {e}")
\ No newline at end of file
+            logger.error(f"Error sending reminder {self.id}: {e}")
+
+
+class OutboxEvent(models.Model):
+    EVENT_TYPES = [
+        ('confirmation_email', 'Confirmation Email'),
+        ('notification', 'Notification'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    event_type = models.CharField(max_length=30, choices=EVENT_TYPES)
+    reservation = models.ForeignKey(
+        Reservation, on_delete=models.CASCADE, null=True, blank=True, related_name='outbox_events'
+    )
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=32, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['available_at'],
+                name='outbox_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_event_type_display()} #{self.id} ({self.status})"
+
+    @classmethod
+    def enqueue(cls, event_type, reservation=None, **payload):
+        """Record a side effect in the caller's transaction and dispatch it after commit if configured"""
+        event = cls.objects.create(event_type=event_type, reservation=reservation, payload=payload)
+        if getattr(settings, 'OUTBOX_DISPATCH_ON_COMMIT', True):
+            from .outbox import dispatch
+            dispatch_after_commit('outbox', [event.id], lambda ids: dispatch(batch_size=len(ids), ids=ids))
+        return event
+
+
+class QueuedEmail(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    to_email = models.EmailField()
+    from_email = models.CharField(max_length=254, blank=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    reservation = models.ForeignKey(
+        Reservation, on_delete=models.SET_NULL, null=True, blank=True, related_name='queued_emails'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=32, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['available_at'],
+                name='email_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.to_email} ({self.status})"
+
+    @classmethod
+    def enqueue(cls, to_email, subject, body, reservation=None, from_email=''):
+        """Queue an email in the caller's transaction and deliver it after commit if configured"""
+        email = cls.objects.create(
+            to_email=to_email, subject=subject, body=body, reservation=reservation, from_email=from_email
+        )
+        if getattr(settings, 'EMAIL_QUEUE_SEND_ON_COMMIT', True):
+            from .mail import deliver
+            dispatch_after_commit('email', [email.id], lambda ids: deliver(batch_size=len(ids), ids=ids))
+        return email
+
+
+class DashboardStats(models.Model):
+    """Single-row rollup behind admin_dashboard, kept current by signals (see bookings/stats.py)"""
+    active_rooms = models.IntegerField(default=0)
+    total_reservations = models.IntegerField(default=0)
+    confirmed_reservations = models.IntegerField(default=0)
+    total_users = models.IntegerField(default=0)
+    # Stored reminders not yet sent
+    pending_reminders = models.IntegerField(default=0)
+    # Policy reminders falling due within the next 24 hours, as of policy_reminders_at
+    policy_reminders = models.IntegerField(default=0)
+    policy_reminders_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = 'Dashboard stats'
+
+    def __str__(self):
+        return f"Dashboard stats (reconciled {self.reconciled_at})"
+
+
+class DailyRoomStats(models.Model):
+    """Confirmed reservations starting on one day in one room"""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    reservations = models.IntegerField(default=0)
+    booked_minutes = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['date', 'room']
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'date'], name='daily_room_stats_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='daily_room_stats_date_idx'),
+        ]
+        verbose_name_plural = 'Daily room stats'
+
+    def __str__(self):
+        return f"{self.room.name} {self.date}: {self.reservations} reservations"
@@ -0,0 +1,102 @@
+"""
+Calendar windows and per-day occupancy.
+
+All reservations in a week or month window are loaded with one range query
+and bucketed into days in Python, so a calendar costs one query no matter how
+many days or rooms it shows.
+"""
+from datetime import datetime, timedelta
+
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .availability import DEFAULT_WORKING_HOURS
+from .models import Reservation, Room
+
+
+def calendar_window(anchor, view='week'):
+    """First day and the day after the last day of the week or month containing `anchor`"""
+    if view == 'month':
+        first = anchor.replace(day=1)
+        following = (first + timedelta(days=32)).replace(day=1)
+        return first, following
+    first = anchor - timedelta(days=anchor.weekday())
+    return first, first + timedelta(days=7)
+
+
+def _aware(day, at=None):
+    return timezone.make_aware(datetime.combine(day, at or datetime.min.time()))
+
+
+def window_queryset(room_ids, first_day, last_day):
+    """Reservations of any status touching the window, for the cache validator"""
+    return Reservation.objects.filter(
+        room_id__in=room_ids,
+        start_time__lt=_aware(last_day),
+        end_time__gt=_aware(first_day),
+    )
+
+
+def window_etag(room_ids, first_day, last_day):
+    """Cheap validator: changes whenever a reservation in the window or one of the rooms is edited"""
+    stats = window_queryset(room_ids, first_day, last_day).aggregate(
+        count=Count('id'), changed=Max('updated_at')
+    )
+    changed = stats['changed'].timestamp() if stats['changed'] else 0
+    # Room names go out with the calendar too
+    room_changed = Room.objects.filter(id__in=room_ids).aggregate(changed=Max('updated_at'))['changed']
+    room_changed = room_changed.timestamp() if room_changed else 0
+    rooms = '-'.join(str(room_id) for room_id in sorted(room_ids))
+    return f"{rooms}:{first_day.isoformat()}:{last_day.isoformat()}:{stats['count']}:{changed}:{room_changed}"
+
+
+def build_calendar(room_ids, first_day, last_day, working_hours=DEFAULT_WORKING_HOURS):
+    """
+    Bucket confirmed reservations into days.
+
+    Returns (days, reservations_by_room_day, occupancy) where occupancy maps
+    room id -> list of booked percentages of the working day, one per day.
+    """
+    days = [first_day + timedelta(days=i) for i in range((last_day - first_day).days)]
+    day_index = {day: i for i, day in enumerate(days)}
+    open_at, close_at = working_hours
+    working_seconds = (
+        datetime.combine(first_day, close_at) - datetime.combine(first_day, open_at)
+    ).total_seconds()
+
+    booked = {room_id: [0.0] * len(days) for room_id in room_ids}
+    by_day = {room_id: [[] for _ in days] for room_id in room_ids}
+    rows = Reservation.objects.filter(
+        room_id__in=room_ids,
+        start_time__lt=_aware(last_day),
+        end_time__gt=_aware(first_day),
+        status='confirmed'
+    ).order_by('start_time').values_list('id', 'room_id', 'title', 'start_time', 'end_time', 'user__username')
+
+    for pk, room_id, title, start, end, username in rows:
+        local_start = timezone.localtime(start)
+        local_end = timezone.localtime(end)
+        entry = {
+            'id': pk,
+            'title': title,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'user': username,
+        }
+        day = max(local_start.date(), first_day)
+        # A reservation ending at midnight does not touch the next day
+        final_day = (local_end - timedelta(microseconds=1)).date()
+        while day < last_day and day <= final_day:
+            i = day_index[day]
+            by_day[room_id][i].append(entry)
+            segment_start = max(local_start, _aware(day, open_at))
+            segment_end = min(local_end, _aware(day, close_at))
+            if segment_end > segment_start:
+                booked[room_id][i] += (segment_end - segment_start).total_seconds()
+            day += timedelta(days=1)
+
+    occupancy = {
+        room_id: [round(min(seconds / working_seconds, 1.0) * 100, 1) for seconds in per_day]
+        for room_id, per_day in booked.items()
+    }
+    return days, by_day, occupancy
@@ -0,0 +1,75 @@
+"""
+Transactional outbox dispatcher.
+
+Reservation writes record their side effects as OutboxEvent rows in the same
+transaction. This module claims pending events and runs them: sending the
+confirmation email and creating in-app notifications.
+Failed events are retried with exponential backoff.
+"""
+from datetime import timedelta
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .leases import claim_batch, retry_later
+from .models import OutboxEvent, Notification
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+
+
+def notify(user, reservation, notification_type, message):
+    """Queue an in-app notification in the caller's transaction"""
+    return OutboxEvent.enqueue(
+        'notification', reservation,
+        user_id=user.id, notification_type=notification_type, message=message
+    )
+
+
+def _confirmation_email(event):
+    # Errors must reach dispatch() so the event is retried
+    event.reservation.queue_confirmation_email()
+
+
+def _notification(event):
+    Notification.objects.notify(
+        user_id=event.payload['user_id'],
+        reservation=event.reservation,
+        notification_type=event.payload['notification_type'],
+        message=event.payload['message'],
+    )
+
+
+HANDLERS = {
+    'confirmation_email': _confirmation_email,
+    'notification': _notification,
+}
+
+
+def dispatch(batch_size=100, ids=None):
+    """Process one batch of due events; returns (done, failed)"""
+    now = timezone.now()
+    pending = OutboxEvent.objects.filter(status='pending', available_at__lte=now)
+    if ids is not None:
+        pending = pending.filter(id__in=ids)
+    lease = timedelta(seconds=getattr(settings, 'OUTBOX_LEASE_SECONDS', 300))
+    token, claimed = claim_batch(pending, batch_size, lease)
+
+    done = failed = 0
+    for event in claimed.select_related('reservation__user', 'reservation__room'):
+        try:
+            with transaction.atomic():
+                HANDLERS[event.event_type](event)
+                event.status = 'done'
+                event.processed_at = timezone.now()
+                event.claimed_until = None
+                event.save(update_fields=['status', 'processed_at', 'claimed_until'])
+            done += 1
+        except Exception as e:
+            retry_later(event, e, MAX_ATTEMPTS)
+            failed += 1
+            logger.error(f"Error dispatching outbox event {event.id} ({event.event_type}): {e}")
+    return done, failed
@@ -0,0 +1,152 @@
+"""
+Recurring reservation series.
+
+A series is expanded into its occurrences in local wall-clock time, every
+occurrence is checked against existing bookings with a single range query,
+and the accepted occurrences are written with bulk_create in one
+transaction. Reminders need no rows; they follow from the reminder policy.
+"""
+import calendar
+from datetime import timedelta
+import logging
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction, IntegrityError
+from django.db.models import Q
+from django.utils import timezone
+
+from . import stats
+from .availability import engine as availability_engine
+from .models import (
+    Reservation, ROOM_UNAVAILABLE_MESSAGE,
+    lock_room, room_overlap_enforced, is_room_overlap_violation
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_OCCURRENCES = 100
+
+
+def _add_months(value, months):
+    """Same day and time `months` later, or None when that month is too short"""
+    month = value.month - 1 + months
+    year = value.year + month // 12
+    month = month % 12 + 1
+    if value.day > calendar.monthrange(year, month)[1]:
+        return None
+    return value.replace(year=year, month=month)
+
+
+def expand(start_time, end_time, frequency, interval=1, until=None, count=None, limit=MAX_OCCURRENCES):
+    """Return the (start, end) pairs of a series, first occurrence included"""
+    if until is None and count is None:
+        raise ValueError("A series needs an end date or an occurrence count.")
+
+    tz = timezone.get_current_timezone()
+    first = timezone.localtime(start_time, tz).replace(tzinfo=None)
+    duration = end_time - start_time
+    occurrences = []
+    step = 0
+    while len(occurrences) < limit and (count is None or len(occurrences) < count):
+        if frequency == 'daily':
+            local_start = first + timedelta(days=step * interval)
+        elif frequency == 'weekly':
+            local_start = first + timedelta(weeks=step * interval)
+        elif frequency == 'monthly':
+            local_start = _add_months(first, step * interval)
+        else:
+            raise ValueError(f"Unknown frequency: {frequency}")
+        step += 1
+        if local_start is None:
+            # e.g. the 31st in a 30-day month
+            continue
+        if until is not None and local_start.date() > until:
+            break
+        start = timezone.make_aware(local_start, tz)
+        occurrences.append((start, start + duration))
+    return occurrences
+
+
+def find_conflicts(room, user, occurrences):
+    """
+    Map occurrence index -> conflicting confirmed reservations.
+
+    Loads every confirmed reservation of the room or the user that touches the
+    series span in one query, then sweeps both sorted lists once.
+    """
+    if not occurrences:
+        return {}
+    span_start = min(start for start, end in occurrences)
+    span_end = max(end for start, end in occurrences)
+    existing = list(
+        Reservation.objects.filter(
+            Q(room=room) | Q(user=user),
+            start_time__lt=span_end,
+            end_time__gt=span_start,
+            status='confirmed'
+        ).select_related('room').order_by('start_time')
+    )
+
+    conflicts = {}
+    order = sorted(range(len(occurrences)), key=lambda i: occurrences[i][0])
+    first_candidate = 0
+    for i in order:
+        start, end = occurrences[i]
+        # Reservations ending before this occurrence starts can't overlap any later one either
+        while first_candidate < len(existing) and existing[first_candidate].end_time <= start:
+            first_candidate += 1
+        j = first_candidate
+        while j < len(existing) and existing[j].start_time < end:
+            if existing[j].end_time > start:
+                conflicts.setdefault(i, []).append(existing[j])
+            j += 1
+    return conflicts
+
+
+def create_series(series, occurrences, skip_conflicts=False):
+    """
+    Save the series and its occurrences in one transaction.
+
+    Conflicts are re-checked under the room lock. Returns (created, conflicts);
+    nothing is created when occurrences conflict unless `skip_conflicts` is set,
+    in which case only the conflicting occurrences are left out. A series whose
+    every occurrence conflicts is never saved, skipped or not.
+    """
+    try:
+        with transaction.atomic():
+            if not room_overlap_enforced():
+                lock_room(series.room_id)
+            conflicts = find_conflicts(series.room, series.user, occurrences)
+            if conflicts and (not skip_conflicts or len(conflicts) == len(occurrences)):
+                return [], conflicts
+
+            series.save()
+            reservations = [
+                Reservation(
+                    room=series.room,
+                    user=series.user,
+                    series=series,
+                    title=series.title,
+                    description=series.description,
+                    start_time=start,
+                    end_time=end,
+                    status='confirmed',
+                    created_by_admin=series.created_by_admin,
+                )
+                for i, (start, end) in enumerate(occurrences)
+                if i not in conflicts
+            ]
+            created = Reservation.objects.bulk_create(reservations)
+            if not connection.features.can_return_rows_from_bulk_insert:
+                created = list(series.occurrences.order_by('start_time'))
+    except IntegrityError as e:
+        if is_room_overlap_violation(e):
+            raise ValidationError(ROOM_UNAVAILABLE_MESSAGE) from e
+        raise
+
+    # bulk_create skips the post_save signals that normally invalidate the index
+    # and update the dashboard stats
+    availability_engine.invalidate(series.room_id)
+    stats.record_created(created)
+    logger.info(f"Created series {series.id} with {len(created)} occurrences")
+    return created, conflicts
@@ -3,24 +3,39 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from .models import Reminder, Reservation
+from .reminders import upcoming_policy_reminders
 from django.core.paginator import Paginator
+from datetime import timedelta
+
+# Policy reminders have no rows until they are sent; the lists show the ones due this soon
+UPCOMING_HORIZON = timedelta(hours=24)
 
 
 @login_required
 def reminder_list(request):
     """View all reminders for the current user"""
     try:
-        reminders = Reminder.objects.filter(
+        # Sent and manual reminders are stored and paged in the database
+        stored = Reminder.objects.filter(
             reservation__user=request.user
-        ).order_by('-reminder_time')
+        ).select_related('reservation__room').order_by('-reminder_time', '-id')
         
-        paginator = Paginator(reminders, 10)
+        paginator = Paginator(stored, 10)
         page_number = request.GET.get('page')
         page_obj = paginator.get_page(page_number)
         
+        reminders = list(page_obj)
+        if page_obj.number == 1:
+            # Policy reminders due soon are worked out on the fly and lead the first page
+            upcoming = upcoming_policy_reminders(
+                Reservation.objects.filter(user=request.user), horizon=UPCOMING_HORIZON
+            )
+            upcoming.sort(key=lambda reminder: reminder.reminder_time, reverse=True)
+            reminders = upcoming + reminders
+        
         context = {
             'page_obj': page_obj,
-            'reminders': page_obj,
+            'reminders': reminders,
         }
         return render(request, 'bookings/reminder_list.html', context)
     except Exception as e:
@@ -42,26 +57,36 @@ def admin_reminder_manage(request):
             messages.error(request, 'You do not have permission to access this page.')
             return redirect('home')
         
-        reminders = Reminder.objects.all().order_by('-reminder_time')
+        stored = Reminder.objects.select_related('reservation__user', 'reservation__room')
         
         # Filter options
         reminder_type = request.GET.get('type')
         if reminder_type:
-            reminders = reminders.filter(reminder_type=reminder_type)
+            stored = stored.filter(reminder_type=reminder_type)
         
         is_sent = request.GET.get('sent')
         if is_sent == 'true':
-            reminders = reminders.filter(is_sent=True)
+            stored = stored.filter(is_sent=True)
         elif is_sent == 'false':
-            reminders = reminders.filter(is_sent=False)
+            stored = stored.filter(is_sent=False)
         
-        paginator = Paginator(reminders, 20)
+        paginator = Paginator(stored.order_by('-reminder_time', '-id'), 20)
         page_number = request.GET.get('page')
         page_obj = paginator.get_page(page_number)
         
+        reminders = list(page_obj)
+        if is_sent != 'true' and page_obj.number == 1:
+            # Pending policy reminders have no rows until they are sent; show those due soon first
+            upcoming = [
+                reminder for reminder in upcoming_policy_reminders(Reservation.objects.all(), horizon=UPCOMING_HORIZON)
+                if not reminder_type or reminder.reminder_type == reminder_type
+            ]
+            upcoming.sort(key=lambda reminder: reminder.reminder_time, reverse=True)
+            reminders = upcoming + reminders
+        
         context = {
             'page_obj': page_obj,
-            'reminders': page_obj,
+            'reminders': reminders,
             'reminder_types': Reminder.REMINDER_TYPES,
         }
         return render(request, 'bookings/admin_reminder_manage.html', context)
@@ -0,0 +1,492 @@
+"""
+Batched reminder sending.
+
+There are two kinds of reminder. Policy reminders (24h/1h/15m by default,
+or whatever the user's or room's ReminderPolicy says) are never stored ahead
+of time: at dispatch time a range query over upcoming confirmed reservations
+works out which are due, and only a sent marker (a Reminder row with
+offset_minutes set) is written once one goes out. A unique constraint on the
+markers decides the winner when two workers race. Stored reminders are
+explicit Reminder rows such as manual email reminders.
+
+With REMINDER_DIGEST_WINDOW set, the reminders a user has due together
+(and, for policy reminders, those falling due within the window) go out as
+a single digest email and notification.
+
+Stored due reminders are read in keyset-paginated chunks with their reservation,
+user and room joined in, so a chunk costs one SELECT. Each chunk then writes
+its notifications and queued emails with bulk_create and flips is_sent with a
+single UPDATE, all in one transaction. Queued emails are delivered over one
+mail connection per chunk (see bookings.mail).
+
+Workers claim chunks with a lease before sending, so overlapping cron runs,
+several containers and the reminder daemon can all run at once without
+double-sending. A worker that dies leaves its chunk to be reclaimed once the
+lease expires.
+"""
+from datetime import timedelta
+from uuid import uuid4
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from . import stats
+from .leases import claim_batch, release
+from .models import (
+    Reminder, ReminderPolicy, Reservation, Notification, QueuedEmail, DEFAULT_REMINDER_OFFSETS,
+    dispatch_after_commit,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 200
+MARKER_CHUNK_SIZE = 500
+# A policy reminder going out later than this gets its wording fixed up
+LATE_AFTER = timedelta(minutes=5)
+
+
+def due_reminders(now=None):
+    now = now or timezone.now()
+    return Reminder.objects.filter(reminder_time__lte=now, is_sent=False)
+
+
+def lease_duration():
+    return timedelta(seconds=getattr(settings, 'REMINDER_LEASE_SECONDS', 300))
+
+
+def iter_batches(queryset, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield lists of reminders with reservation, user and room loaded, walking the primary key"""
+    queryset = queryset.select_related('reservation__user', 'reservation__room').order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def claim(queryset, batch_size=DEFAULT_BATCH_SIZE):
+    """Lease up to `batch_size` reminders of the queryset; returns them with reservation, user and room loaded"""
+    token, claimed = claim_batch(queryset, batch_size, lease_duration())
+    return list(claimed.select_related('reservation__user', 'reservation__room'))
+
+
+def iter_claimed_batches(queryset, batch_size=DEFAULT_BATCH_SIZE):
+    """Claim and yield batches until nothing claimable is left"""
+    while True:
+        batch = claim(queryset, batch_size)
+        if not batch:
+            return
+        yield batch
+
+
+def release_batch(reminders):
+    """Give up the lease on reminders that could not be sent so another worker can retry them now"""
+    return release(Reminder.objects.filter(id__in=[reminder.id for reminder in reminders], is_sent=False))
+
+
+def digest_window():
+    """Minutes a due reminder may pull a user's other reminders forward into one digest, or None when off"""
+    return getattr(settings, 'REMINDER_DIGEST_WINDOW', None)
+
+
+def build_digest(reminders):
+    """One notification and one email covering all of a user's reminders"""
+    reminders = sorted(reminders, key=lambda reminder: reminder.reservation.start_time)
+    first = reminders[0].reservation
+    user = first.user
+    lines = [
+        f"- {reminder.reservation.start_time.strftime('%H:%M')}-{reminder.reservation.end_time.strftime('%H:%M')} "
+        f"{reminder.reservation.title} ({reminder.reservation.room.name})"
+        for reminder in reminders
+    ]
+    listing = '\n'.join(lines)
+    notification = Notification(
+        user=user,
+        reservation=first,
+        notification_type='reservation_reminder',
+        message=f"Reminder: You have {len(reminders)} upcoming meetings, the first is '{first.title}' "
+                f"at {first.start_time.strftime('%H:%M')}",
+    )
+    if not user.email:
+        return notification, None
+    body = f"""
+Hello {user.get_full_name() or user.username},
+
+You have {len(reminders)} upcoming meetings:
+
+{listing}
+
+Please arrive on time for your meetings.
+
+Best regards,
+Conference Room Booking System
+            """
+    email = QueuedEmail(
+        to_email=user.email,
+        subject=f"Meeting Reminders: {len(reminders)} upcoming meetings",
+        body=body,
+        reservation=first,
+    )
+    return notification, email
+
+
+def build_batch(reminders):
+    """Unsaved notifications and emails for the reminders, one digest per user in digest mode"""
+    if digest_window() is None:
+        groups = [[reminder] for reminder in reminders]
+    else:
+        by_user = {}
+        for reminder in reminders:
+            by_user.setdefault(reminder.reservation.user_id, []).append(reminder)
+        groups = list(by_user.values())
+
+    notifications = []
+    emails = []
+    for group in groups:
+        if len(group) == 1:
+            notification, email = group[0].build_notification(), group[0].build_email()
+        else:
+            notification, email = build_digest(group)
+        notifications.append(notification)
+        if email is not None:
+            emails.append(email)
+    return notifications, emails
+
+
+def send_batch(reminders):
+    """
+    Record the notifications and emails for the reminders and mark them sent.
+
+    Reminders another run has marked sent in the meantime are skipped, so the
+    UPDATE is the point that decides who sends. Returns the number sent.
+    """
+    if not reminders:
+        return 0
+    now = timezone.now()
+    with transaction.atomic():
+        ids = [reminder.id for reminder in reminders]
+        rows = Reminder.objects.filter(id__in=ids, is_sent=False)
+        if connection.vendor == 'sqlite':
+            # As in lock_room: a no-op write takes the write lock up front
+            # rather than failing to upgrade a read lock later on
+            rows.update(claimed_until=F('claimed_until'))
+        else:
+            rows = rows.select_for_update()
+        unsent = set(rows.values_list('id', flat=True))
+        reminders = [reminder for reminder in reminders if reminder.id in unsent]
+        if not reminders:
+            return 0
+        _record(reminders)
+        Reminder.objects.filter(id__in=unsent).update(
+            is_sent=True, sent_at=now, updated_at=now, claimed_by='', claimed_until=None
+        )
+        stats.reminders_changed(-len(unsent))
+        for reminder in reminders:
+            reminder.is_sent = True
+            reminder.sent_at = now
+    return len(reminders)
+
+
+def _record(reminders):
+    """Write the notifications and queued emails; the emails go out over one connection after commit"""
+    notifications, emails = build_batch(reminders)
+    Notification.objects.bulk_notify(notifications)
+    emails = QueuedEmail.objects.bulk_create(emails)
+
+    email_ids = [email.id for email in emails if email.id is not None]
+    if email_ids and getattr(settings, 'EMAIL_QUEUE_SEND_ON_COMMIT', True):
+        from .mail import deliver
+        dispatch_after_commit('email', email_ids, lambda ids: deliver(batch_size=len(ids), ids=ids))
+
+
+class Policies:
+    """Reminder offsets per user and per room, loaded in one query"""
+
+    def __init__(self, default, by_user, by_room, rows=0):
+        self.default = default
+        self.by_user = by_user
+        self.by_room = by_room
+        # ReminderPolicy rows loaded, so callers can tell when one was deleted
+        self.rows = rows
+        every = [default, *by_user.values(), *by_room.values()]
+        self.max_offset = max((max(offsets) for offsets in every if offsets), default=0)
+
+    @classmethod
+    def load(cls):
+        by_user = {}
+        by_room = {}
+        policies = list(ReminderPolicy.objects.all())
+        for policy in policies:
+            if policy.user_id:
+                by_user[policy.user_id] = policy.offset_list()
+            else:
+                by_room[policy.room_id] = policy.offset_list()
+        default = sorted(getattr(settings, 'REMINDER_OFFSETS', DEFAULT_REMINDER_OFFSETS), reverse=True)
+        return cls(default, by_user, by_room, rows=len(policies))
+
+    def offsets_for(self, reservation):
+        if reservation.user_id in self.by_user:
+            return self.by_user[reservation.user_id]
+        return self.by_room.get(reservation.room_id, self.default)
+
+
+def _describe(minutes):
+    if minutes % 1440 == 0:
+        days = minutes // 1440
+        return 'tomorrow' if days == 1 else f'in {days} days'
+    if minutes % 60 == 0:
+        hours = minutes // 60
+        return f"in {hours} hour{'s' if hours != 1 else ''}"
+    return f'in {minutes} minutes'
+
+
+def policy_message(reservation, offset):
+    at = reservation.start_time.strftime('%H:%M')
+    if offset == 1440:
+        return f"Reminder: Your reservation '{reservation.title}' is tomorrow at {at}"
+    if offset == 15:
+        return f"Final reminder: Your reservation '{reservation.title}' starts in 15 minutes!"
+    return f"Reminder: Your reservation '{reservation.title}' starts {_describe(offset)} at {at}"
+
+
+def policy_reminder(reservation, offset):
+    """Unsaved Reminder for one policy offset of a reservation"""
+    return Reminder(
+        reservation=reservation,
+        reminder_time=reservation.start_time - timedelta(minutes=offset),
+        reminder_type={1440: '24h', 60: '1h', 15: '15m'}.get(offset, 'custom'),
+        offset_minutes=offset,
+        message=policy_message(reservation, offset),
+    )
+
+
+def sent_markers(reservation_ids):
+    reservation_ids = list(reservation_ids)
+    markers = set()
+    # Chunked so a long list never runs into SQLite's limit on query parameters
+    for i in range(0, len(reservation_ids), MARKER_CHUNK_SIZE):
+        markers.update(
+            Reminder.objects.filter(
+                reservation_id__in=reservation_ids[i:i + MARKER_CHUNK_SIZE], offset_minutes__isnull=False
+            ).values_list('reservation_id', 'offset_minutes')
+        )
+    return markers
+
+
+def pending_policy_reminders(reservations, policies, markers):
+    """
+    Unsaved reminders not yet sent for the reservations, earliest first per reservation.
+
+    Offsets that had already passed when the reservation was made are left
+    out, as a 24h reminder makes no sense for a meeting booked an hour ahead.
+    """
+    pending = []
+    for reservation in reservations:
+        for offset in policies.offsets_for(reservation):
+            if (reservation.id, offset) in markers:
+                continue
+            reminder = policy_reminder(reservation, offset)
+            if reminder.reminder_time > reservation.created_at:
+                pending.append(reminder)
+    return pending
+
+
+def upcoming_reservations(now, until=None):
+    queryset = Reservation.objects.filter(status='confirmed', start_time__gt=now)
+    if until is not None:
+        queryset = queryset.filter(start_time__lte=until)
+    return queryset
+
+
+def upcoming_policy_reminders(reservations, now=None, horizon=None):
+    """
+    Policy reminders still to be sent for the given reservations queryset,
+    limited to those due within `horizon` (a timedelta) when one is given.
+    """
+    now = now or timezone.now()
+    policies = Policies.load()
+    reservations = reservations.filter(status='confirmed', start_time__gt=now)
+    if horizon is not None:
+        reservations = reservations.filter(start_time__lte=now + horizon + timedelta(minutes=policies.max_offset))
+    reservations = list(reservations.select_related('user', 'room'))
+    pending = pending_policy_reminders(
+        reservations, policies, sent_markers([reservation.id for reservation in reservations])
+    )
+    if horizon is not None:
+        pending = [reminder for reminder in pending if reminder.reminder_time <= now + horizon]
+    return pending
+
+
+def _policy_includes(policies, offset):
+    """Q for the reservations whose reminder policy has `offset`, resolved as in Policies.offsets_for"""
+    users = [user_id for user_id, offsets in policies.by_user.items() if offset in offsets]
+    rooms = [room_id for room_id, offsets in policies.by_room.items() if offset in offsets]
+    no_user_policy = ~Q(user_id__in=list(policies.by_user)) if policies.by_user else Q()
+    conditions = []
+    if users:
+        conditions.append(Q(user_id__in=users))
+    if rooms:
+        conditions.append(no_user_policy & Q(room_id__in=rooms))
+    if offset in policies.default:
+        conditions.append(no_user_policy & (~Q(room_id__in=list(policies.by_room)) if policies.by_room else Q()))
+    condition = conditions[0]
+    for other in conditions[1:]:
+        condition |= other
+    return condition
+
+
+def count_upcoming_policy_reminders(now=None, horizon=timedelta(hours=24), policies=None):
+    """
+    How many policy reminders are still to be sent and fall due within `horizon`.
+
+    The same answer as len(upcoming_policy_reminders(...)), worked out by the
+    database in one aggregate over the reservations starting within the horizon
+    plus the largest offset, with one filtered COUNT per distinct offset.
+    """
+    now = now or timezone.now()
+    policies = policies or Policies.load()
+    every = [policies.default, *policies.by_user.values(), *policies.by_room.values()]
+    counts = {}
+    for offset in sorted({offset for offsets in every for offset in offsets}):
+        before = timedelta(minutes=offset)
+        marker = Reminder.objects.filter(reservation_id=OuterRef('pk'), offset_minutes=offset)
+        counts[f'offset_{offset}'] = Count('pk', filter=(
+            Q(start_time__lte=now + horizon + before, created_at__lt=F('start_time') - before)
+            & _policy_includes(policies, offset) & ~Exists(marker)
+        ))
+    if not counts:
+        return 0
+    upcoming = upcoming_reservations(now, now + horizon + timedelta(minutes=policies.max_offset))
+    return sum(upcoming.aggregate(**counts).values())
+
+
+def split_due(pending, now, window=None):
+    """
+    (due, superseded) among pending reminders.
+
+    When several reminders of one reservation are due at once, for instance
+    after downtime, only the latest one is sent; the earlier ones are marked
+    without a notification. Reminders not yet due are never marked. With a
+    digest `window` in minutes, a user who has a reminder due also gets the
+    next reminder of each of their *other* reservations falling due within the
+    window, so they can all go out as one digest; later offsets of those
+    reservations still go out at their own time.
+    """
+    by_reservation = {}
+    for reminder in pending:
+        by_reservation.setdefault(reminder.reservation_id, []).append(reminder)
+    due_users = {
+        reminder.reservation.user_id for reminder in pending if reminder.reminder_time <= now
+    }
+    until = now + timedelta(minutes=window or 0)
+
+    due = []
+    superseded = []
+    for reminders in by_reservation.values():
+        reminders = sorted(reminders, key=lambda reminder: reminder.reminder_time)
+        passed = [reminder for reminder in reminders if reminder.reminder_time <= now]
+        if passed:
+            due.append(passed[-1])
+            superseded.extend(passed[:-1])
+        elif window and reminders[0].reminder_time <= until and reminders[0].reservation.user_id in due_users:
+            due.append(reminders[0])
+    for reminder in due:
+        if abs(now - reminder.reminder_time) > LATE_AFTER:
+            # Sent late after downtime or early in a digest: say how long is actually left
+            left = max(int((reminder.reservation.start_time - now).total_seconds() // 60), 1)
+            reminder.message = policy_message(reminder.reservation, left)
+    return due, superseded
+
+
+def iter_policy_batches(now=None, batch_size=DEFAULT_BATCH_SIZE, reservation_ids=None, user_ids=None,
+                        policies=None):
+    """
+    Yield (due, superseded) for upcoming reservations, a chunk of reservations at a time.
+
+    Only reservations starting within the largest policy offset (plus the
+    digest window) can have a reminder due, so that bounds the range query.
+    Chunks walk (user, id) so a user's reservations stay together for digests.
+    """
+    now = now or timezone.now()
+    policies = policies or Policies.load()
+    window = digest_window()
+    queryset = upcoming_reservations(now, now + timedelta(minutes=policies.max_offset + (window or 0)))
+    if reservation_ids is not None:
+        queryset = queryset.filter(id__in=reservation_ids)
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    queryset = queryset.select_related('user', 'room').order_by('user_id', 'pk')
+    last = None
+    while True:
+        chunk = queryset
+        if last is not None:
+            chunk = chunk.filter(Q(user_id__gt=last.user_id) | Q(user_id=last.user_id, pk__gt=last.pk))
+        reservations = list(chunk[:batch_size])
+        if not reservations:
+            return
+        last = reservations[-1]
+        markers = sent_markers([reservation.id for reservation in reservations])
+        due, superseded = split_due(pending_policy_reminders(reservations, policies, markers), now, window)
+        if due or superseded:
+            yield due, superseded
+
+
+def send_policy_batch(due, superseded=()):
+    """
+    Write sent markers for the reminders and send the ones this worker won.
+
+    Markers are inserted with ignore_conflicts and tagged with a token, so
+    when another worker got there first the unique constraint quietly drops
+    our row and the reminder is not sent twice. Returns the number sent.
+    """
+    if not due and not superseded:
+        return 0
+    now = timezone.now()
+    token = uuid4().hex
+    with transaction.atomic():
+        for reminder in due:
+            reminder.is_sent, reminder.sent_at, reminder.claimed_by = True, now, token
+        for reminder in superseded:
+            reminder.is_sent, reminder.sent_at, reminder.claimed_by = True, None, token
+        Reminder.objects.bulk_create([*due, *superseded], ignore_conflicts=True)
+        reservation_ids = {reminder.reservation_id for reminder in [*due, *superseded]}
+        mine = Reminder.objects.filter(reservation_id__in=reservation_ids, claimed_by=token)
+        won = set(mine.values_list('reservation_id', 'offset_minutes'))
+        mine.update(claimed_by='')
+        sent = [reminder for reminder in due if (reminder.reservation_id, reminder.offset_minutes) in won]
+        _record(sent)
+    return len(sent)
+
+
+def sync_reminders(reservation, previous_start=None, previous_status=None):
+    """
+    Bring the reservation's reminders in line after it was moved or cancelled.
+
+    Runs in the caller's transaction with at most two statements: unsent
+    stored reminders are deleted (cancelled) or shifted by the move, and the
+    sent markers of policy reminders that now lie in the future are dropped
+    so they go out again for the new time. Returns the number of rows touched.
+    """
+    now = timezone.now()
+    pending = Reminder.objects.filter(reservation=reservation, is_sent=False)
+    if reservation.status != 'confirmed':
+        if previous_status == reservation.status:
+            return 0
+        deleted, _ = pending.delete()
+        return deleted
+
+    if previous_start is None or previous_start == reservation.start_time:
+        return 0
+    touched = pending.update(
+        reminder_time=F('reminder_time') + (reservation.start_time - previous_start), updated_at=now
+    )
+    minutes_left = (reservation.start_time - now).total_seconds() / 60
+    deleted, _ = Reminder.objects.filter(
+        reservation=reservation, offset_minutes__isnull=False, offset_minutes__lt=minutes_left
+    ).delete()
+    return touched + deleted
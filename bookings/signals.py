@@ -0,0 +1,61 @@
+from django.db.models.signals import post_save, post_delete
+from django.contrib.auth.models import User
+from django.dispatch import receiver
+from .models import Reminder, Reservation, Room
+from .availability import engine
+from . import catalog, events, stats
+
+
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+def invalidate_availability_index(sender, instance, **kwargs):
+    engine.invalidate(instance.room_id)
+
+
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+def publish_availability_change(sender, instance, signal, **kwargs):
+    events.publish_on_commit(
+        events.room_channel(instance.room_id),
+        events.availability_event(instance, deleted=signal is post_delete)
+    )
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def invalidate_room_catalog(sender, instance, **kwargs):
+    catalog.bump_version()
+    stats.rooms_changed()
+
+
+@receiver(post_save, sender=Reservation)
+def count_saved_reservation(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        stats.reservation_saved(instance, created)
+
+
+@receiver(post_delete, sender=Reservation)
+def count_deleted_reservation(sender, instance, **kwargs):
+    stats.reservation_deleted(instance)
+
+
+@receiver(post_save, sender=User)
+def count_new_user(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.user_count_changed(1)
+
+
+@receiver(post_delete, sender=User)
+def count_deleted_user(sender, instance, **kwargs):
+    stats.user_count_changed(-1)
+
+
+@receiver(post_save, sender=Reminder)
+def count_saved_reminder(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        stats.reminder_saved(instance, created)
+
+
+@receiver(post_delete, sender=Reminder)
+def count_deleted_reminder(sender, instance, **kwargs):
+    stats.reminder_deleted(instance)
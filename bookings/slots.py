@@ -0,0 +1,138 @@
+"""
+Slot-bitmap availability model.
+
+Each room gets one bitmap per day at a fixed slot granularity (15 minutes by
+default), where a set bit means the slot is taken by a confirmed reservation.
+The grid is built from a single Reservation query, after which "which rooms
+are free for N consecutive slots, and where" is answered for every room and
+day at once: with NumPy boolean arrays when NumPy is installed, otherwise with
+Python ints used as bitsets.
+"""
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+
+class SlotGrid:
+    def __init__(self, rooms, date_from, date_to, slot_minutes=15, use_numpy=None):
+        if (24 * 60) % slot_minutes:
+            raise ValueError("Slot length must divide a day evenly.")
+        self.rooms = list(rooms)
+        self.room_ids = [room.id for room in self.rooms]
+        self.slot_minutes = slot_minutes
+        self.slot = timedelta(minutes=slot_minutes)
+        self.slots_per_day = (24 * 60) // slot_minutes
+        self.days = [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+        self.tz = timezone.get_current_timezone()
+        self.start = timezone.make_aware(datetime.combine(date_from, datetime.min.time()), self.tz)
+        self.end = self.start + timedelta(days=len(self.days))
+        self.use_numpy = np is not None if use_numpy is None else use_numpy and np is not None
+
+        if self.use_numpy:
+            self.occupied = np.zeros((len(self.rooms), len(self.days), self.slots_per_day), dtype=bool)
+        else:
+            self.occupied = [[0] * len(self.days) for _ in self.rooms]
+
+    @classmethod
+    def build(cls, rooms, date_from, date_to, slot_minutes=15, use_numpy=None):
+        """Create a grid and fill it from one query over confirmed reservations"""
+        from .models import Reservation
+
+        grid = cls(rooms, date_from, date_to, slot_minutes, use_numpy)
+        rows = Reservation.objects.filter(
+            room_id__in=grid.room_ids,
+            start_time__lt=grid.end,
+            end_time__gt=grid.start,
+            status='confirmed'
+        ).values_list('room_id', 'start_time', 'end_time')
+        row_of = {room_id: i for i, room_id in enumerate(grid.room_ids)}
+        for room_id, start_time, end_time in rows.iterator():
+            grid.mark(row_of[room_id], start_time, end_time)
+        return grid
+
+    def _slot_range(self, start_time, end_time):
+        """Absolute slot numbers touched by [start_time, end_time), clipped to the grid"""
+        first = max(0, int((start_time - self.start) // self.slot))
+        # Any partially covered slot counts as taken, so round the end up.
+        last = -int(-(end_time - self.start) // self.slot)
+        last = min(last, len(self.days) * self.slots_per_day)
+        return first, last
+
+    def mark(self, row, start_time, end_time):
+        first, last = self._slot_range(start_time, end_time)
+        for day in range(first // self.slots_per_day, -(-last // self.slots_per_day)):
+            lo = max(first - day * self.slots_per_day, 0)
+            hi = min(last - day * self.slots_per_day, self.slots_per_day)
+            if lo >= hi:
+                continue
+            if self.use_numpy:
+                self.occupied[row, day, lo:hi] = True
+            else:
+                self.occupied[row][day] |= ((1 << (hi - lo)) - 1) << lo
+
+    def _bounds(self, length, day_start, day_end):
+        """First and last allowed start slot within a day"""
+        lo, hi = 0, self.slots_per_day
+        if day_start is not None:
+            lo = -(-(day_start.hour * 60 + day_start.minute) // self.slot_minutes)
+        if day_end is not None:
+            hi = (day_end.hour * 60 + day_end.minute) // self.slot_minutes
+        return lo, hi - length
+
+    def feasible_starts(self, duration, day_start=None, day_end=None, not_before=None):
+        """Return every (room, start datetime) where the room is free for `duration`"""
+        length = -int(-duration // self.slot)
+        if length < 1 or length > self.slots_per_day:
+            return []
+        lo, hi = self._bounds(length, day_start, day_end)
+        if hi < lo:
+            return []
+
+        if self.use_numpy:
+            pairs = self._feasible_numpy(length, lo, hi)
+        else:
+            pairs = self._feasible_bitset(length, lo, hi)
+
+        results = []
+        for row, day, slot in pairs:
+            start = self.start + timedelta(days=day) + slot * self.slot
+            if not_before is not None and start < not_before:
+                continue
+            results.append((self.rooms[row], start))
+        results.sort(key=lambda pair: (pair[1], pair[0].name))
+        return results
+
+    def _feasible_numpy(self, length, lo, hi):
+        # Count occupied slots in every window of `length` with one cumulative sum
+        # over the slot axis; a zero count means the window is free.
+        counts = np.cumsum(self.occupied, axis=2, dtype=np.int32)
+        counts = np.concatenate(
+            [np.zeros(counts.shape[:2] + (1,), dtype=np.int32), counts], axis=2
+        )
+        windows = counts[:, :, length:] - counts[:, :, :-length]
+        free = windows[:, :, lo:hi + 1] == 0
+        rows, days, slots = np.nonzero(free)
+        return zip(rows.tolist(), days.tolist(), (slots + lo).tolist())
+
+    def _feasible_bitset(self, length, lo, hi):
+        full = (1 << self.slots_per_day) - 1
+        allowed = ((1 << (hi - lo + 1)) - 1) << lo
+        pairs = []
+        for row, days in enumerate(self.occupied):
+            for day, occupied in enumerate(days):
+                free = ~occupied & full
+                # After the loop bit k is set only if slots k..k+length-1 are all free.
+                run = free
+                for shift in range(1, length):
+                    run &= free >> shift
+                run &= allowed
+                while run:
+                    low = run & -run
+                    pairs.append((row, day, low.bit_length() - 1))
+                    run ^= low
+        return pairs
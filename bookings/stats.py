@@ -0,0 +1,293 @@
+"""
+Materialized statistics for the admin dashboard.
+
+DashboardStats is a single row of counters, created by migration 0014, and
+DailyRoomStats holds the confirmed reservations and booked minutes per room per
+day. Signals turn each Reservation, Room, User and Reminder write into deltas
+that are applied right after the transaction commits, as short UPDATEs of their
+own, so bookings never queue behind one another on the counter row. Bulk paths
+that skip signals (recurring series, imports, sending reminders) report their
+changes themselves through record_created() and reminders_changed().
+
+Policy reminders have no rows until they are sent, so no signal sees them:
+refresh_policy_reminders() counts those falling due within REMINDER_HORIZON with
+one aggregate query and stores the result in the row. process_reminders and
+reconcile_stats call it after each run.
+
+A delta lost between commit and apply, or a write that bypasses the ORM,
+leaves the counters slightly off until `manage.py reconcile_stats` recounts
+them; run it periodically (e.g. nightly). Reservations are counted on the day
+they start in the project's time zone.
+"""
+from datetime import datetime, time, timedelta
+import logging
+
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import LOADED_FIELDS, DailyRoomStats, DashboardStats, Reminder, Reservation, Room
+
+logger = logging.getLogger(__name__)
+
+STATS_ID = 1
+TREND_DAYS = 30
+REMINDER_HORIZON = timedelta(hours=24)
+
+
+def _state(room_id, start_time, end_time, status):
+    if None in (room_id, start_time, end_time) or status != 'confirmed':
+        return None
+    minutes = int((end_time - start_time).total_seconds() // 60)
+    return room_id, timezone.localdate(start_time), minutes
+
+
+def reservation_state(reservation, values=None):
+    """(room_id, day, minutes) a reservation contributes to DailyRoomStats, or None"""
+    if values is None:
+        values = {name: getattr(reservation, name) for name in LOADED_FIELDS}
+    return _state(values['room_id'], values['start_time'], values['end_time'], values['status'])
+
+
+def reservation_saved(reservation, created):
+    # Reservation.save() refreshes _loaded only after post_save, so here it still
+    # holds the row as it was before this save
+    loaded = getattr(reservation, '_loaded', None)
+    before = None if created or loaded is None else reservation_state(reservation, loaded)
+    deltas = Deltas()
+    deltas.reservation_changed(before, reservation_state(reservation), created=created)
+    deltas.apply_on_commit()
+
+
+def reservation_deleted(reservation):
+    deltas = Deltas()
+    deltas.reservation_changed(
+        reservation_state(reservation, getattr(reservation, '_loaded', None)), None, deleted=True
+    )
+    deltas.apply_on_commit()
+
+
+def user_count_changed(n):
+    deltas = Deltas()
+    deltas.add('total_users', n)
+    deltas.apply_on_commit()
+
+
+def reminder_saved(reminder, created):
+    # Reminders loaded from the database remember is_sent (see Reminder.from_db)
+    was_pending = False if created else not getattr(reminder, '_loaded_sent', reminder.is_sent)
+    reminder._loaded_sent = reminder.is_sent
+    reminders_changed(int(not reminder.is_sent) - int(was_pending))
+
+
+def reminder_deleted(reminder):
+    if not getattr(reminder, '_loaded_sent', reminder.is_sent):
+        reminders_changed(-1)
+
+
+def reminders_changed(n):
+    """Stored reminders that became pending (n > 0), or were sent or removed (n < 0)"""
+    if n:
+        deltas = Deltas()
+        deltas.add('pending_reminders', n)
+        deltas.apply_on_commit()
+
+
+def rooms_changed():
+    # Rooms change rarely and the table is small: recount rather than track is_active flips
+    def recount():
+        try:
+            DashboardStats.objects.filter(pk=STATS_ID).update(
+                active_rooms=Room.objects.filter(is_active=True).count()
+            )
+        except Exception as e:
+            logger.error(f"Error updating dashboard stats: {e}")
+    transaction.on_commit(recount)
+
+
+class Deltas:
+    """Counter changes collected from one or more writes"""
+
+    def __init__(self):
+        self.totals = {}
+        self.daily = {}
+
+    def add(self, field, n):
+        self.totals[field] = self.totals.get(field, 0) + n
+
+    def add_daily(self, state, sign):
+        if state is None:
+            return
+        room_id, day, minutes = state
+        count, booked = self.daily.get((room_id, day), (0, 0))
+        self.daily[(room_id, day)] = (count + sign, booked + sign * minutes)
+
+    def reservation_changed(self, before, after, created=False, deleted=False):
+        if created:
+            self.add('total_reservations', 1)
+        if deleted:
+            self.add('total_reservations', -1)
+        self.add('confirmed_reservations', (after is not None) - (before is not None))
+        if before != after:
+            self.add_daily(before, -1)
+            self.add_daily(after, 1)
+
+    def apply_on_commit(self):
+        if self.totals or self.daily:
+            transaction.on_commit(self.apply)
+
+    def apply(self):
+        try:
+            totals = {field: n for field, n in self.totals.items() if n}
+            if totals:
+                updated = DashboardStats.objects.filter(pk=STATS_ID).update(
+                    **{field: models.F(field) + n for field, n in totals.items()}
+                )
+                if not updated:
+                    logger.warning("Dashboard stats row is missing; run reconcile_stats to recreate it")
+            for (room_id, day), (count, minutes) in self.daily.items():
+                if count or minutes:
+                    _apply_daily(room_id, day, count, minutes)
+        except Exception as e:
+            # The write itself has committed; reconcile_stats will catch up
+            logger.error(f"Error updating dashboard stats: {e}")
+
+
+def _apply_daily(room_id, day, count, minutes):
+    rows = DailyRoomStats.objects.filter(room_id=room_id, date=day)
+    change = {'reservations': models.F('reservations') + count, 'booked_minutes': models.F('booked_minutes') + minutes}
+    if rows.update(**change):
+        if count < 0:
+            # The day's last booking in the room went away; don't keep an empty row
+            rows.filter(reservations=0, booked_minutes=0).delete()
+        return
+    if count <= 0:
+        # Nothing to take away from; reconcile_stats rebuilds the row if it went missing
+        return
+    try:
+        with transaction.atomic():
+            DailyRoomStats.objects.create(room_id=room_id, date=day, reservations=count, booked_minutes=minutes)
+    except IntegrityError:
+        # Another process created the row first, or the room has just been deleted
+        rows.update(**change)
+
+
+def record_created(reservations):
+    """Count reservations written with bulk_create, which sends no post_save"""
+    deltas = Deltas()
+    for reservation in reservations:
+        deltas.reservation_changed(None, reservation_state(reservation), created=True)
+    deltas.apply_on_commit()
+
+
+def load():
+    """The rollup row; all zeros until reconcile_stats recreates it, should it ever be deleted"""
+    stats = DashboardStats.objects.filter(pk=STATS_ID).first()
+    return stats if stats is not None else DashboardStats(pk=STATS_ID)
+
+
+def upcoming_policy_reminder_count(horizon=REMINDER_HORIZON):
+    """Policy reminders falling due within `horizon`, counted by the database"""
+    from .reminders import count_upcoming_policy_reminders
+
+    return count_upcoming_policy_reminders(horizon=horizon)
+
+
+def refresh_policy_reminders():
+    """Store the current upcoming policy reminder count in the rollup row"""
+    updated = DashboardStats.objects.filter(pk=STATS_ID).update(
+        policy_reminders=upcoming_policy_reminder_count(), policy_reminders_at=timezone.now()
+    )
+    if not updated:
+        logger.warning("Dashboard stats row is missing; run reconcile_stats to recreate it")
+
+
+def reconcile_totals():
+    from django.contrib.auth.models import User
+
+    counts = {
+        'active_rooms': Room.objects.filter(is_active=True).count(),
+        'total_reservations': Reservation.objects.count(),
+        'confirmed_reservations': Reservation.objects.filter(status='confirmed').count(),
+        'total_users': User.objects.count(),
+        'pending_reminders': Reminder.objects.filter(is_sent=False).count(),
+        'policy_reminders': upcoming_policy_reminder_count(),
+        'reconciled_at': timezone.now(),
+    }
+    counts['policy_reminders_at'] = counts['reconciled_at']
+    stats, created = DashboardStats.objects.update_or_create(pk=STATS_ID, defaults=counts)
+    return stats
+
+
+def daily_rows(date_from, date_to):
+    """Recount DailyRoomStats for [date_from, date_to) straight from the reservations"""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(date_from, time.min), tz)
+    end = timezone.make_aware(datetime.combine(date_to, time.min), tz)
+    duration = models.ExpressionWrapper(
+        models.F('end_time') - models.F('start_time'), output_field=models.DurationField()
+    )
+    rows = (
+        Reservation.objects.filter(status='confirmed', start_time__gte=start, start_time__lt=end)
+        .annotate(day=TruncDate('start_time', tzinfo=tz))
+        .values('room_id', 'day')
+        .annotate(reservations=models.Count('id'), booked=models.Sum(duration))
+        .order_by()
+    )
+    return [
+        DailyRoomStats(
+            room_id=row['room_id'], date=row['day'], reservations=row['reservations'],
+            booked_minutes=int(row['booked'].total_seconds() // 60),
+        )
+        for row in rows
+    ]
+
+
+def reconcile_daily(date_from, date_to):
+    """Replace the stored rows for the range with a recount; returns how many rows were written"""
+    rows = daily_rows(date_from, date_to)
+    with transaction.atomic():
+        DailyRoomStats.objects.filter(date__gte=date_from, date__lt=date_to).delete()
+        DailyRoomStats.objects.bulk_create(rows)
+    return len(rows)
+
+
+def trends(days=TREND_DAYS, today=None):
+    """
+    (daily, rooms) over the last `days` days, read from DailyRoomStats in one query.
+
+    daily is [(date, reservations, booked_minutes)], zero-filled; rooms holds the
+    per-room totals, busiest first.
+    """
+    today = today or timezone.localdate()
+    first = today - timedelta(days=days - 1)
+    by_day = {}
+    by_room = {}
+    rows = DailyRoomStats.objects.filter(date__gte=first, date__lte=today).values_list(
+        'date', 'room_id', 'room__name', 'reservations', 'booked_minutes'
+    )
+    for day, room_id, room_name, count, minutes in rows:
+        totals = by_day.setdefault(day, [0, 0])
+        totals[0] += count
+        totals[1] += minutes
+        room = by_room.setdefault(room_id, {'room_id': room_id, 'room__name': room_name, 'count': 0, 'minutes': 0})
+        room['count'] += count
+        room['minutes'] += minutes
+
+    daily = []
+    for offset in range(days):
+        day = first + timedelta(days=offset)
+        count, minutes = by_day.get(day, (0, 0))
+        daily.append((day, count, minutes))
+    rooms = sorted(by_room.values(), key=lambda row: (-row['minutes'], row['room__name']))
+    return daily, rooms
+
+
+def daily_trend(days=TREND_DAYS, today=None):
+    """[(date, reservations, booked_minutes)] for the last `days` days, zero-filled"""
+    return trends(days, today)[0]
+
+
+def room_trend(days=TREND_DAYS, today=None):
+    """Per-room reservations and booked minutes over the last `days` days, busiest first"""
+    return trends(days, today)[1]
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from . import events
+import asyncio
+import json
+import time
+
+KEEPALIVE_SECONDS = 15
+MAX_STREAM_ROOMS = 50
+
+
+def _current_user(request):
+    user = request.user
+    return user if user.is_authenticated else None
+
+
+def _unread_count(user):
+    try:
+        return user.profile.unread_notifications
+    except ObjectDoesNotExist:
+        return 0
+
+
+def format_event(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream(subscription, hello):
+    # Close after a while even if the client is gone: Django 4.2 does not tell a
+    # streaming response about disconnects, and EventSource reconnects by itself
+    deadline = time.monotonic() + settings.EVENTS_STREAM_MAX_SECONDS
+    async with subscription:
+        yield f"retry: 5000\nevent: hello\ndata: {json.dumps(hello)}\n\n"
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(subscription.get(), min(KEEPALIVE_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield format_event(event)
+
+
+async def event_stream(request):
+    """Server-Sent Events for the user's notifications and, with ?rooms=1,2, those rooms' bookings"""
+    if not settings.EVENTS_STREAM_ENABLED:
+        return JsonResponse({'error': 'Live events are disabled'}, status=404)
+    user = await sync_to_async(_current_user)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    try:
+        room_ids = [int(room_id) for room_id in request.GET.get('rooms', '').split(',') if room_id.strip()]
+    except ValueError:
+        return JsonResponse({'error': 'rooms must be a comma-separated list of ids'}, status=400)
+    if len(room_ids) > MAX_STREAM_ROOMS:
+        return JsonResponse({'error': f'At most {MAX_STREAM_ROOMS} rooms per stream'}, status=400)
+
+    channels = [events.user_channel(user.id)] + [events.room_channel(room_id) for room_id in room_ids]
+    # Subscribe before reading the count so nothing created in between is missed
+    subscription = events.subscribe(channels)
+    try:
+        hello = {'unread': await sync_to_async(_unread_count)(user), 'rooms': room_ids}
+    except Exception:
+        events.hub.unsubscribe(subscription)
+        raise
+
+    response = StreamingHttpResponse(stream(subscription, hello), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx and friends from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
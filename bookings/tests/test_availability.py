@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from bookings.availability import engine, suggest_alternative_rooms
+from bookings.checks import availability_index_cache
+from bookings.models import Room
+
+
+class AlternativeRoomTests(TestCase):
+    def test_rooms_without_capacity_are_ranked(self):
+        room = Room.objects.create(name='Phone Booth', capacity=0, location='First floor')
+        other = Room.objects.create(name='Hot Desk', capacity=0, location='First floor')
+        bigger = Room.objects.create(name='Board Room', capacity=8, location='Second floor')
+        start = timezone.now() + timedelta(days=1)
+
+        rooms = suggest_alternative_rooms(room, start, start + timedelta(hours=1))
+
+        self.assertEqual(rooms, [other, bigger])
+
+
+class AvailabilityIndexTests(TestCase):
+    def test_version_is_bumped_only_on_commit(self):
+        room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+        before = engine._versions([room.id])[room.id]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            engine.invalidate(room.id)
+            self.assertEqual(engine._versions([room.id])[room.id], before)
+
+        self.assertEqual(engine._versions([room.id])[room.id], before + 1)
+
+    def test_index_needs_a_shared_cache(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache'}}
+        with override_settings(AVAILABILITY_INDEX_ENABLED=True, CACHES=locmem):
+            self.assertEqual([error.id for error in availability_index_cache(None)], ['bookings.E001'])
+        with override_settings(AVAILABILITY_INDEX_ENABLED=True, CACHES=shared):
+            self.assertEqual(availability_index_cache(None), [])
+        with override_settings(AVAILABILITY_INDEX_ENABLED=False, CACHES=locmem):
+            self.assertEqual(availability_index_cache(None), [])
@@ -0,0 +1,174 @@
+from datetime import timedelta
+from io import StringIO
+import csv
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from bookings.management.commands.reminder_daemon import Command as ReminderDaemon
+from bookings.models import Notification, OutboxEvent, ReminderPolicy, Reservation, Room, UserProfile
+
+
+class PruneNotificationsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.profile = UserProfile.objects.create(user=self.user)
+        room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+        start = timezone.now() + timedelta(days=1)
+        self.reservation = Reservation.objects.create(
+            room=room, user=self.user, title='Standup', status='confirmed',
+            start_time=start, end_time=start + timedelta(hours=1),
+        )
+
+    def notify(self, days_old, is_read=False):
+        notification, = Notification.objects.bulk_notify([Notification(
+            user=self.user, reservation=self.reservation, notification_type='reservation_reminder',
+            message='Soon', is_read=is_read,
+        )])
+        Notification.objects.filter(pk=notification.pk).update(created_at=timezone.now() - timedelta(days=days_old))
+        return notification
+
+    def prune(self, *args):
+        call_command('prune_notifications', '--batch-size', '2', *args, stdout=StringIO())
+
+    def test_unread_counter_drops_by_the_unread_rows_removed(self):
+        self.notify(200, is_read=True)
+        self.notify(200)
+        self.notify(200)
+        recent = self.notify(1)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.unread_notifications, 3)
+
+        self.prune('--read-days', '90', '--unread-days', '180')
+
+        self.assertEqual(list(Notification.objects.values_list('id', flat=True)), [recent.id])
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.unread_notifications, 1)
+
+    def test_unread_rows_are_kept_by_default(self):
+        self.notify(200, is_read=True)
+        kept = self.notify(200)
+
+        self.prune()
+
+        self.assertEqual(list(Notification.objects.values_list('id', flat=True)), [kept.id])
+
+
+class ReminderDaemonTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.policy = ReminderPolicy.objects.create(user=self.user, offsets='30')
+        self.daemon = ReminderDaemon(stdout=StringIO())
+        self.daemon.options = {'batch_size': 100, 'poll_interval': 5.0, 'metrics_file': None}
+        self.daemon.horizon = timedelta(hours=1)
+        self.daemon.load_window()
+
+    def test_unchanged_policies(self):
+        self.assertFalse(self.daemon.policies_changed())
+
+    def test_deleted_policy_is_noticed(self):
+        self.policy.delete()
+        self.assertTrue(self.daemon.policies_changed())
+
+    def test_new_policy_is_noticed(self):
+        room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+        ReminderPolicy.objects.create(room=room, offsets='15')
+        self.assertTrue(self.daemon.policies_changed())
+
+
+class ImportReservationsTests(TestCase):
+    def setUp(self):
+        User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write_jsonl(self, lines):
+        path = os.path.join(self.tmp.name, 'reservations.jsonl')
+        with open(path, 'w') as handle:
+            handle.write(''.join(f'{line}\n' for line in lines))
+        return path
+
+    def row(self, hour, **fields):
+        return json.dumps({
+            'room': self.room.name, 'user': 'alice',
+            'start_time': f'2030-01-01T{hour:02d}:00:00', 'end_time': f'2030-01-01T{hour + 1:02d}:00:00',
+            **fields,
+        })
+
+    def import_rows(self, path, *args):
+        report = os.path.join(self.tmp.name, 'report.csv')
+        call_command('import_reservations', path, '--report', report, *args, stdout=StringIO())
+        with open(report, newline='') as handle:
+            return {int(row['line']): row['reason'] for row in csv.DictReader(handle)}
+
+    def test_json_values_of_any_type_are_checked_per_row(self):
+        rows = [
+            {'room': self.room.id, 'user': 'alice', 'title': 42, 'status': None,
+             'start_time': '2030-01-01T10:00:00', 'end_time': '2030-01-01T11:00:00'},
+            {'room': None, 'user': 'alice', 'start_time': '2030-01-01T12:00:00', 'end_time': '2030-01-01T13:00:00'},
+            {'room': self.room.id, 'user': ['alice'],
+             'start_time': '2030-01-01T12:00:00', 'end_time': '2030-01-01T13:00:00'},
+            {'room': self.room.id, 'user': 'alice', 'start_time': 5, 'end_time': '2030-01-01T13:00:00'},
+            {'room': self.room.id, 'user': 'alice', 'status': True,
+             'start_time': '2030-01-01T12:00:00', 'end_time': '2030-01-01T13:00:00'},
+            [1, 2],
+        ]
+        path = os.path.join(self.tmp.name, 'reservations.json')
+        report = os.path.join(self.tmp.name, 'report.csv')
+        with open(path, 'w') as handle:
+            json.dump(rows, handle)
+
+        call_command('import_reservations', path, '--no-email', '--report', report, stdout=StringIO())
+
+        reservation = Reservation.objects.get()
+        self.assertEqual((reservation.title, reservation.status), ('42', 'confirmed'))
+        with open(report, newline='') as handle:
+            reasons = {int(row['line']): row['reason'] for row in csv.DictReader(handle)}
+        self.assertEqual(reasons, {
+            2: 'unknown room',
+            3: 'invalid user',
+            4: 'invalid start or end time',
+            5: 'invalid status',
+            6: 'row is not an object',
+        })
+
+    def test_malformed_jsonl_line_is_rejected(self):
+        path = self.write_jsonl([self.row(9), '{"room": ', self.row(11)])
+
+        reasons = self.import_rows(path, '--no-email')
+
+        self.assertEqual(Reservation.objects.count(), 2)
+        self.assertEqual(list(reasons), [2])
+        self.assertTrue(reasons[2].startswith('invalid JSON'))
+
+    def test_dry_run_finds_overlaps_across_chunks(self):
+        path = self.write_jsonl([self.row(9), self.row(10), self.row(9)])
+
+        reasons = self.import_rows(path, '--dry-run', '--chunk-size', '1')
+
+        self.assertEqual(list(reasons), [3])
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_confirmations_are_queued_without_returned_ids(self):
+        path = self.write_jsonl([self.row(9), self.row(10), self.row(11, status='pending')])
+
+        no_returned_rows = mock.patch.object(
+            type(connection.features), 'can_return_rows_from_bulk_insert', new_callable=mock.PropertyMock,
+            return_value=False,
+        )
+        with no_returned_rows, mock.patch('bookings.management.commands.import_reservations.dispatch'):
+            self.import_rows(path)
+
+        confirmed = Reservation.objects.filter(status='confirmed').values_list('id', flat=True)
+        self.assertEqual(
+            sorted(OutboxEvent.objects.filter(event_type='confirmation_email').values_list('reservation_id', flat=True)),
+            sorted(confirmed),
+        )
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPRecipientsRefused
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from bookings import mail as mail_queue
+from bookings.models import QueuedEmail
+
+LOCMEM = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class RefusingBackend(EmailBackend):
+    """locmem backend that refuses every address at bounce.example.com"""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(to.endswith('@bounce.example.com') for to in message.to):
+                raise SMTPRecipientsRefused({message.to[0]: (550, b'No such user')})
+        return super().send_messages(messages)
+
+
+def queue(*addresses):
+    return [QueuedEmail.objects.create(to_email=to, subject='Booked', body='See you there') for to in addresses]
+
+
+@override_settings(EMAIL_BACKEND=LOCMEM, EMAIL_QUEUE_SEND_ON_COMMIT=False)
+class DeliverTests(TestCase):
+    def test_batch_goes_out_over_one_connection(self):
+        queue('a@example.com', 'b@example.com', 'c@example.com')
+
+        with mock.patch('bookings.mail.get_connection', wraps=mail.get_connection) as get_connection:
+            self.assertEqual(mail_queue.deliver(batch_size=10), (3, 0))
+
+        get_connection.assert_called_once()
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox), ['a@example.com', 'b@example.com', 'c@example.com']
+        )
+        self.assertFalse(QueuedEmail.objects.exclude(status='sent').exists())
+
+    @override_settings(EMAIL_BACKEND='bookings.tests.test_mail.RefusingBackend')
+    def test_failure_backs_off_then_gives_up(self):
+        good, bad = queue('a@example.com', 'x@bounce.example.com')
+
+        with self.assertLogs('bookings.mail', 'ERROR'):
+            self.assertEqual(mail_queue.deliver(), (1, 1))
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts, bad.claimed_until), ('pending', 1, None))
+        self.assertIn('No such user', bad.last_error)
+        self.assertGreater(bad.available_at, timezone.now() + timedelta(seconds=50))
+        # Not due again until the backoff has passed
+        self.assertEqual(mail_queue.deliver(), (0, 0))
+
+        for _ in range(mail_queue.MAX_ATTEMPTS - 1):
+            QueuedEmail.objects.filter(pk=bad.pk).update(available_at=timezone.now())
+            with self.assertLogs('bookings.mail', 'ERROR'):
+                self.assertEqual(mail_queue.deliver(), (0, 1))
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), ('failed', mail_queue.MAX_ATTEMPTS))
+        good.refresh_from_db()
+        self.assertEqual(good.status, 'sent')
+
+    def test_expired_lease_is_reclaimed(self):
+        email, = queue('a@example.com')
+        # A worker claims the email and dies before sending it
+        self.assertEqual(mail_queue.claim(), [email])
+
+        self.assertEqual(mail_queue.deliver(), (0, 0))
+        QueuedEmail.objects.filter(pk=email.pk).update(claimed_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(mail_queue.deliver(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+
+@override_settings(EMAIL_BACKEND=LOCMEM, EMAIL_QUEUE_SEND_ON_COMMIT=False)
+class MailWorkerTests(TransactionTestCase):
+    def test_single_pass_drains_the_queue(self):
+        queue(*[f'user{i}@example.com' for i in range(5)])
+        out = StringIO()
+
+        call_command('run_mail_worker', '--threads', '1', '--batch-size', '2', stdout=out)
+
+        self.assertIn('Successfully sent 5 emails (0 failed)', out.getvalue())
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(QueuedEmail.objects.filter(status='sent').count(), 5)
@@ -0,0 +1,82 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from bookings.models import OutboxEvent, QueuedEmail, Reservation, Room
+
+
+@override_settings(OUTBOX_DISPATCH_ON_COMMIT=True, EMAIL_QUEUE_SEND_ON_COMMIT=True)
+class DispatchOnCommitTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+
+    def test_one_outbox_dispatch_per_transaction(self):
+        start = timezone.now() + timedelta(days=1)
+        with mock.patch('bookings.outbox.dispatch') as dispatch:
+            with self.captureOnCommitCallbacks(execute=True):
+                for day in range(3):
+                    Reservation.objects.create(
+                        room=self.room, user=self.user, title='Standup', status='confirmed',
+                        start_time=start + timedelta(days=day), end_time=start + timedelta(days=day, hours=1),
+                    )
+
+        dispatch.assert_called_once()
+        ids = list(OutboxEvent.objects.values_list('id', flat=True))
+        self.assertEqual(sorted(dispatch.call_args.kwargs['ids']), sorted(ids))
+        self.assertEqual(len(ids), 3)
+
+    def test_rolled_back_savepoint_keeps_the_others(self):
+        with mock.patch('bookings.mail.deliver') as deliver:
+            with self.captureOnCommitCallbacks(execute=True):
+                first = QueuedEmail.enqueue('a@example.com', 'Hello', 'Body')
+                try:
+                    with transaction.atomic():
+                        QueuedEmail.enqueue('b@example.com', 'Hello', 'Body')
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                last = QueuedEmail.enqueue('c@example.com', 'Hello', 'Body')
+
+        deliver.assert_called_once()
+        self.assertTrue({first.id, last.id} <= set(deliver.call_args.kwargs['ids']))
+
+    def test_rolled_back_batch_is_not_dispatched_later(self):
+        with mock.patch('bookings.mail.deliver') as deliver:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        QueuedEmail.enqueue('a@example.com', 'Hello', 'Body')
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                email = QueuedEmail.enqueue('b@example.com', 'Hello', 'Body')
+
+        deliver.assert_called_once_with(batch_size=1, ids=[email.id])
+
+
+class ConfirmationEmailTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+        start = timezone.now() + timedelta(days=1)
+        self.reservation = Reservation.objects.create(
+            room=self.room, user=self.user, title='Standup', status='confirmed',
+            start_time=start, end_time=start + timedelta(hours=1),
+        )
+
+    def test_failed_send_is_retried(self):
+        from bookings.outbox import dispatch
+
+        with mock.patch.object(QueuedEmail, 'enqueue', side_effect=RuntimeError('mail down')):
+            done, failed = dispatch()
+
+        self.assertEqual(failed, 1)
+        event = OutboxEvent.objects.get(event_type='confirmation_email')
+        self.assertEqual(event.status, 'pending')
+        self.assertEqual(event.attempts, 1)
+        self.assertIn('mail down', event.last_error)
@@ -0,0 +1,15 @@
+from io import StringIO
+
+from django.test import TestCase
+
+from bookings.management.commands.check_query_plans import Command
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_an_index(self):
+        command = Command(stdout=StringIO())
+        command.seed({'rooms': 5, 'users': 20, 'reservations': 500})
+
+        for name, queryset in command.hot_queries():
+            with self.subTest(name):
+                self.assertEqual(command.full_scans(queryset.explain()), [])
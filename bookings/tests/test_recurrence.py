@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from bookings.forms import RecurringReservationForm
+from bookings.models import Reservation, ReservationSeries, Room
+from bookings.recurrence import MAX_OCCURRENCES, create_series, expand
+
+
+class CreateSeriesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.other = User.objects.create_user('bob', 'bob@example.com', 'password')
+        self.room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+        self.start = (timezone.localtime() + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+        self.occurrences = expand(self.start, self.start + timedelta(hours=1), 'daily', count=2)
+
+    def series(self):
+        start, end = self.occurrences[0]
+        return ReservationSeries(
+            room=self.room, user=self.user, title='Standup', start_time=start, end_time=end,
+            frequency='daily', count=len(self.occurrences),
+        )
+
+    def book(self, start, end):
+        return Reservation.objects.create(
+            room=self.room, user=self.other, title='Taken', status='confirmed', start_time=start, end_time=end,
+        )
+
+    def test_skipping_every_occurrence_saves_nothing(self):
+        for start, end in self.occurrences:
+            self.book(start, end)
+
+        created, conflicts = create_series(self.series(), self.occurrences, skip_conflicts=True)
+
+        self.assertEqual(created, [])
+        self.assertEqual(len(conflicts), 2)
+        self.assertFalse(ReservationSeries.objects.exists())
+
+    def test_skipping_some_occurrences_keeps_the_rest(self):
+        self.book(*self.occurrences[0])
+
+        created, conflicts = create_series(self.series(), self.occurrences, skip_conflicts=True)
+
+        self.assertEqual([reservation.start_time for reservation in created], [self.occurrences[1][0]])
+        self.assertEqual(list(conflicts), [0])
+
+
+class RecurringReservationFormTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+        self.start = (timezone.localtime() + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+
+    def form(self, until):
+        return RecurringReservationForm({
+            'title': 'Standup',
+            'start_time': self.start.strftime('%Y-%m-%dT%H:%M'),
+            'end_time': (self.start + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M'),
+            'frequency': 'daily',
+            'interval': 1,
+            'until': until.isoformat(),
+        }, room=self.room, user=self.user)
+
+    def test_end_date_within_the_limit(self):
+        form = self.form(self.start.date() + timedelta(days=MAX_OCCURRENCES - 1))
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(len(form.occurrences), MAX_OCCURRENCES)
+
+    def test_end_date_past_the_limit_is_rejected(self):
+        form = self.form(self.start.date() + timedelta(days=2 * 365))
+        self.assertFalse(form.is_valid())
+        self.assertIn('at most', form.non_field_errors()[0])
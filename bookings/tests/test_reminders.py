@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from bookings.models import Reminder, Reservation, Room
+from bookings.reminders import iter_policy_batches, send_policy_batch
+
+
+@override_settings(REMINDER_OFFSETS=[60, 15], REMINDER_DIGEST_WINDOW=60)
+class DigestWindowTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+        self.now = timezone.now()
+
+    def book(self, starts_in, title='Standup'):
+        start = self.now + timedelta(minutes=starts_in)
+        reservation = Reservation.objects.create(
+            room=self.room, user=self.user, title=title, status='confirmed',
+            start_time=start, end_time=start + timedelta(minutes=30),
+        )
+        # Booked well ahead, so every offset applies
+        Reservation.objects.filter(pk=reservation.pk).update(created_at=self.now - timedelta(days=1))
+        return reservation
+
+    def run_at(self, now):
+        sent = []
+        for due, superseded in iter_policy_batches(now=now):
+            send_policy_batch(due, superseded)
+            sent.extend((reminder.reservation_id, reminder.offset_minutes) for reminder in due)
+        return sent
+
+    def markers(self, reservation):
+        return set(Reminder.objects.filter(reservation=reservation).values_list('offset_minutes', flat=True))
+
+    def test_own_later_offset_is_not_pulled_forward(self):
+        reservation = self.book(59)
+
+        self.assertEqual(self.run_at(self.now), [(reservation.id, 60)])
+        self.assertEqual(self.markers(reservation), {60})
+
+        # The final reminder still goes out at its own time
+        self.assertEqual(self.run_at(self.now + timedelta(minutes=44)), [(reservation.id, 15)])
+        self.assertEqual(self.markers(reservation), {60, 15})
+
+    def test_other_reservation_joins_digest_with_its_next_offset_only(self):
+        first = self.book(59)
+        second = self.book(90, title='Planning')
+
+        self.assertEqual(sorted(self.run_at(self.now)), [(first.id, 60), (second.id, 60)])
+        self.assertEqual(self.markers(second), {60})
+        self.assertEqual(self.run_at(self.now + timedelta(minutes=75)), [(second.id, 15)])
+
+    def test_reminders_due_together_keep_only_the_latest(self):
+        reservation = self.book(10)
+
+        self.assertEqual(self.run_at(self.now), [(reservation.id, 15)])
+        self.assertEqual(self.markers(reservation), {60, 15})
+        self.assertFalse(Reminder.objects.get(reservation=reservation, offset_minutes=60).sent_at)
@@ -0,0 +1,121 @@
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.models import Reservation, Room
+from bookings.slots import SlotGrid, np
+
+
+class SlotGridTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+        self.day = timezone.localdate() + timedelta(days=1)
+
+    def at(self, hour, minute=0, days=0):
+        return timezone.make_aware(datetime.combine(self.day + timedelta(days=days), time(hour, minute)))
+
+    def book(self, start, end):
+        Reservation.objects.create(
+            room=self.room, user=self.user, title='Taken', status='confirmed', start_time=start, end_time=end,
+        )
+
+    def starts(self, minutes, days=1, **kwargs):
+        """Start times found by the bitset search, checked against the NumPy one when installed"""
+        date_to = self.day + timedelta(days=days - 1)
+        found = SlotGrid.build([self.room], self.day, date_to, use_numpy=False).feasible_starts(
+            timedelta(minutes=minutes), **kwargs
+        )
+        if np is not None:
+            with_numpy = SlotGrid.build([self.room], self.day, date_to, use_numpy=True).feasible_starts(
+                timedelta(minutes=minutes), **kwargs
+            )
+            self.assertEqual(with_numpy, found)
+        return [start for room, start in found]
+
+    def test_free_day_runs_from_midnight_to_the_last_fitting_slot(self):
+        starts = self.starts(60)
+        self.assertEqual(starts[0], self.at(0))
+        self.assertEqual(starts[-1], self.at(23))
+        self.assertEqual(len(starts), 24 * 4 - 3)
+
+    def test_whole_day_meeting(self):
+        self.assertEqual(self.starts(24 * 60), [self.at(0)])
+        self.assertEqual(self.starts(24 * 60 + 1), [])
+
+    def test_bookings_at_the_edges_of_the_day(self):
+        self.book(self.at(0), self.at(1))
+        self.book(self.at(23), self.at(23, 59))
+        starts = self.starts(60)
+        self.assertEqual(starts[0], self.at(1))
+        self.assertEqual(starts[-1], self.at(22))
+
+    def test_adjacent_bookings_leave_the_neighbouring_slots_free(self):
+        self.book(self.at(10), self.at(11))
+        self.book(self.at(12), self.at(13))
+        starts = self.starts(60, day_start=time(9), day_end=time(14))
+        self.assertEqual(starts, [self.at(9), self.at(11), self.at(13)])
+
+    def test_partly_covered_slot_is_taken(self):
+        self.book(self.at(10), self.at(10, 5))
+        starts = self.starts(15, day_start=time(9, 45), day_end=time(10, 30))
+        self.assertEqual(starts, [self.at(9, 45), self.at(10, 15)])
+
+    def test_minimum_duration_takes_one_slot(self):
+        self.book(self.at(10, 15), self.at(11))
+        starts = self.starts(1, day_start=time(10), day_end=time(11, 15))
+        self.assertEqual(starts, [self.at(10), self.at(11)])
+
+    def test_booking_across_midnight_marks_both_days(self):
+        self.book(self.at(23, 30), self.at(0, 30, days=1))
+        starts = self.starts(30, days=2, day_start=time(23), day_end=time(1))
+        self.assertEqual(starts, [])
+        starts = self.starts(30, days=2)
+        self.assertNotIn(self.at(23, 30), starts)
+        self.assertNotIn(self.at(0, days=1), starts)
+        self.assertIn(self.at(23), starts)
+        self.assertIn(self.at(0, 30, days=1), starts)
+
+    def test_window_shorter_than_the_meeting(self):
+        self.assertEqual(self.starts(60, day_start=time(9), day_end=time(9, 45)), [])
+
+
+class SearchRoomSlotsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+        self.small = Room.objects.create(name='Phone Booth', capacity=1, location='First floor')
+        self.client.force_login(self.user)
+        self.day = timezone.localdate() + timedelta(days=1)
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(datetime.combine(self.day, time(hour, minute)))
+
+    def search(self, **params):
+        return self.client.get(reverse('search_room_slots'), {'date_from': self.day.isoformat(), **params})
+
+    def test_results_around_a_booking(self):
+        Reservation.objects.create(
+            room=self.room, user=self.user, title='Taken', status='confirmed',
+            start_time=self.at(10), end_time=self.at(11),
+        )
+
+        response = self.search(capacity=4, duration=60, day_start='09:00', day_end='12:00', slot=30)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['rooms'], {str(self.room.id): 'Board Room'})
+        self.assertEqual(data['results'], [
+            [self.room.id, self.at(9).isoformat()],
+            [self.room.id, self.at(11).isoformat()],
+        ])
+
+    def test_invalid_search(self):
+        self.assertEqual(self.search(duration=0).status_code, 400)
+        self.assertEqual(self.search(duration=60, day_start='12:00', day_end='09:00').status_code, 400)
+        self.assertEqual(
+            self.search(duration=60, date_to=(self.day + timedelta(days=40)).isoformat()).status_code, 400
+        )
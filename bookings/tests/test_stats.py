@@ -0,0 +1,132 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings import stats
+from bookings.models import DailyRoomStats, DashboardStats, Reminder, ReminderPolicy, Reservation, Room, UserProfile
+from bookings.reminders import count_upcoming_policy_reminders, send_batch, upcoming_policy_reminders
+
+
+class StatsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+        self.now = timezone.now()
+
+    def book(self, starts_in, user=None, room=None, created_before=timedelta(days=2)):
+        start = self.now + starts_in
+        reservation = Reservation.objects.create(
+            room=room or self.room, user=user or self.user, title='Standup', status='confirmed',
+            start_time=start, end_time=start + timedelta(minutes=30),
+        )
+        Reservation.objects.filter(pk=reservation.pk).update(created_at=self.now - created_before)
+        return reservation
+
+    def counter(self):
+        return DashboardStats.objects.get(pk=stats.STATS_ID).pending_reminders
+
+
+class PendingReminderTests(StatsTestCase):
+    def test_stats_row_comes_from_the_migration(self):
+        self.assertTrue(DashboardStats.objects.filter(pk=stats.STATS_ID).exists())
+
+    def test_stored_reminders_are_counted_until_sent_or_deleted(self):
+        reservation = self.book(timedelta(hours=3))
+        before = self.counter()
+        with self.captureOnCommitCallbacks(execute=True):
+            first = Reminder.objects.create(
+                reservation=reservation, reminder_time=self.now - timedelta(minutes=1),
+                reminder_type='email', message='Soon',
+            )
+            second = Reminder.objects.create(
+                reservation=reservation, reminder_time=self.now + timedelta(hours=1),
+                reminder_type='email', message='Later',
+            )
+        self.assertEqual(self.counter(), before + 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            send_batch([Reminder.objects.select_related('reservation__user', 'reservation__room').get(pk=first.pk)])
+        self.assertEqual(self.counter(), before + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Reminder.objects.filter(pk=second.pk).delete()
+            Reminder.objects.filter(pk=first.pk).delete()
+        self.assertEqual(self.counter(), before)
+
+    @override_settings(REMINDER_OFFSETS=[1440, 60, 15])
+    def test_policy_count_matches_the_derived_reminders(self):
+        other = User.objects.create_user('bob', 'bob@example.com', 'password')
+        quiet = Room.objects.create(name='Quiet Room', capacity=2, location='Second floor')
+        ReminderPolicy.objects.create(user=other, offsets='30')
+        ReminderPolicy.objects.create(room=quiet, offsets='120,15')
+        reservations = [
+            self.book(timedelta(hours=2)),
+            self.book(timedelta(hours=20)),
+            self.book(timedelta(hours=30)),
+            self.book(timedelta(minutes=40), user=other),
+            self.book(timedelta(hours=3), room=quiet),
+            self.book(timedelta(hours=5), user=other, room=quiet),
+            # Booked at short notice: the 24h offset had passed already
+            self.book(timedelta(minutes=85), created_before=timedelta(minutes=5)),
+        ]
+        Reminder.objects.create(
+            reservation=reservations[0], reminder_time=reservations[0].start_time - timedelta(hours=24),
+            reminder_type='24h', message='Sent', offset_minutes=1440, is_sent=True,
+        )
+
+        for horizon in (timedelta(hours=1), timedelta(hours=24)):
+            expected = len(upcoming_policy_reminders(Reservation.objects.all(), now=self.now, horizon=horizon))
+            self.assertEqual(count_upcoming_policy_reminders(now=self.now, horizon=horizon), expected)
+
+
+class DailyRoomStatsTests(StatsTestCase):
+    def test_empty_day_rows_are_deleted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation = self.book(timedelta(days=3))
+        self.assertEqual(DailyRoomStats.objects.get(room=self.room).reservations, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.delete()
+        self.assertFalse(DailyRoomStats.objects.filter(room=self.room).exists())
+
+    def test_load_does_not_recount(self):
+        DashboardStats.objects.all().delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(stats.load().total_reservations, 0)
+        self.assertFalse(DashboardStats.objects.exists())
+
+
+class DashboardTests(StatsTestCase):
+    def test_policy_reminder_count_is_stored(self):
+        self.book(timedelta(hours=2))
+        stats.refresh_policy_reminders()
+        row = DashboardStats.objects.get(pk=stats.STATS_ID)
+        self.assertEqual(row.policy_reminders, count_upcoming_policy_reminders())
+        self.assertIsNotNone(row.policy_reminders_at)
+
+    def test_dashboard_reads_the_row(self):
+        UserProfile.objects.create(user=self.user, is_admin=True)
+        self.client.force_login(self.user)
+        DashboardStats.objects.filter(pk=stats.STATS_ID).update(pending_reminders=4, policy_reminders=7)
+
+        with mock.patch('bookings.reminders.count_upcoming_policy_reminders') as count:
+            response = self.client.get(reverse('admin_dashboard'))
+
+        count.assert_not_called()
+        self.assertEqual(response.context['total_reminders'], 4)
+        self.assertEqual(response.context['policy_reminders'], 7)
+
+    def test_trends_from_one_query(self):
+        other = Room.objects.create(name='Quiet Room', capacity=2, location='Second floor')
+        yesterday = timezone.localdate() - timedelta(days=1)
+        DailyRoomStats.objects.create(room=self.room, date=yesterday, reservations=1, booked_minutes=30)
+        DailyRoomStats.objects.create(room=other, date=yesterday, reservations=1, booked_minutes=60)
+        with self.assertNumQueries(1):
+            daily, rooms = stats.trends()
+        self.assertEqual(len(daily), stats.TREND_DAYS)
+        self.assertEqual(sum(count for day, count, minutes in daily), 2)
+        self.assertEqual([row['room__name'] for row in rooms], ['Quiet Room', 'Board Room'])
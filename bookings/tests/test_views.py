@@ -0,0 +1,198 @@
+from datetime import timedelta
+import json
+
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings import catalog
+from bookings.forms import ReservationForm
+from bookings.models import Notification, Reservation, Room
+from bookings.views import BATCH_MAX_ROOMS, BATCH_MAX_WINDOWS, NOTIFICATIONS_PER_PAGE
+
+
+class RoomDetailTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+        self.other_room = Room.objects.create(name='Quiet Room', capacity=8, location='Second floor')
+        self.client.force_login(self.user)
+        self.start = (timezone.localtime() + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+
+    def post(self):
+        return self.client.post(reverse('room_detail', args=[self.room.id]), {
+            'room': self.room.id,
+            'title': 'Planning',
+            'start_time': self.start.strftime('%Y-%m-%dT%H:%M'),
+            'end_time': (self.start + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M'),
+        })
+
+    def test_own_overlapping_booking_does_not_offer_alternatives(self):
+        Reservation.objects.create(
+            room=self.other_room, user=self.user, title='Standup', status='confirmed',
+            start_time=self.start, end_time=self.start + timedelta(hours=1),
+        )
+
+        response = self.post()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'You already have a reservation during this time period.')
+        self.assertFalse(response.context['form'].room_unavailable)
+        self.assertEqual(response.context['alternative_rooms'], [])
+
+
+    def test_room_deactivated_elsewhere_cannot_be_booked(self):
+        self.assertEqual(self.client.get(reverse('room_detail', args=[self.room.id])).status_code, 200)
+        # Another process turns the room off; this process's cached catalog still lists it
+        Room.objects.filter(pk=self.room.pk).update(is_active=False)
+        self.assertIn(self.room.id, [room.id for room in catalog.active_rooms()])
+
+        self.assertEqual(self.post().status_code, 404)
+        form = ReservationForm({
+            'room': self.room.id, 'title': 'Planning',
+            'start_time': self.start.strftime('%Y-%m-%dT%H:%M'),
+            'end_time': (self.start + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M'),
+        }, user=self.user)
+        self.assertIn('room', form.errors)
+        self.assertFalse(Reservation.objects.filter(room=self.room).exists())
+
+class RoomCalendarTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+        self.client.force_login(self.user)
+        self.url = reverse('room_calendar', args=[self.room.id])
+
+    def test_impossible_date_is_rejected(self):
+        for date in ('2024-02-30', 'yesterday'):
+            response = self.client.get(self.url, {'date': date})
+            self.assertEqual(response.status_code, 400)
+
+    def test_etag_changes_when_the_room_is_renamed(self):
+        etag = self.client.get(self.url, {'date': '2024-02-14'})['ETag']
+        self.assertEqual(self.client.get(self.url, {'date': '2024-02-14'}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.room.name = 'Boardroom'
+        self.room.save()
+        response = self.client.get(self.url, {'date': '2024-02-14'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['room']['name'], 'Boardroom')
+
+
+class NotificationPagingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+        start = timezone.now() + timedelta(days=1)
+        reservation = Reservation.objects.create(
+            room=room, user=self.user, title='Standup', status='confirmed',
+            start_time=start, end_time=start + timedelta(hours=1),
+        )
+        Notification.objects.bulk_notify([
+            Notification(user=self.user, reservation=reservation, notification_type='reservation_reminder',
+                         message=f'Reminder {i}')
+            for i in range(NOTIFICATIONS_PER_PAGE + 5)
+        ])
+        self.client.force_login(self.user)
+
+    def test_cursor_survives_deleting_its_row(self):
+        first = self.client.get(reverse('notifications'))
+        cursor = first.context['older_cursor']
+        Notification.objects.filter(pk=first.context['notifications'][-1].id).delete()
+
+        older = self.client.get(reverse('notifications'), {'before': cursor})
+
+        self.assertEqual(len(older.context['notifications']), 5)
+        self.assertIsNone(older.context['older_cursor'])
+
+    def test_unreadable_cursor_shows_the_newest_page(self):
+        response = self.client.get(reverse('notifications'), {'before': '12345'})
+
+        self.assertTrue(response.context['is_first_page'])
+        self.assertEqual(len(response.context['notifications']), NOTIFICATIONS_PER_PAGE)
+
+
+class RoomListTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        Room.objects.bulk_create([
+            Room(name=f'Room {i:02}', capacity=i, location='First floor') for i in range(1, 21)
+        ])
+        self.client.force_login(self.user)
+
+    def test_page_is_sliced_in_sql(self):
+        response = self.client.get(reverse('room_list'), {'capacity': 5, 'page': 2})
+
+        page_obj = response.context['page_obj']
+        self.assertIsInstance(page_obj.paginator.object_list, QuerySet)
+        self.assertEqual(page_obj.paginator.count, 16)
+        self.assertEqual([room.name for room in page_obj], [f'Room {i:02}' for i in range(14, 21)])
+
+
+class BatchAvailabilityTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.room = Room.objects.create(name='Board Room', capacity=8, location='First floor')
+        self.other_room = Room.objects.create(name='Quiet Room', capacity=4, location='Second floor')
+        self.closed = Room.objects.create(name='Old Room', capacity=4, location='Basement', is_active=False)
+        self.client.force_login(self.user)
+        self.start = (timezone.localtime() + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+        Reservation.objects.create(
+            room=self.room, user=self.user, title='Standup', status='confirmed',
+            start_time=self.start, end_time=self.start + timedelta(hours=1),
+        )
+
+    def window(self, hours_from, hours_to):
+        return [
+            (self.start + timedelta(hours=hours_from)).isoformat(),
+            (self.start + timedelta(hours=hours_to)).isoformat(),
+        ]
+
+    def post(self, payload):
+        body = payload if isinstance(payload, str) else json.dumps(payload)
+        return self.client.post(reverse('check_availability_batch'), body, content_type='application/json')
+
+    def test_room_by_window_matrix(self):
+        windows = [self.window(-1, 0), self.window(0.5, 1.5), self.window(1, 2)]
+        response = self.post({
+            'rooms': [self.room.id, self.other_room.id, self.closed.id, 9999],
+            'windows': windows,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['rooms'], [self.room.id, self.other_room.id, self.closed.id, 9999])
+        self.assertEqual(data['available'], [[1, 0, 1], [1, 1, 1], None, None])
+
+    def test_limits(self):
+        window = self.window(0, 1)
+        too_many_rooms = self.post({'rooms': list(range(1, BATCH_MAX_ROOMS + 2)), 'windows': [window]})
+        too_many_windows = self.post({'rooms': [self.room.id], 'windows': [window] * (BATCH_MAX_WINDOWS + 1)})
+        at_the_limit = self.post({
+            'rooms': [self.room.id] * BATCH_MAX_ROOMS, 'windows': [window] * BATCH_MAX_WINDOWS,
+        })
+
+        self.assertEqual(too_many_rooms.status_code, 400)
+        self.assertEqual(too_many_windows.status_code, 400)
+        self.assertEqual(at_the_limit.status_code, 200)
+
+    def test_bad_input(self):
+        window = self.window(0, 1)
+        for payload in [
+            'not json',
+            [self.room.id],
+            {'rooms': [self.room.id]},
+            {'rooms': ['x'], 'windows': [window]},
+            {'rooms': [self.room.id], 'windows': [[window[0]]]},
+            {'rooms': [self.room.id], 'windows': [['tomorrow', window[1]]]},
+            {'rooms': [self.room.id], 'windows': [[1, 2]]},
+            {'rooms': [], 'windows': [window]},
+            {'rooms': [self.room.id], 'windows': [[window[1], window[0]]]},
+        ]:
+            with self.subTest(payload=payload):
+                self.assertEqual(self.post(payload).status_code, 400)
+
+    def test_get_is_not_allowed(self):
+        self.assertEqual(self.client.get(reverse('check_availability_batch')).status_code, 405)
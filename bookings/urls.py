@@ -6,18 +6,22 @@ from . import debug_booking_views
 from . import email_test_views
 from . import debug_admin_views
 from . import health_views
+from . import calendar_views
+from . import stream_views
 
 urlpatterns = [
     path('', views.home, name='home'),
     path('register/', views.register, name='register'),
     path('rooms/', views.room_list, name='room_list'),
     path('rooms/<int:room_id>/', views.room_detail, name='room_detail'),
+    path('rooms/<int:room_id>/recurring/', views.room_book_recurring, name='room_book_recurring'),
     path('reservations/', views.reservation_list, name='reservation_list'),
     path('reservations/<int:reservation_id>/', views.reservation_detail, name='reservation_detail'),
     path('reservations/<int:reservation_id>/update/', views.reservation_update, name='reservation_update'),
     path('reservations/<int:reservation_id>/cancel/', views.reservation_cancel, name='reservation_cancel'),
     path('profile/', views.profile, name='profile'),
     path('notifications/', views.notifications, name='notifications'),
+    path('notifications/mark-read/', views.notifications_mark_read, name='notifications_mark_read'),
     path('reminders/', reminder_views.reminder_list, name='reminder_list'),
     path('force-migrate/', migration_views.force_migrate, name='force_migrate'),
     path('debug-booking/', debug_booking_views.debug_booking, name='debug_booking'),
@@ -32,6 +36,13 @@ urlpatterns = [
     path('manager/reservations/', views.admin_reservation_manage, name='admin_reservation_manage'),
     path('manager/reservations/create/', views.admin_reservation_create, name='admin_reservation_create'),
     path('manager/reservations/<int:reservation_id>/cancel/', views.admin_reservation_cancel, name='admin_reservation_cancel'),
+    path('manager/timeline/', calendar_views.admin_resource_timeline, name='admin_resource_timeline'),
     path('manager/reminders/', reminder_views.admin_reminder_manage, name='admin_reminder_manage'),
+    path('api/rooms/availability/batch/', views.check_availability_batch, name='check_availability_batch'),
+    path('api/events/', stream_views.event_stream, name='event_stream'),
+    path('api/rooms/search/', views.search_room_slots, name='search_room_slots'),
     path('api/rooms/<int:room_id>/availability/', views.check_room_availability, name='check_room_availability'),
+    path('api/rooms/<int:room_id>/calendar/', calendar_views.room_calendar, name='room_calendar'),
+    path('api/rooms/<int:room_id>/free-slots/', views.room_free_slots, name='room_free_slots'),
+    path('api/rooms/<int:room_id>/alternatives/', views.room_alternatives, name='room_alternatives'),
 ]
\ No newline at end of file
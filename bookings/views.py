@@ -4,23 +4,36 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
+import json
 import logging
-from .models import Room, Reservation, Notification, UserProfile, Reminder
+from .models import Room, Reservation, Notification, UserProfile, ROOM_UNAVAILABLE_MESSAGE
+from .availability import (
+    DEFAULT_WORKING_HOURS, RoomIndex, engine as availability_engine, find_free_slots, index_enabled,
+    suggest_alternative_rooms
+)
+from .slots import SlotGrid
 from .forms import (
     CustomUserCreationForm, UserProfileForm, ReservationForm, 
-    ReservationUpdateForm, RoomSearchForm, AdminReservationForm, RoomForm
+    ReservationUpdateForm, RecurringReservationForm, RoomSearchForm, FreeSlotForm, SlotSearchForm,
+    AdminReservationForm, RoomForm
 )
+from . import catalog, stats
+from .recurrence import create_series
+from .outbox import notify
 
 logger = logging.getLogger(__name__)
 
 
 def home(request):
     try:
-        rooms = Room.objects.filter(is_active=True)[:6]
+        rooms = catalog.active_rooms()[:6]
         upcoming_reservations = []
         
         if request.user.is_authenticated:
@@ -33,6 +46,7 @@ def home(request):
         context = {
             'rooms': rooms,
             'upcoming_reservations': upcoming_reservations,
+            'catalog_version': catalog.catalog_version(),
         }
         return render(request, 'bookings/home.html', context)
     except Exception as e:
@@ -61,6 +75,7 @@ def register(request):
 @login_required
 def room_list(request):
     form = RoomSearchForm(request.GET)
+    # A lazy queryset so Paginator pages it in SQL; only the room cards come from the cache
     rooms = Room.objects.filter(is_active=True)
     
     if form.is_valid():
@@ -75,12 +90,13 @@ def room_list(request):
         if date and start_time and end_time:
             start_datetime = timezone.make_aware(datetime.combine(date, start_time))
             end_datetime = timezone.make_aware(datetime.combine(date, end_time))
-            
-            available_rooms = []
-            for room in rooms:
-                if room.is_available(start_datetime, end_datetime):
-                    available_rooms.append(room)
-            rooms = available_rooms
+            if index_enabled():
+                room_ids = rooms.values_list('id', flat=True)
+                rooms = rooms.filter(
+                    id__in=availability_engine.available_room_ids(room_ids, start_datetime, end_datetime)
+                )
+            else:
+                rooms = rooms.available_between(start_datetime, end_datetime)
     
     paginator = Paginator(rooms, 9)
     page_number = request.GET.get('page')
@@ -89,13 +105,19 @@ def room_list(request):
     context = {
         'page_obj': page_obj,
         'form': form,
+        'catalog_version': catalog.catalog_version(),
     }
     return render(request, 'bookings/room_list.html', context)
 
 
 @login_required
 def room_detail(request, room_id):
-    room = get_object_or_404(Room, id=room_id, is_active=True)
+    if request.method == 'POST':
+        # Booking goes by the database: another process may have deactivated the
+        # room without this process's cached catalog knowing yet
+        room = get_object_or_404(Room, id=room_id, is_active=True)
+    else:
+        room = catalog.get_active_room(room_id) or get_object_or_404(Room, id=room_id, is_active=True)
     
     if request.method == 'POST':
         form = ReservationForm(request.POST, user=request.user, room_id=room.id)
@@ -105,17 +127,20 @@ def room_detail(request, room_id):
                 reservation.user = request.user
                 reservation.room = room
                 reservation.status = 'confirmed'
-                reservation.save()
-                
-                Notification.objects.create(
-                    user=request.user,
-                    reservation=reservation,
-                    notification_type='reservation_confirmed',
-                    message=f'Your reservation for {room.name} has been confirmed for {reservation.start_time.strftime("%Y-%m-%d %H:%M")}.'
-                )
+                with transaction.atomic():
+                    reservation.save()
+                    notify(
+                        request.user, reservation, 'reservation_confirmed',
+                        f'Your reservation for {room.name} has been confirmed for {reservation.start_time.strftime("%Y-%m-%d %H:%M")}.'
+                    )
                 
                 messages.success(request, 'Reservation created successfully!')
                 return redirect('reservation_detail', reservation.id)
+            except ValidationError as e:
+                form.add_error(None, e)
+                # Another booking won the race for this slot: offer other times and rooms
+                form.room_unavailable = ROOM_UNAVAILABLE_MESSAGE in e.messages
+                messages.error(request, 'Please check the form for errors.')
             except Exception as e:
                 messages.error(request, f'Error creating reservation: {str(e)}')
                 logger.error(f"Reservation creation error: {e}")
@@ -132,14 +157,72 @@ def room_detail(request, room_id):
         status='confirmed'
     ).order_by('start_time')[:10]
     
+    suggested_slots = []
+    alternative_rooms = []
+    if form.room_unavailable:
+        start_time = form.cleaned_data['start_time']
+        end_time = form.cleaned_data['end_time']
+        duration = end_time - start_time
+        day_start, day_end = DEFAULT_WORKING_HOURS
+        suggested_slots = [
+            (start, start + duration)
+            for start, end in find_free_slots(room, start_time, duration, count=3,
+                                              day_start=day_start, day_end=day_end)
+        ]
+        alternative_rooms = suggest_alternative_rooms(room, start_time, end_time)
+    
     context = {
         'room': room,
         'form': form,
         'upcoming_reservations': upcoming_reservations,
+        'suggested_slots': suggested_slots,
+        'alternative_rooms': alternative_rooms,
+        'requested_start': form.cleaned_data.get('start_time') if form.room_unavailable else None,
+        'requested_end': form.cleaned_data.get('end_time') if form.room_unavailable else None,
     }
     return render(request, 'bookings/room_detail.html', context)
 
 
+@login_required
+def room_book_recurring(request, room_id):
+    room = get_object_or_404(Room, id=room_id, is_active=True)
+    
+    if request.method == 'POST':
+        form = RecurringReservationForm(request.POST, room=room, user=request.user)
+        if form.is_valid():
+            series = form.save(commit=False)
+            series.room = room
+            series.user = request.user
+            try:
+                with transaction.atomic():
+                    created, conflicts = create_series(
+                        series, form.occurrences, skip_conflicts=form.cleaned_data['skip_conflicts']
+                    )
+                    if created:
+                        notify(
+                            request.user, created[0], 'reservation_confirmed',
+                            f'Your {series.get_frequency_display().lower()} reservation for {room.name} '
+                            f'has been confirmed for {len(created)} dates starting '
+                            f'{created[0].start_time.strftime("%Y-%m-%d %H:%M")}.'
+                        )
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                if not created:
+                    # Someone booked the dates between validation and saving
+                    form.conflicts = conflicts
+                    form.add_error(None, form.conflict_messages())
+                else:
+                    if conflicts:
+                        messages.warning(request, f'{len(conflicts)} dates were skipped because they are already taken.')
+                    messages.success(request, f'{len(created)} reservations created successfully!')
+                    return redirect('reservation_list')
+    else:
+        form = RecurringReservationForm(room=room, user=request.user)
+    
+    return render(request, 'bookings/room_book_recurring.html', {'room': room, 'form': form})
+
+
 @login_required
 def reservation_list(request):
     reservations = Reservation.objects.filter(user=request.user).order_by('-start_time')
@@ -176,17 +259,18 @@ def reservation_update(request, reservation_id):
     if request.method == 'POST':
         form = ReservationUpdateForm(request.POST, instance=reservation)
         if form.is_valid():
-            form.save()
-            
-            Notification.objects.create(
-                user=request.user,
-                reservation=reservation,
-                notification_type='reservation_updated',
-                message=f'Your reservation for {reservation.room.name} has been updated.'
-            )
-            
-            messages.success(request, 'Reservation updated successfully!')
-            return redirect('reservation_detail', reservation.id)
+            try:
+                with transaction.atomic():
+                    form.save()
+                    notify(
+                        request.user, reservation, 'reservation_updated',
+                        f'Your reservation for {reservation.room.name} has been updated.'
+                    )
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                messages.success(request, 'Reservation updated successfully!')
+                return redirect('reservation_detail', reservation.id)
     else:
         form = ReservationUpdateForm(instance=reservation)
     
@@ -206,14 +290,12 @@ def reservation_cancel(request, reservation_id):
     
     if request.method == 'POST':
         reservation.status = 'cancelled'
-        reservation.save()
-        
-        Notification.objects.create(
-            user=request.user,
-            reservation=reservation,
-            notification_type='reservation_cancelled',
-            message=f'Your reservation for {reservation.room.name} has been cancelled.'
-        )
+        with transaction.atomic():
+            reservation.save()
+            notify(
+                request.user, reservation, 'reservation_cancelled',
+                f'Your reservation for {reservation.room.name} has been cancelled.'
+            )
         
         messages.success(request, 'Reservation cancelled successfully!')
         return redirect('reservation_list')
@@ -227,7 +309,7 @@ def profile(request):
     
     total_reservations = request.user.reservations.count()
     active_reservations = request.user.reservations.filter(status='confirmed').count()
-    unread_notifications = Notification.objects.filter(user=request.user, is_read=False).count()
+    unread_notifications = profile.unread_notifications
     
     if request.method == 'POST':
         form = UserProfileForm(request.POST, instance=profile)
@@ -248,17 +330,70 @@ def profile(request):
     return render(request, 'bookings/profile.html', context)
 
 
+NOTIFICATIONS_PER_PAGE = 20
+MARK_READ_MAX_IDS = 500
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def notification_cursor(notification):
+    """'<created_at in microseconds since the epoch>.<id>' of the last notification on a page"""
+    return f'{(notification.created_at - EPOCH) // timedelta(microseconds=1)}.{notification.id}'
+
+
+def parse_notification_cursor(value):
+    """(created_at, id) from notification_cursor(), or None when the value is not one"""
+    micros, _, pk = (value or '').partition('.')
+    if not (micros.isdigit() and pk.isdigit()):
+        return None
+    try:
+        return EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except OverflowError:
+        return None
+
+
 @login_required
 def notifications(request):
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
+    # Keyset pagination on (created_at, id): no COUNT and no OFFSET, so a page
+    # costs the same however many notifications the user has collected. The
+    # cursor carries both values, so it still works after its row is deleted;
+    # anything unreadable starts again from the newest.
+    notifications = Notification.objects.filter(user=request.user).select_related('reservation')
+    cursor = parse_notification_cursor(request.GET.get('before'))
+    if cursor is not None:
+        created_at, pk = cursor
+        notifications = notifications.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    page = list(notifications.order_by('-created_at', '-pk')[:NOTIFICATIONS_PER_PAGE + 1])
+    has_older = len(page) > NOTIFICATIONS_PER_PAGE
+    page = page[:NOTIFICATIONS_PER_PAGE]
+    
+    # Only what is on screen is marked read; the rows keep is_read=False here so they still show as new
+    unread_ids = [notification.id for notification in page if not notification.is_read]
+    if unread_ids:
+        Notification.objects.mark_read(request.user, ids=unread_ids)
     
-    notifications.update(is_read=True)
-    
-    paginator = Paginator(notifications, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    context = {
+        'notifications': page,
+        'is_first_page': cursor is None,
+        'older_cursor': notification_cursor(page[-1]) if has_older else None,
+    }
+    return render(request, 'bookings/notifications.html', context)
+
+
+@login_required
+@require_POST
+def notifications_mark_read(request):
+    """Mark notifications read by id, or all of them with {"all": true}"""
+    try:
+        payload = json.loads(request.body)
+        ids = None if payload.get('all') else [int(pk) for pk in payload['ids']]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Expected JSON {"ids": [ids]} or {"all": true}'}, status=400)
+    if ids is not None and len(ids) > MARK_READ_MAX_IDS:
+        return JsonResponse({'error': f'At most {MARK_READ_MAX_IDS} ids per request'}, status=400)
     
-    return render(request, 'bookings/notifications.html', {'page_obj': page_obj})
+    marked = Notification.objects.mark_read(request.user, ids=ids)
+    unread = UserProfile.objects.filter(user=request.user).values_list('unread_notifications', flat=True).first()
+    return JsonResponse({'marked': marked, 'unread': unread or 0})
 
 
 @login_required
@@ -267,25 +402,33 @@ def admin_dashboard(request):
         messages.error(request, 'Access denied. Admin privileges required.')
         return redirect('home')
     
-    total_rooms = Room.objects.filter(is_active=True).count()
-    total_reservations = Reservation.objects.count()
-    active_reservations = Reservation.objects.filter(status='confirmed').count()
-    total_users = User.objects.count()
-    total_reminders = Reminder.objects.filter(is_sent=False).count()
+    # Counters come from the rollup row; reconcile_stats keeps it honest
+    dashboard_stats = stats.load()
+    daily_trend, room_trend = stats.trends()
+    busiest_day = max((count for day, count, minutes in daily_trend), default=0)
     
-    recent_reservations = Reservation.objects.order_by('-created_at')[:10]
+    recent_reservations = Reservation.objects.select_related('room', 'user').order_by('-created_at')[:10]
     
     upcoming_reservations = Reservation.objects.filter(
         start_time__gte=timezone.now(),
         status='confirmed'
-    ).order_by('start_time')[:10]
+    ).select_related('room', 'user').order_by('start_time')[:10]
     
     context = {
-        'total_rooms': total_rooms,
-        'total_reservations': total_reservations,
-        'active_reservations': active_reservations,
-        'total_users': total_users,
-        'total_reminders': total_reminders,
+        'total_rooms': dashboard_stats.active_rooms,
+        'total_reservations': dashboard_stats.total_reservations,
+        'active_reservations': dashboard_stats.confirmed_reservations,
+        'total_users': dashboard_stats.total_users,
+        'total_reminders': dashboard_stats.pending_reminders,
+        'policy_reminders': dashboard_stats.policy_reminders,
+        'policy_reminders_at': dashboard_stats.policy_reminders_at,
+        'stats_reconciled_at': dashboard_stats.reconciled_at,
+        'daily_trend': [
+            (day, count, minutes, round(100 * count / busiest_day) if busiest_day else 0)
+            for day, count, minutes in daily_trend
+        ],
+        'room_trend': room_trend[:10],
+        'trend_days': stats.TREND_DAYS,
         'recent_reservations': recent_reservations,
         'upcoming_reservations': upcoming_reservations,
     }
@@ -408,17 +551,18 @@ def admin_reservation_create(request):
         if form.is_valid():
             reservation = form.save(commit=False)
             reservation.created_by_admin = True
-            reservation.save()
-            
-            Notification.objects.create(
-                user=reservation.user,
-                reservation=reservation,
-                notification_type='reservation_confirmed',
-                message=f'A reservation for {reservation.room.name} has been created for you by an administrator.'
-            )
-            
-            messages.success(request, 'Reservation created successfully!')
-            return redirect('admin_reservation_manage')
+            try:
+                with transaction.atomic():
+                    reservation.save()
+                    notify(
+                        reservation.user, reservation, 'reservation_confirmed',
+                        f'A reservation for {reservation.room.name} has been created for you by an administrator.'
+                    )
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                messages.success(request, 'Reservation created successfully!')
+                return redirect('admin_reservation_manage')
     else:
         form = AdminReservationForm()
     
@@ -435,14 +579,12 @@ def admin_reservation_cancel(request, reservation_id):
     
     if request.method == 'POST':
         reservation.status = 'cancelled'
-        reservation.save()
-        
-        Notification.objects.create(
-            user=reservation.user,
-            reservation=reservation,
-            notification_type='reservation_cancelled',
-            message=f'Your reservation for {reservation.room.name} has been cancelled by an administrator.'
-        )
+        with transaction.atomic():
+            reservation.save()
+            notify(
+                reservation.user, reservation, 'reservation_cancelled',
+                f'Your reservation for {reservation.room.name} has been cancelled by an administrator.'
+            )
         
         messages.success(request, 'Reservation cancelled successfully!')
         return redirect('admin_reservation_manage')
@@ -463,7 +605,152 @@ def check_room_availability(request, room_id):
         start_dt = timezone.make_aware(datetime.fromisoformat(start_time))
         end_dt = timezone.make_aware(datetime.fromisoformat(end_time))
         
-        available = room.is_available(start_dt, end_dt)
+        if index_enabled():
+            available = availability_engine.is_available(room.id, start_dt, end_dt)
+        else:
+            available = Room.objects.filter(id=room.id).available_between(start_dt, end_dt).exists()
         return JsonResponse({'available': available})
     except ValueError:
-        return JsonResponse({'available': False, 'error': 'Invalid time format'})
\ No newline at end of file
+        return JsonResponse({'available': False, 'error': 'Invalid time format'})
+
+
+@login_required
+def room_free_slots(request, room_id):
+    """Next free gaps in a room that fit the requested duration"""
+    room = get_object_or_404(Room, id=room_id, is_active=True)
+    form = FreeSlotForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'error': form.errors}, status=400)
+
+    data = form.cleaned_data
+    duration = timedelta(minutes=data['duration'])
+    slots = find_free_slots(
+        room,
+        data.get('after') or timezone.now(),
+        duration,
+        count=data.get('count') or 5,
+        day_start=data.get('day_start'),
+        day_end=data.get('day_end'),
+    )
+    return JsonResponse({
+        'room': room.id,
+        'duration': data['duration'],
+        'slots': [
+            {'start': start.isoformat(), 'end': end.isoformat(), 'suggested_end': (start + duration).isoformat()}
+            for start, end in slots
+        ],
+    })
+
+
+BATCH_MAX_ROOMS = 200
+BATCH_MAX_WINDOWS = 500
+
+
+def _parse_datetime(value):
+    parsed = datetime.fromisoformat(value)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+@login_required
+def room_alternatives(request, room_id):
+    """Best substitute rooms that are free for the requested window"""
+    room = get_object_or_404(Room, id=room_id)
+    start_time = request.GET.get('start_time')
+    end_time = request.GET.get('end_time')
+    
+    if not start_time or not end_time:
+        return JsonResponse({'error': 'Missing time parameters'}, status=400)
+    
+    try:
+        start_dt = _parse_datetime(start_time)
+        end_dt = _parse_datetime(end_time)
+        capacity = int(request.GET['capacity']) if request.GET.get('capacity') else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid parameters'}, status=400)
+    
+    rooms = suggest_alternative_rooms(room, start_dt, end_dt, min_capacity=capacity, limit=5)
+    return JsonResponse({
+        'room': room.id,
+        'alternatives': [
+            {'id': r.id, 'name': r.name, 'capacity': r.capacity, 'location': r.location}
+            for r in rooms
+        ],
+    })
+
+
+@login_required
+@require_POST
+def check_availability_batch(request):
+    """Availability matrix for many rooms and windows, resolved with one range query"""
+    try:
+        payload = json.loads(request.body)
+        room_ids = [int(room_id) for room_id in payload['rooms']]
+        windows = [(_parse_datetime(start), _parse_datetime(end)) for start, end in payload['windows']]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected JSON {"rooms": [ids], "windows": [[start, end], ...]}'}, status=400)
+
+    if not room_ids or not windows:
+        return JsonResponse({'error': 'At least one room and one window are required'}, status=400)
+    if len(room_ids) > BATCH_MAX_ROOMS or len(windows) > BATCH_MAX_WINDOWS:
+        return JsonResponse({
+            'error': f'At most {BATCH_MAX_ROOMS} rooms and {BATCH_MAX_WINDOWS} windows per request'
+        }, status=400)
+    if any(start >= end for start, end in windows):
+        return JsonResponse({'error': 'Each window must end after it starts'}, status=400)
+
+    known_rooms = set(Room.objects.filter(id__in=room_ids, is_active=True).values_list('id', flat=True))
+    range_start = min(start for start, end in windows)
+    range_end = max(end for start, end in windows)
+    intervals = {room_id: [] for room_id in room_ids}
+    rows = Reservation.objects.filter(
+        room_id__in=room_ids,
+        start_time__lt=range_end,
+        end_time__gt=range_start,
+        status='confirmed'
+    ).values_list('room_id', 'start_time', 'end_time', 'id')
+    for room_id, start, end, pk in rows:
+        intervals[room_id].append((start, end, pk))
+
+    matrix = []
+    for room_id in room_ids:
+        if room_id not in known_rooms:
+            matrix.append(None)
+            continue
+        index = RoomIndex(room_id, intervals[room_id], version=None, horizon=range_start)
+        matrix.append([0 if index.overlaps(start, end) else 1 for start, end in windows])
+
+    return JsonResponse({
+        'rooms': room_ids,
+        'windows': [[start.isoformat(), end.isoformat()] for start, end in windows],
+        'available': matrix,
+    })
+
+
+@login_required
+def search_room_slots(request):
+    """Every (room, start) pair that fits the requested meeting, from one slot-bitmap pass"""
+    form = SlotSearchForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'error': form.errors}, status=400)
+
+    data = form.cleaned_data
+    rooms = Room.objects.filter(is_active=True)
+    if data.get('capacity'):
+        rooms = rooms.filter(capacity__gte=data['capacity'])
+
+    grid = SlotGrid.build(rooms, data['date_from'], data['date_to'], slot_minutes=data['slot'])
+    matches = grid.feasible_starts(
+        timedelta(minutes=data['duration']),
+        day_start=data.get('day_start'),
+        day_end=data.get('day_end'),
+        not_before=timezone.now(),
+    )
+
+    return JsonResponse({
+        'slot_minutes': data['slot'],
+        'duration': data['duration'],
+        'rooms': {room.id: room.name for room in grid.rooms},
+        'results': [[room.id, start.isoformat()] for room, start in matches],
+    })
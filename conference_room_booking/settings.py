@@ -44,6 +44,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'bookings.context_processors.notification_count',
+                'bookings.context_processors.live_events',
             ],
         },
     },
@@ -96,6 +97,79 @@ LOGIN_REDIRECT_URL = '/'
 LOGIN_URL = '/login/'
 LOGOUT_REDIRECT_URL = '/'
 
+# Cache backend, chosen with CACHE_BACKEND:
+#   locmem (default): per process, nothing to set up
+#   file: shared by the processes of one machine, under CACHE_LOCATION
+#   db: shared by every process using this database; stands in for a shared
+#       cache server. Run `python manage.py createcachetable` once.
+# Any other value is taken as the dotted path of a cache backend class.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'conference-room-booking'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', '/tmp/conference-room-booking-cache'),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'bookings_cache'),
+}
+_cache_backend, _cache_location = CACHE_BACKENDS.get(
+    os.environ.get('CACHE_BACKEND', 'locmem'), (os.environ.get('CACHE_BACKEND'), '')
+)
+CACHES = {
+    'default': {
+        'BACKEND': _cache_backend,
+        'LOCATION': os.environ.get('CACHE_LOCATION', _cache_location),
+        'KEY_PREFIX': os.environ.get('CACHE_KEY_PREFIX', 'crb'),
+    }
+}
+
+# How long the active room list may be served from the cache. Room saves and
+# deletes invalidate it straight away; this only bounds how stale it gets
+# after a change that bypasses signals, such as a queryset update().
+ROOM_CATALOG_TTL = int(os.environ.get('ROOM_CATALOG_TTL', '3600'))
+
+# In-memory availability index for room search and the availability API; needs
+# a shared CACHE_BACKEND (db, file or a cache server), see check bookings.E001
+AVAILABILITY_INDEX_ENABLED = os.environ.get('AVAILABILITY_INDEX_ENABLED', 'False') == 'True'
+AVAILABILITY_INDEX_TTL = int(os.environ.get('AVAILABILITY_INDEX_TTL', '300'))
+
+# Reservation side effects (reminders, confirmation emails, notifications) are
+# written to an outbox in the booking transaction. By default they are
+# dispatched right after commit; set this to False and run
+# `python manage.py dispatch_outbox --loop` as a worker to take them off the
+# request path.
+OUTBOX_DISPATCH_ON_COMMIT = os.environ.get('OUTBOX_DISPATCH_ON_COMMIT', 'True') == 'True'
+OUTBOX_LEASE_SECONDS = int(os.environ.get('OUTBOX_LEASE_SECONDS', '300'))
+
+# Confirmation and reminder emails go through the QueuedEmail table. By
+# default each one is sent right after commit; set this to False and run
+# `python manage.py run_mail_worker --loop` to send them in batches over
+# persistent connections instead.
+EMAIL_QUEUE_SEND_ON_COMMIT = os.environ.get('EMAIL_QUEUE_SEND_ON_COMMIT', 'True') == 'True'
+EMAIL_QUEUE_LEASE_SECONDS = int(os.environ.get('EMAIL_QUEUE_LEASE_SECONDS', '300'))
+
+# How long a process_reminders run or reminder_daemon holds a batch of
+# reminders before another worker may take it over
+REMINDER_LEASE_SECONDS = int(os.environ.get('REMINDER_LEASE_SECONDS', '300'))
+
+# Default minutes before a meeting at which reminders are sent, for users and
+# rooms without a ReminderPolicy
+REMINDER_OFFSETS = [
+    int(minutes) for minutes in os.environ.get('REMINDER_OFFSETS', '1440,60,15').split(',') if minutes.strip()
+]
+
+# Send one digest per user instead of one email per reminder. The value is
+# how many minutes ahead a due reminder may pull the user's other reminders
+# into the same digest; leave unset to send reminders individually.
+REMINDER_DIGEST_WINDOW = (
+    int(os.environ['REMINDER_DIGEST_WINDOW']) if os.environ.get('REMINDER_DIGEST_WINDOW') else None
+)
+
+# Live notification and availability events over Server-Sent Events at
+# /api/events/. Needs an ASGI server (e.g. `uvicorn
+# conference_room_booking.asgi:application`): under WSGI every open stream
+# would hold a worker. EVENTS_BROKER carries events between server processes;
+# the default LocalBroker only reaches clients of the process that made the change.
+EVENTS_STREAM_ENABLED = os.environ.get('EVENTS_STREAM_ENABLED', 'False') == 'True'
+EVENTS_STREAM_MAX_SECONDS = int(os.environ.get('EVENTS_STREAM_MAX_SECONDS', '300'))
+EVENTS_BROKER = os.environ.get('EVENTS_BROKER', 'bookings.events.LocalBroker')
+
 # Email Configuration (Serverless-friendly)
 # Use console backend if no email credentials are provided
 if os.environ.get('EMAIL_HOST_USER') and os.environ.get('EMAIL_HOST_PASSWORD'):